@@ -83,6 +83,9 @@ MEDIA_ROOT={base_path}/media
 # Static Files
 STATIC_ROOT={base_path}/staticfiles
 
+# Cache shared by all gunicorn workers (deploy.sh runs createcachetable)
+CACHE_URL=dbcache://river_cache
+
 # Email Settings (optional)
 # EMAIL_BACKEND=django.core.mail.backends.smtp.EmailBackend
 # EMAIL_HOST=smtp.gmail.com
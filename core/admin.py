@@ -66,8 +66,8 @@ class MetricAdmin(admin.ModelAdmin):
 
 @admin.register(Photo)
 class PhotoAdmin(admin.ModelAdmin):
-    list_display = ('section', 'timestamp', 'description_preview')
-    list_filter = ('section', 'timestamp')
+    list_display = ('section', 'timestamp', 'description_preview', 'processing_status')
+    list_filter = ('section', 'timestamp', 'processing_status')
     search_fields = ('description', 'section__name')
     ordering = ('-timestamp',)
     
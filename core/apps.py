@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+
+    def ready(self):
+        # Register model signal handlers (rollup maintenance).
+        from . import signals  # noqa: F401
@@ -2,6 +2,8 @@ from django import forms
 from django.forms import inlineformset_factory
 from django.core.validators import MinLengthValidator
 from .models import Section, Task, TaskTemplate, TaskType, VisitLog, Metric, Photo, Status
+from .services.photo_uploads import UploadError, completed_file, discard_upload
+from .services.task_services import next_todo_position
 
 class SectionForm(forms.ModelForm):
     class Meta:
@@ -160,6 +162,14 @@ class TaskForm(forms.ModelForm):
         
         return cleaned_data
 
+    def save(self, commit=True):
+        task = self.instance
+        # A task joining a Kanban column goes below its last card, TODO_GAP
+        # past it, so drops around it still find a free position.
+        if task.is_rolling and (task._state.adding or {'is_rolling', 'todo_status'} & set(self.changed_data)):
+            task.todo_position = next_todo_position(task.todo_status, exclude_id=task.pk)
+        return super().save(commit)
+
 class VisitLogForm(forms.ModelForm):
     class Meta:
         model = VisitLog
@@ -184,15 +194,60 @@ class MetricForm(forms.ModelForm):
         }
 
 class PhotoForm(forms.ModelForm):
+    # Id of a finished chunked upload (services.photo_uploads), sent instead
+    # of the file itself by static/js/mobile.js.
+    upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
     # Make description completely optional - no validators at form level
     description = forms.CharField(
         required=False,
         widget=forms.Textarea(attrs={'rows': 3})
     )
     
+    # upload first, so clean_file can use it.
+    field_order = ['upload', 'file', 'description']
+
     class Meta:
         model = Photo
         fields = ['file', 'description']
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Only the user who sent a chunked upload may attach it.
+        self.user = user
+        self.part_file = None
+        # A chunked upload arrives without a file part; BasePhotoFormSet
+        # drops forms that end up with neither.
+        self.fields['file'].required = False
+
+    def clean_file(self):
+        file = self.cleaned_data.get('file')
+        upload = self.cleaned_data.get('upload')
+        if upload and self.add_prefix('file') not in self.files:
+            try:
+                part = completed_file(upload, user=self.user)
+            except UploadError as exc:
+                raise forms.ValidationError(str(exc))
+            # Opened only while validated and while saved, so an invalid
+            # form leaves no file handle behind.
+            with part.open():
+                file = self.fields['file'].clean(part, self.initial.get('file'))
+            self.part_file = part
+        return file
+
+    def save(self, commit=True):
+        if self.part_file is None:
+            photo = super().save(commit=commit)
+        elif commit:
+            with self.part_file.open():
+                photo = super().save()
+        else:
+            self.part_file.open()  # read (and left for the caller to close) by photo.save()
+            return super().save(commit=False)
+        upload = self.cleaned_data.get('upload')
+        if commit and upload:
+            # The photo has its own copy in MEDIA_ROOT now.
+            discard_upload(upload)
+        return photo
     
     def clean_description(self):
         description = self.cleaned_data.get('description', '')
@@ -223,11 +278,12 @@ MetricFormSet = inlineformset_factory(
 class BasePhotoFormSet(forms.BaseInlineFormSet):
     def clean(self):
         super().clean()
-        # Mark forms without files for deletion
+        # Mark forms without files for deletion (a form naming an upload
+        # keeps its error if the upload could not be used)
         for form in self.forms:
             if self.can_delete and hasattr(form, 'cleaned_data'):
                 file = form.cleaned_data.get('file')
-                if not file:
+                if not file and not form.cleaned_data.get('upload'):
                     form.cleaned_data['DELETE'] = True
 
 # Formset for photos
@@ -0,0 +1,61 @@
+"""
+Build thumbnail/medium copies for photos whose copies are missing or stale.
+
+Photos stored before the processing queue existed are marked done by its
+migration, so their originals are kept exactly as uploaded. This command
+builds their copies in-process, reading the original without touching it.
+
+Re-encoding originals (upright, EXIF stripped, JPEG at quality 90) is lossy
+and cannot be undone, so for old media it is opt-in: --reencode queues the
+photos for the process_photos worker instead.
+
+Usage:
+    python manage.py backfill_photo_derivatives              # missing or stale copies only
+    python manage.py backfill_photo_derivatives --force      # every photo
+    python manage.py backfill_photo_derivatives --check      # count, change nothing
+    python manage.py backfill_photo_derivatives --reencode   # queue for process_photos (rewrites originals)
+"""
+from django.core.management.base import BaseCommand
+
+from core.models import Photo
+from core.services.photo_derivatives import build_derivatives, derivatives_stale
+from core.services.photo_processing import queue_photo
+
+
+class Command(BaseCommand):
+    help = 'Build thumbnail/medium copies for existing photos (or queue them for re-encoding)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Include photos whose derivatives already exist')
+        parser.add_argument('--check', action='store_true', help='Only count photos that need derivatives')
+        parser.add_argument('--reencode', action='store_true',
+                            help='Queue photos for process_photos, which also rewrites their originals '
+                                 '(lossy, irreversible)')
+        parser.add_argument('--batch-size', type=int, default=200, help='Rows fetched per query')
+
+    def handle(self, *args, **options):
+        photos = (
+            Photo.objects.exclude(file='')
+            .only('id', 'file', 'thumbnail', 'medium', 'processing_status')
+            .order_by('id')
+        )
+        pending = [
+            p for p in photos.iterator(chunk_size=options['batch_size'])
+            if options['force'] or derivatives_stale(p)
+        ]
+        if options['check']:
+            self.stdout.write(f'{len(pending)} photo(s) need derivatives.')
+            return
+
+        if options['reencode']:
+            queued = sum(queue_photo(p) for p in pending)
+            self.stdout.write(self.style.SUCCESS(
+                f'Queued {queued} photo(s) ({len(pending) - queued} already pending). '
+                'Run process_photos to re-encode them.'
+            ))
+            return
+
+        built = sum(build_derivatives(p, force=options['force']) for p in pending)
+        self.stdout.write(self.style.SUCCESS(
+            f'Built derivatives for {built} photo(s); {len(pending) - built} unreadable or unchanged.'
+        ))
@@ -0,0 +1,73 @@
+"""
+Benchmark the full data export (time, peak Python heap, RSS) at two sizes.
+
+Seeds synthetic visit logs inside a transaction that is rolled back at the
+end, so it is safe to run against a dev database. A streaming export should
+show roughly the same peak memory at both sizes.
+
+Usage:
+    python manage.py benchmark_export                 # 5,000 then 50,000 logs
+    python manage.py benchmark_export --logs 20000    # 2,000 then 20,000 logs
+"""
+import resource
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Metric, Section, VisitLog
+from core.services.excel_export import new_workbook, write_project_report
+
+
+class Command(BaseCommand):
+    help = 'Measure time and peak memory of the Excel data export at 1/10 and full size'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logs', type=int, default=50000, help='Visit logs for the full-size run')
+
+    def handle(self, *args, **options):
+        full = options['logs']
+        with transaction.atomic():
+            section = Section.objects.create(name='Export Benchmark', position=0)
+            seeded = 0
+            for target in (max(full // 10, 1), full):
+                self._seed(section, seeded, target - seeded)
+                seeded = target
+                seconds, peak, rss = self._measure()
+                self.stdout.write(
+                    f'{target:>8} logs: {seconds:6.1f}s  peak heap {peak / 1e6:7.1f} MB  max RSS {rss / 1e3:7.1f} MB'
+                )
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS('Benchmark data rolled back.'))
+
+    def _seed(self, section, offset, count, batch_size=5000):
+        start = date(2015, 1, 1)
+        for first in range(offset, offset + count, batch_size):
+            visits = VisitLog.objects.bulk_create([
+                VisitLog(section=section, date=start + timedelta(days=i % 3650),
+                         notes=f'Benchmark visit {i}: cleared the bank and bagged litter.')
+                for i in range(first, min(first + batch_size, offset + count))
+            ])
+            Metric.objects.bulk_create([
+                Metric(visit=v, metric_type='litter_general', value=3) for v in visits
+            ])
+
+    def _measure(self):
+        tracemalloc.start()
+        began = time.perf_counter()
+        try:
+            wb = new_workbook()
+            write_project_report(wb)
+            # Same save path as workbook_response(); closing a FileResponse
+            # here would fire request_finished and close the DB connection.
+            with tempfile.TemporaryFile(suffix='.xlsx') as output:
+                wb.save(output)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        # ru_maxrss is in KB on Linux (bytes on macOS); it is a high-water mark
+        # for the whole process, so compare the two runs rather than read it raw.
+        return time.perf_counter() - began, peak, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
@@ -0,0 +1,68 @@
+"""
+Benchmark rolling Kanban moves on a large board.
+
+Seeds rolling tasks (default 1,000, spread over the three columns) inside a
+transaction that is rolled back at the end, so it is safe against a dev
+database. It then makes random drags and reports time, queries and rows
+written per move, plus how many moves had to rebalance a column.
+
+Usage:
+    python manage.py benchmark_kanban                    # 1,000 tasks, 500 moves
+    python manage.py benchmark_kanban --tasks 5000 --moves 2000
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Task
+from core.services.task_services import TODO_GAP, move_todo_task
+
+
+class Command(BaseCommand):
+    help = 'Measure queries and rows written per rolling Kanban move'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000, help='Rolling tasks to seed')
+        parser.add_argument('--moves', type=int, default=500, help='Random moves to make')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        statuses = [s for s, _ in Task.TODO_STATUS_CHOICES]
+        with transaction.atomic():
+            Task.objects.bulk_create([
+                Task(instructions=f'Kanban benchmark {i}', is_rolling=True,
+                     todo_status=statuses[i % 3], todo_position=(i // 3 + 1) * TODO_GAP)
+                for i in range(options['tasks'])
+            ], batch_size=500)
+            ids = list(Task.objects.filter(is_rolling=True).values_list('id', flat=True))
+            sizes = {s: Task.objects.filter(is_rolling=True, todo_status=s).count() for s in statuses}
+
+            queries = writes = rebalances = 0
+            worst_writes = 0
+            began = time.perf_counter()
+            for _ in range(options['moves']):
+                status = rng.choice(statuses)
+                with CaptureQueriesContext(connection) as ctx:
+                    move_todo_task(rng.choice(ids), status, rng.randint(0, sizes[status]))
+                sizes = {s: Task.objects.filter(is_rolling=True, todo_status=s).count() for s in statuses}
+                updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+                queries += len(ctx.captured_queries)
+                # bulk_update sets three columns, so a rebalance has three WHENs per row.
+                rows = sum(1 if 'CASE' not in sql else sql.count(' WHEN ') // 3 for sql in updates)
+                writes += rows
+                worst_writes = max(worst_writes, rows)
+                rebalances += any('CASE' in sql for sql in updates)
+            elapsed = time.perf_counter() - began
+            transaction.set_rollback(True)
+
+        moves = options['moves']
+        self.stdout.write(
+            f"{options['tasks']} tasks, {moves} moves: {elapsed / moves * 1000:.2f} ms/move, "
+            f"{queries / moves:.1f} queries/move, {writes / moves:.2f} rows written/move "
+            f"(worst {worst_writes}), {rebalances} rebalance(s)"
+        )
+        self.stdout.write(self.style.SUCCESS('Benchmark data rolled back.'))
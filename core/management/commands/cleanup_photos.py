@@ -1,32 +1,71 @@
 #!/usr/bin/env python
 """
-Clean up orphaned photo records that reference non-existent files.
-Run with: python manage.py cleanup_photos
+Reconcile photo rows with the files under MEDIA_ROOT/photos/:
+
+  - delete Photo records whose original no longer exists,
+  - delete content blobs (and their files) that no photo uses any more,
+  - delete files that no record or blob references,
+
+leaving alone anything younger than --min-age (an upload may be in flight).
+
+The tree is listed once and diffed against the Photo table as sets
+(services.photo_cleanup); storage calls run on a thread pool for remote
+backends.
+
+Run with: python manage.py cleanup_photos [--dry-run] [--workers N]
 """
+from datetime import timedelta
+
 from django.core.management.base import BaseCommand
-from core.models import Photo
+
+from core.services.photo_blobs import collect_blobs
+from core.services.photo_cleanup import (
+    MIN_FILE_AGE, default_workers, delete_files, delete_photo_rows, photo_storage, scan_photos, total_size,
+)
 
 
 class Command(BaseCommand):
-    help = 'Remove photo database records for files that no longer exist on disk'
+    help = 'Remove photo records without files, unused blobs, and files without records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted, change nothing')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Threads for storage calls (default: 1 for local disk, more for remote storage)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows streamed/deleted per query')
+        parser.add_argument('--min-age', type=int, default=int(MIN_FILE_AGE.total_seconds() // 60),
+                            help='Minutes a file (or a blob since an upload last picked it) must be old '
+                                 'before it counts as unreferenced')
 
     def handle(self, *args, **options):
-        photos = Photo.objects.all()
-        deleted_count = 0
-        
-        for photo in photos:
-            if not photo.file or not photo.file.storage.exists(photo.file.name):
-                self.stdout.write(
-                    self.style.WARNING(
-                        f'Deleting orphaned record: {photo.id} - {photo.file.name}'
-                    )
-                )
-                photo.delete()
-                deleted_count += 1
-        
-        if deleted_count:
+        storage = photo_storage()
+        workers = options['workers'] or default_workers(storage)
+        min_age = timedelta(minutes=options['min_age'])
+        scan = scan_photos(storage, workers=workers, batch_size=options['batch_size'], min_age=min_age)
+        missing, orphans = scan['missing_rows'], scan['orphan_files']
+        self.stdout.write(f"Scanned {len(scan['files'])} file(s) with {workers} worker(s).")
+
+        if options['verbosity'] >= 2:
+            for pk in missing:
+                self.stdout.write(self.style.WARNING(f'Orphaned record: {pk}'))
+            for name in orphans:
+                self.stdout.write(self.style.WARNING(f'Unreferenced file: {name}'))
+
+        if options['dry_run']:
+            blobs = collect_blobs(dry_run=True, grace=min_age)
+            size = total_size(orphans, storage, workers)
             self.stdout.write(
-                self.style.SUCCESS(f'Successfully deleted {deleted_count} orphaned photo records.')
+                f'Dry run: would delete {len(missing)} orphaned photo record(s), {len(blobs)} unused '
+                f'photo blob(s) and {len(orphans)} unreferenced file(s) ({size / 1024 / 1024:.1f} MB).'
             )
+            return
+
+        deleted_rows = delete_photo_rows(missing, storage, workers, batch_size=options['batch_size'])
+        collected = collect_blobs(grace=min_age)
+        deleted_files = delete_files(orphans, storage, workers)
+
+        if deleted_rows:
+            self.stdout.write(self.style.SUCCESS(f'Successfully deleted {deleted_rows} orphaned photo records.'))
         else:
             self.stdout.write(self.style.SUCCESS('No orphaned photo records found.'))
+        self.stdout.write(self.style.SUCCESS(f'Deleted {len(collected)} unused photo blob(s).'))
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted_files} unreferenced file(s).'))
@@ -0,0 +1,34 @@
+"""
+Report the dashboard block cache hit rate.
+
+Usage:
+    python manage.py dashboard_cache_stats           # print hits / misses / rate
+    python manage.py dashboard_cache_stats --reset   # print, then zero the counters
+
+The counters cover a sample of requests (settings.DASHBOARD_CACHE_STATS_SAMPLE),
+so the hit rate is representative but hits + misses is not a request count.
+"""
+from django.core.management.base import BaseCommand
+
+from core.services.dashboard_cache import dashboard_cache_stats, data_version, reset_dashboard_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show dashboard cache hit/miss counters (shared across workers when the cache backend is shared)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Zero the counters after printing them',
+        )
+
+    def handle(self, *args, **options):
+        stats = dashboard_cache_stats()
+        self.stdout.write(f"Data version: {data_version()}")
+        self.stdout.write(f"Hits:         {stats['hits']}")
+        self.stdout.write(f"Misses:       {stats['misses']}")
+        self.stdout.write(self.style.SUCCESS(f"Hit rate:     {stats['hit_rate']:.1%}"))
+        if options['reset']:
+            reset_dashboard_cache_stats()
+            self.stdout.write('Counters reset.')
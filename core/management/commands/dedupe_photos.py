@@ -0,0 +1,88 @@
+"""
+Move photos stored before content deduplication into shared blobs.
+
+Each legacy photo (no blob) is hashed from storage and pointed at the
+PhotoBlob for its content (services.photo_blobs); its original and
+derivative files are then deleted once no other row uses them. Derivatives
+are carried over to the blob's names, or the photo is queued for
+process_photos when there are none.
+
+Usage:
+    python manage.py dedupe_photos              # adopt every legacy photo
+    python manage.py dedupe_photos --dry-run    # report duplicates, change nothing
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.models import Photo, PhotoBlob
+from core.services.photo_blobs import add_blob_reference, content_digest, store_blob
+from core.services.photo_derivatives import DERIVATIVES, derivative_name
+from core.services.photo_processing import queue_photo
+
+
+class Command(BaseCommand):
+    help = 'Point photos stored before deduplication at shared content blobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be merged')
+        parser.add_argument('--batch-size', type=int, default=200, help='Rows fetched per query')
+
+    def handle(self, *args, **options):
+        photos = (
+            Photo.objects.filter(blob__isnull=True).exclude(file='')
+            .only('id', 'file', 'thumbnail', 'medium', 'processing_status')
+            .order_by('id')
+        )
+        storage = Photo._meta.get_field('file').storage
+        adopted = missing = 0
+        digests = {}
+        for photo in photos.iterator(chunk_size=options['batch_size']):
+            if not storage.exists(photo.file.name):
+                missing += 1
+                continue
+            if options['dry_run']:
+                with storage.open(photo.file.name, 'rb') as handle:
+                    digest = content_digest(handle)
+                digests[digest] = digests.get(digest, 0) + 1
+                continue
+            self.adopt(photo, storage)
+            adopted += 1
+
+        if missing:
+            self.stdout.write(self.style.WARNING(
+                f'{missing} photo(s) have no file on disk; run cleanup_photos to remove them.'
+            ))
+        if options['dry_run']:
+            total = sum(digests.values())
+            self.stdout.write(f'{total} legacy photo(s) hold {len(digests)} distinct image(s); '
+                              f'{total - len(digests)} duplicate file(s) would be removed.')
+            return
+        self.stdout.write(self.style.SUCCESS(f'Moved {adopted} photo(s) into content blobs.'))
+
+    def adopt(self, photo, storage):
+        old_names = [photo.file.name] + [getattr(photo, field).name for field in DERIVATIVES if getattr(photo, field)]
+        with storage.open(photo.file.name, 'rb') as handle:
+            blob = store_blob(handle)
+        if blob.ref_count == 0 and photo.processing_status == Photo.STATUS_DONE:
+            # A done original (re-encoded, or legacy and kept as uploaded) is
+            # not re-encoded just because it moved into a blob.
+            PhotoBlob.objects.filter(pk=blob.pk).update(normalised=True)
+
+        changes = {'blob': blob, 'file': blob.file.name}
+        for field, (suffix, _) in DERIVATIVES.items():
+            target = derivative_name(blob.file.name, suffix)
+            current = getattr(photo, field)
+            if not storage.exists(target) and current and storage.exists(current.name):
+                with storage.open(current.name, 'rb') as handle:
+                    target = storage.save(target, handle)
+            changes[field] = target if storage.exists(target) else ''
+        # .update() so the Photo save handlers neither hash nor queue it again.
+        Photo.objects.filter(pk=photo.pk).update(**changes)
+        add_blob_reference(blob.pk)
+        if not (changes['thumbnail'] and changes['medium']):
+            queue_photo(photo)
+
+        for name in old_names:
+            in_use = Photo.objects.filter(Q(file=name) | Q(thumbnail=name) | Q(medium=name)).exists()
+            if name not in changes.values() and not in_use:
+                storage.delete(name)
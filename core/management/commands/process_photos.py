@@ -0,0 +1,57 @@
+"""
+Normalise uploaded photos and build their derivatives outside the web workers.
+
+Usage:
+    python manage.py process_photos                    # run forever, polling every 2s
+    python manage.py process_photos --once             # drain the queue, then exit (cron/tests)
+    python manage.py process_photos --retry-failed     # re-queue failed photos first
+
+Run it as its own systemd service next to gunicorn (and run_export_worker);
+any number of workers can share the queue. On start it also deletes chunked
+uploads (PhotoUpload) nobody finished or used within a day.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.models import Photo
+from core.services.photo_processing import claim_next_photo, process_photo, requeue_stale_photos
+from core.services.photo_uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Claim pending photos: fix orientation, strip EXIF, write thumbnail/medium copies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll', type=float, default=2.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--retry-failed', action='store_true', help='Queue failed photos again before starting')
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_photos()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale photo(s).'))
+        purge_stale_uploads()
+        if options['retry_failed']:
+            retried = Photo.objects.filter(processing_status=Photo.STATUS_FAILED).update(
+                processing_status=Photo.STATUS_PENDING, processing_error='',
+            )
+            self.stdout.write(f'Retrying {retried} failed photo(s).')
+
+        processed = 0
+        while True:
+            # Long-lived process: drop connections the database has timed out.
+            close_old_connections()
+            photo = claim_next_photo()
+            if photo is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll'])
+                continue
+            photo = process_photo(photo)
+            processed += 1
+            style = self.style.SUCCESS if photo.processing_status == Photo.STATUS_DONE else self.style.ERROR
+            self.stdout.write(style(f'Photo {photo.pk}: {photo.processing_status}'))
+
+        self.stdout.write(f'Processed {processed} photo(s).')
@@ -0,0 +1,38 @@
+"""
+Renumber crowded rolling Kanban columns so drops keep writing a single row.
+
+move_todo_task places a card halfway between its neighbours and only
+renumbers a column itself when no integer is left between them. Running this
+from cron (e.g. nightly) spreads columns back out before that happens.
+
+Usage:
+    python manage.py rebalance_todo_positions           # crowded columns only
+    python manage.py rebalance_todo_positions --all     # every column
+    python manage.py rebalance_todo_positions --check   # report, change nothing
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Task
+from core.services.task_services import crowded_todo_columns, rebalance_todo_column
+
+
+class Command(BaseCommand):
+    help = 'Spread rolling Kanban todo_position values back to even gaps'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebalance every column, crowded or not')
+        parser.add_argument('--check', action='store_true', help='Only list crowded columns')
+
+    def handle(self, *args, **options):
+        statuses = [s for s, _ in Task.TODO_STATUS_CHOICES] if options['all'] else crowded_todo_columns()
+        if options['check']:
+            message = f"Crowded columns: {', '.join(statuses)}" if statuses else 'No crowded columns.'
+            self.stdout.write(message)
+            return
+        for status in statuses:
+            with transaction.atomic():
+                changed = rebalance_todo_column(status)
+            self.stdout.write(self.style.SUCCESS(f'{status}: renumbered {changed} task(s).'))
+        if not statuses:
+            self.stdout.write('No crowded columns.')
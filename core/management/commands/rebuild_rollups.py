@@ -0,0 +1,40 @@
+"""
+Rebuild (or verify) the MetricRollup table from raw Metric rows.
+
+Usage:
+    python manage.py rebuild_rollups           # rebuild from scratch
+    python manage.py rebuild_rollups --check   # report drift, change nothing
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.metric_rollups import find_rollup_drift, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the dashboard metric rollups from the Metric table, or check them for drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only compare rollups against Metric and report mismatches (exit 1 on drift)',
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drift = find_rollup_drift()
+            if not drift:
+                self.stdout.write(self.style.SUCCESS('Metric rollups are consistent.'))
+                return
+            for entry in drift:
+                section_id, metric_type, label, start = entry['key']
+                self.stdout.write(self.style.WARNING(
+                    f'  section={section_id} type={metric_type} label={label!r} week={start}: '
+                    f'expected {entry["expected"]}, found {entry["actual"]}'
+                ))
+            raise CommandError(
+                f'{len(drift)} rollup bucket(s) out of date. Run `python manage.py rebuild_rollups`.'
+            )
+
+        count = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} metric rollup rows.'))
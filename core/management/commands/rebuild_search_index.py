@@ -0,0 +1,34 @@
+"""
+Rebuild (or verify) the full-text SearchDocument index for visit logs and tasks.
+
+Usage:
+    python manage.py rebuild_search_index           # rebuild from scratch
+    python manage.py rebuild_search_index --check   # report missing documents, change nothing
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.search import find_missing_documents, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for visit logs and tasks, or check it for gaps'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only count objects without a search document (exit 1 if any)',
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            missing = {kind: count for kind, count in find_missing_documents().items() if count}
+            if not missing:
+                self.stdout.write(self.style.SUCCESS('Search index is complete.'))
+                return
+            for kind, count in missing.items():
+                self.stdout.write(self.style.WARNING(f'  {kind}: {count} object(s) not indexed'))
+            raise CommandError('Search index is incomplete. Run `python manage.py rebuild_search_index`.')
+
+        count = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} search documents.'))
@@ -0,0 +1,47 @@
+"""
+Build queued spreadsheet exports (ExportJob rows) outside the web workers.
+
+Usage:
+    python manage.py run_export_worker            # run forever, polling every 2s
+    python manage.py run_export_worker --once     # drain the queue, then exit (cron/tests)
+
+Run it as its own systemd service next to gunicorn; any number of workers
+can share the queue.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.services.export_jobs import claim_next_job, purge_finished_jobs, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Claim queued export jobs and write their spreadsheets to the private EXPORT_JOB_DIR'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll', type=float, default=2.0, help='Seconds to sleep when the queue is empty')
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale export job(s).'))
+        purge_finished_jobs()
+
+        processed = 0
+        while True:
+            # Long-lived process: drop connections the database has timed out.
+            close_old_connections()
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll'])
+                continue
+            job = run_job(job)
+            processed += 1
+            style = self.style.SUCCESS if job.status == job.STATUS_DONE else self.style.ERROR
+            self.stdout.write(style(f'Export job {job.pk} ({job.kind}): {job.status}'))
+
+        self.stdout.write(f'Processed {processed} export job(s).')
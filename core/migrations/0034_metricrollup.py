@@ -0,0 +1,56 @@
+# Generated by Django 6.0.2 on 2026-10-17 09:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncWeek
+
+
+def populate_rollups(apps, schema_editor):
+    """Seed MetricRollup from existing Metric rows (same grouping as rebuild_rollups)."""
+    Metric = apps.get_model('core', 'Metric')
+    MetricRollup = apps.get_model('core', 'MetricRollup')
+    rows = (
+        Metric.objects.order_by()
+        .values('visit__section_id', 'metric_type', 'label', week=TruncWeek('visit__date'))
+        .annotate(total=Sum('value'), entries=Count('id'))
+    )
+    MetricRollup.objects.bulk_create([
+        MetricRollup(
+            section_id=row['visit__section_id'],
+            metric_type=row['metric_type'],
+            label=row['label'],
+            week_start=row['week'],
+            total=row['total'] or 0,
+            entry_count=row['entries'],
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_taskcompletionhistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric_type', models.CharField(choices=[('litter_general', 'Litter (General)'), ('litter_recyclable', 'Litter (Recyclable)'), ('plant', 'Plant'), ('weed', 'Weeding / Removal')], max_length=20)),
+                ('label', models.CharField(blank=True, max_length=100)),
+                ('week_start', models.DateField(help_text='Monday of the ISO week the visits fall in')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('section', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='metric_rollups', to='core.section')),
+            ],
+            options={
+                'ordering': ['week_start', 'metric_type', 'label'],
+                'indexes': [models.Index(fields=['metric_type', 'label'], name='core_metric_metric__36a632_idx'), models.Index(fields=['section', 'metric_type'], name='core_metric_section_7d01dc_idx')],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 6.0.2 on 2026-10-17 10:40
+
+from django.db import migrations, models
+
+FTS_TABLE = 'core_searchdocument_fts'
+
+SQLITE_FORWARD = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(body, content='core_searchdocument', content_rowid='id')",
+    f"""CREATE TRIGGER core_searchdocument_ai AFTER INSERT ON core_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, body) VALUES (new.id, new.body);
+    END""",
+    f"""CREATE TRIGGER core_searchdocument_ad AFTER DELETE ON core_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, body) VALUES ('delete', old.id, old.body);
+    END""",
+    f"""CREATE TRIGGER core_searchdocument_au AFTER UPDATE ON core_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, body) VALUES ('delete', old.id, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, body) VALUES (new.id, new.body);
+    END""",
+]
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS core_searchdocument_au',
+    'DROP TRIGGER IF EXISTS core_searchdocument_ad',
+    'DROP TRIGGER IF EXISTS core_searchdocument_ai',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+# Keep in sync with PG_VECTOR in core/services/search.py.
+POSTGRES_FORWARD = [
+    "CREATE INDEX core_searchdocument_body_tsv ON core_searchdocument "
+    "USING GIN (to_tsvector('simple'::regconfig, body))",
+]
+POSTGRES_REVERSE = ['DROP INDEX IF EXISTS core_searchdocument_body_tsv']
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_text_index(apps, schema_editor):
+    """Create the backend-specific text index (other backends fall back to LIKE)."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_FORWARD)
+
+
+def drop_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_REVERSE)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_REVERSE)
+
+
+def _join(*parts):
+    return ' '.join(part for part in parts if part)
+
+
+def populate_documents(apps, schema_editor):
+    """Seed SearchDocument rows (same text as services.search._bodies)."""
+    VisitLog = apps.get_model('core', 'VisitLog')
+    Task = apps.get_model('core', 'Task')
+    SearchDocument = apps.get_model('core', 'SearchDocument')
+    documents = [
+        SearchDocument(kind='visitlog', object_id=row[0], body=_join(*row[1:]))
+        for row in VisitLog.objects.values_list('id', 'notes', 'section__name', 'task__template__name').iterator()
+    ]
+    documents += [
+        SearchDocument(kind='task', object_id=row[0], body=_join(*row[1:]))
+        for row in Task.objects.values_list(
+            'id', 'instructions', 'section__name', 'template__name', 'template__task_type__name'
+        ).iterator()
+    ]
+    SearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_metricrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('visitlog', 'Visit Log'), ('task', 'Task')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='core_searchdocument_unique_object')],
+            },
+        ),
+        migrations.RunPython(create_text_index, drop_text_index),
+        migrations.RunPython(populate_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-17 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0037_updated_at_for_export_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='medium',
+            field=models.ImageField(blank=True, editable=False, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to=''),
+        ),
+    ]
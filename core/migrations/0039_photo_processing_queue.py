@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-17 15:20
+
+from django.db import migrations, models
+
+
+def mark_existing_photos_done(apps, schema_editor):
+    """Existing originals are kept as they are; backfill_photo_derivatives --reencode opts in."""
+    apps.get_model('core', 'Photo').objects.update(processing_status='done')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0038_photo_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='processing_error',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', editable=False, max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='photo',
+            index=models.Index(fields=['processing_status', 'id'], name='core_photo_process_19326d_idx'),
+        ),
+        migrations.RunPython(mark_existing_photos_done, migrations.RunPython.noop),
+    ]
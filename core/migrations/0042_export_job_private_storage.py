@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-17 08:38
+
+import os
+import shutil
+
+import core.storage
+from django.conf import settings
+from django.db import migrations, models
+
+
+def move_artifacts_out_of_media(apps, schema_editor):
+    """Move finished exports from MEDIA_ROOT/exports/ to EXPORT_JOB_DIR and drop the prefix."""
+    ExportJob = apps.get_model('core', 'ExportJob')
+    for job in ExportJob.objects.filter(artifact__startswith='exports/').iterator():
+        name = job.artifact.name[len('exports/'):]
+        source = os.path.join(settings.MEDIA_ROOT, job.artifact.name)
+        if os.path.exists(source):
+            target = os.path.join(settings.EXPORT_JOB_DIR, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.move(source, target)
+        ExportJob.objects.filter(pk=job.pk).update(artifact=name)
+    shutil.rmtree(os.path.join(settings.MEDIA_ROOT, 'exports'), ignore_errors=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0041_photo_blobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='artifact',
+            field=models.FileField(blank=True, storage=core.storage.ExportJobStorage(), upload_to=''),
+        ),
+        migrations.RunPython(move_artifacts_out_of_media, migrations.RunPython.noop),
+    ]
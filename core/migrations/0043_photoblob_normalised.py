@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-17 09:10
+
+from django.db import migrations, models
+
+
+def mark_processed_blobs(apps, schema_editor):
+    """A blob with a finished photo was already re-encoded by the worker."""
+    PhotoBlob = apps.get_model('core', 'PhotoBlob')
+    PhotoBlob.objects.filter(photos__processing_status='done').update(normalised=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0042_export_job_private_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photoblob',
+            name='normalised',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='photoblob',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_processed_blobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-17 09:40
+
+from django.db import migrations
+from django.utils import timezone
+
+# core.services.task_services.TODO_GAP at the time of writing.
+TODO_GAP = 1024
+
+
+def spread_todo_columns(apps, schema_editor):
+    """rebalance_todo_column for every Kanban column, on the historical model.
+
+    Positions written before sparse ordering are dense (0..n), so every drop
+    between two adjacent cards would otherwise renumber the whole column.
+    """
+    Task = apps.get_model('core', 'Task')
+    now = timezone.now()
+    for status in ('todo', 'doing', 'done'):
+        column = Task.objects.filter(is_rolling=True, todo_status=status).order_by('todo_position', 'id')
+        changed = []
+        for i, task in enumerate(column.only('id', 'todo_position'), start=1):
+            if task.todo_position != i * TODO_GAP:
+                task.todo_position, task.updated_at = i * TODO_GAP, now
+                changed.append(task)
+        Task.objects.bulk_update(changed, ['todo_position', 'updated_at'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0043_photoblob_normalised'),
+    ]
+
+    operations = [
+        migrations.RunPython(spread_todo_columns, migrations.RunPython.noop),
+    ]
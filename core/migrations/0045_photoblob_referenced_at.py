@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-17 10:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0044_spread_todo_positions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photoblob',
+            name='referenced_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,10 +1,63 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.core.validators import MinLengthValidator
 from django.utils import timezone
 
+from .storage import export_job_storage
+from .validation import validate_foreign_key
+
+
+class TrackedFieldsMixin:
+    """
+    Remember the values a row was loaded with, so save() can tell which
+    fields changed without re-reading it. JSON fields compare by value:
+    mutate them by assigning a new object, or pass update_fields, so the
+    change is seen.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        # post_save handlers still see the old snapshot: changed_fields() there
+        # tells them what this save wrote.
+        super().save(*args, **kwargs)
+        self._remember_values(None if adding else kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._remember_values(fields)
+
+    def _remember_values(self, names=None):
+        """Record the current values of `names` (default: every loaded field) as the stored row."""
+        loaded = getattr(self, '_loaded_values', None) or {}
+        for field in self._meta.concrete_fields:
+            if (names is None or field.name in names or field.attname in names) and field.attname in self.__dict__:
+                loaded[field.attname] = getattr(self, field.attname)
+        self._loaded_values = loaded
+
+    def changed_fields(self) -> set:
+        """Names of fields that differ from the stored row (every field if it was never loaded or saved)."""
+        loaded = getattr(self, '_loaded_values', None)
+        fields = [f for f in self._meta.concrete_fields if not f.primary_key]
+        if loaded is None:
+            return {f.name for f in fields}
+        return {
+            f.name for f in fields
+            # Deferred and never assigned: nothing to write.
+            if f.attname in self.__dict__
+            and (f.attname not in loaded or getattr(self, f.attname) != loaded[f.attname])
+        }
 
-class TaskType(models.Model):
+
+class TaskType(TrackedFieldsMixin, models.Model):
     """Dynamic task types that can be managed from the frontend."""
     ASSIGNEE_CHOICES = [
         ('team', 'Team'),
@@ -35,6 +88,7 @@ class TaskType(models.Model):
         help_text="Tailwind CSS classes for styling (e.g., 'bg-amber-50 text-amber-600 border-amber-100')"
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['position', 'name']
@@ -67,7 +121,7 @@ class Status(models.Model):
         return str(self.name)
 
 
-class Section(models.Model):
+class Section(TrackedFieldsMixin, models.Model):
     STAGE_CHOICES = [
         ('mitigation', 'Mitigation'),
         ('clearing', 'Clearing'),
@@ -91,33 +145,36 @@ class Section(models.Model):
         return str(self.name)
 
     def save(self, *args, **kwargs):
-        if self.pk:
-            try:
-                old_instance = Section.objects.get(pk=self.pk)
-                if old_instance.current_stage != self.current_stage:
-                    super().save(*args, **kwargs)
-                    SectionStageHistory.objects.create(
-                        section=self,
-                        stage=self.current_stage,
-                        changed_at=timezone.now()
-                    )
-                    return
-            except Section.DoesNotExist:
-                pass
+        adding = self._state.adding
+        loaded = getattr(self, '_loaded_values', None)
+        update_fields = kwargs.get('update_fields')
+        if not adding and loaded is not None and update_fields is None and not kwargs.get('force_insert'):
+            # updated_at always goes along: export cache stamps rely on it.
+            update_fields = kwargs['update_fields'] = self.changed_fields() | {'updated_at'}
+
+        if adding:
+            stage_changed = True
+        elif update_fields is not None and 'current_stage' not in update_fields:
+            stage_changed = False
+        elif loaded is not None and 'current_stage' in loaded:
+            stage_changed = loaded['current_stage'] != self.current_stage
         else:
-            super().save(*args, **kwargs)
+            # Built by hand rather than loaded: read just the stored stage.
+            stored = Section.objects.filter(pk=self.pk).values_list('current_stage', flat=True).first()
+            stage_changed = stored is not None and stored != self.current_stage
+
+        super().save(*args, **kwargs)
+        if stage_changed:
             SectionStageHistory.objects.create(
                 section=self,
                 stage=self.current_stage,
                 changed_at=timezone.now()
             )
-            return
-        super().save(*args, **kwargs)
 
     class Meta:
         ordering = ['position', 'name']
 
-class TaskTemplate(models.Model):
+class TaskTemplate(TrackedFieldsMixin, models.Model):
     ASSIGNEE_TYPE_CHOICES = [
         ('team', 'Team'),
         ('manager', 'Manager'),
@@ -137,6 +194,7 @@ class TaskTemplate(models.Model):
     default_instructions = models.TextField()
     is_active = models.BooleanField(default=True, help_text="Inactive templates are hidden from task creation but preserved for existing tasks")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         task_type_display = str(self.task_type) if self.task_type else "Uncategorized"
@@ -146,7 +204,7 @@ class TaskTemplate(models.Model):
     class Meta:
         ordering = ['name']
 
-class Task(models.Model):
+class Task(TrackedFieldsMixin, models.Model):
     ASSIGNEE_TYPE_CHOICES = [
         ('team', 'Team'),
         ('manager', 'Manager'),
@@ -189,12 +247,33 @@ class Task(models.Model):
         return f"{self.date} - {section_name} - {assignee_display}"
     
     def clean(self):
-        from django.core.exceptions import ValidationError
         if not self.is_rolling and not self.date:
             raise ValidationError({'date': 'Date is required for non-rolling tasks.'})
-    
+
+    def clean_fields(self, exclude=None):
+        # Foreign keys go through the cached existence check (core.validation).
+        exclude = set(exclude or ())
+        foreign_keys = [f for f in self._meta.concrete_fields if f.many_to_one and f.name not in exclude]
+        errors = {}
+        try:
+            super().clean_fields(exclude=exclude | {f.name for f in foreign_keys})
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+        for field in foreign_keys:
+            try:
+                validate_foreign_key(self, field)
+            except ValidationError as e:
+                errors.setdefault(field.name, []).extend(e.error_list)
+        if errors:
+            raise ValidationError(errors)
+
     def save(self, *args, **kwargs):
-        self.full_clean()
+        # Validate what this save changes: e.g. flipping is_completed on a
+        # loaded task checks no foreign keys. clean() always runs (no queries).
+        validate = self.changed_fields()
+        if kwargs.get('update_fields') is not None:
+            validate &= set(kwargs['update_fields'])
+        self.full_clean(exclude=[f.name for f in self._meta.concrete_fields if f.name not in validate])
         super().save(*args, **kwargs)
     
     class Meta:
@@ -206,13 +285,14 @@ class Task(models.Model):
             models.Index(fields=['todo_status']),
         ]
 
-class VisitLog(models.Model):
+class VisitLog(TrackedFieldsMixin, models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, null=True, blank=True)
     section = models.ForeignKey(Section, on_delete=models.CASCADE, null=True, blank=True, help_text="River section where activity took place (optional for general logs)")
     date = models.DateField()
     notes = models.TextField(blank=True)
     participant_count = models.PositiveIntegerField(default=0, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         task_str = f"Task: {self.task}" if self.task else "Unplanned"
@@ -222,7 +302,7 @@ class VisitLog(models.Model):
     class Meta:
         ordering = ['-date', '-created_at']
 
-class Metric(models.Model):
+class Metric(TrackedFieldsMixin, models.Model):
     METRIC_TYPE_CHOICES = [
         ('litter_general', 'Litter (General)'),
         ('litter_recyclable', 'Litter (Recyclable)'),
@@ -242,18 +322,200 @@ class Metric(models.Model):
     class Meta:
         ordering = ['metric_type', 'label']
 
+class MetricRollup(models.Model):
+    """Pre-aggregated Metric totals per section x metric type x label x ISO week.
+
+    Maintained incrementally by core.signals and rebuilt from scratch with
+    `python manage.py rebuild_rollups`. Read paths (dashboard, section detail,
+    export overview) sum these rows instead of scanning the Metric table.
+    """
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, null=True, blank=True, related_name='metric_rollups')
+    metric_type = models.CharField(max_length=20, choices=Metric.METRIC_TYPE_CHOICES)
+    label = models.CharField(max_length=100, blank=True)
+    week_start = models.DateField(help_text="Monday of the ISO week the visits fall in")
+    total = models.PositiveIntegerField(default=0)
+    entry_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        section_name = self.section.name if self.section else "General"
+        return f"{section_name} - {self.metric_type} ({self.label}) w/c {self.week_start}: {self.total}"
+
+    class Meta:
+        ordering = ['week_start', 'metric_type', 'label']
+        indexes = [
+            models.Index(fields=['metric_type', 'label']),
+            models.Index(fields=['section', 'metric_type']),
+        ]
+
+class SearchDocument(models.Model):
+    """Denormalised full-text search text for one VisitLog or Task.
+
+    Maintained by core.signals (see core/services/search.py). The text index
+    itself is backend-specific and created by migration 0035: a GIN index on
+    to_tsvector('simple', body) on PostgreSQL, an FTS5 external-content table
+    on SQLite.
+    """
+    KIND_CHOICES = [
+        ('visitlog', 'Visit Log'),
+        ('task', 'Task'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='core_searchdocument_unique_object'),
+        ]
+
+class ExportJob(models.Model):
+    """A spreadsheet export run outside the request cycle.
+
+    Queued by the export views, claimed and built by
+    `python manage.py run_export_worker` (see core/services/export_jobs.py);
+    the finished file lives in the private EXPORT_JOB_DIR through
+    core.storage.ExportJobStorage, never under MEDIA_URL.
+    """
+    KIND_CHOICES = [
+        ('data', 'Project report'),
+        ('visit_logs', 'Activity log'),
+        ('planner', 'Planner'),
+    ]
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    artifact = models.FileField(storage=export_job_storage, blank=True)
+    filename = models.CharField(max_length=200, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} export #{self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+class PhotoBlob(models.Model):
+    """One stored photo file, shared by every Photo uploaded with the same bytes.
+
+    Keyed by the SHA-256 of the upload (see core/services/photo_blobs.py).
+    `ref_count` is the number of Photo rows pointing here; cleanup_photos
+    deletes blobs nobody references any more, with their files, once
+    `referenced_at` (set whenever an upload picks the blob) is old enough
+    that no photo save can still be on its way.
+    The process_photos worker normalises the file once per blob: whoever
+    sets `processing_started_at` (a lease) writes the upright, EXIF-free copy
+    under a new name, then swaps `file` and sets `normalised`.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    file = models.ImageField()
+    ref_count = models.PositiveIntegerField(default=0)
+    normalised = models.BooleanField(default=False)
+    processing_started_at = models.DateTimeField(null=True, blank=True)
+    referenced_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} ref)"
+
+
 class Photo(models.Model):
+    """An uploaded photo plus its processing state.
+
+    Uploads are stored once per content as a PhotoBlob and queued (status
+    pending); the `python manage.py process_photos` worker normalises the
+    original and builds the derivatives (see core/services/photo_processing.py).
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    # Set to the blob's file on save; upload_to only names legacy files.
     file = models.ImageField(upload_to='photos/%Y/%m/%d/')
+    blob = models.ForeignKey(PhotoBlob, on_delete=models.PROTECT, null=True, blank=True, editable=False, related_name='photos')
     section = models.ForeignKey(Section, on_delete=models.CASCADE)
     visit = models.ForeignKey(VisitLog, on_delete=models.CASCADE, null=True, blank=True, related_name='photos')
     description = models.TextField(blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
+    # Downscaled JPEG copies stored next to the original (services.photo_derivatives).
+    thumbnail = models.ImageField(blank=True, editable=False)
+    medium = models.ImageField(blank=True, editable=False)
+    processing_status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, editable=False)
+    processing_started_at = models.DateTimeField(null=True, blank=True, editable=False)
+    processing_error = models.TextField(blank=True, editable=False)
     
     def __str__(self):
         return f"{self.section.name} - {self.timestamp}"
+
+    @property
+    def thumbnail_url(self):
+        """Small square-ish preview for avatars and lists; the original until it is generated."""
+        return (self.thumbnail or self.file).url
+
+    @property
+    def medium_url(self):
+        """Screen-sized copy for lightboxes; the original until it is generated."""
+        return (self.medium or self.file).url
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['processing_status', 'id']),
+        ]
+
+class PhotoUpload(models.Model):
+    """A chunked, resumable photo upload in progress.
+
+    Chunks are appended to PHOTO_UPLOAD_DIR/<id>.part (see
+    core/services/photo_uploads.py); `received` is the committed length.
+    A complete upload is handed to PhotoForm by id and then discarded.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size} bytes)"
+
+    @property
+    def is_complete(self):
+        return self.received == self.size
+
 
 class SectionStageHistory(models.Model):
     section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name='stage_history')
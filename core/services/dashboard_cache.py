@@ -0,0 +1,111 @@
+"""Versioned low-level cache for dashboard context blocks.
+
+Every cached block is keyed on a global data version that core.signals bumps
+whenever a VisitLog, Metric, Task, Section, TaskTemplate or TaskType row
+changes. Old entries are never deleted explicitly: a bump makes them
+unreachable and they age out via their timeout.
+
+Everything (version, blocks, hit/miss counters) lives in the `default` cache,
+so it is shared between gunicorn workers whenever that backend is shared
+(file or database cache; see CACHE_URL in settings).
+
+A dashboard request reads the version once and fetches all of its blocks
+with one get_many(). Hit/miss counters are only written for a sample of
+requests (DASHBOARD_CACHE_STATS_SAMPLE), so a warm dashboard does not pay
+two cache writes per block just to be observed.
+"""
+import random
+import time
+from typing import Any, Callable, Dict
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = 'river:data_version'
+HITS_KEY = 'river:dashboard:hits'
+MISSES_KEY = 'river:dashboard:misses'
+BLOCK_TIMEOUT = 60 * 60 * 24
+
+
+def _new_version() -> int:
+    # Taken from the clock rather than counted up, so an evicted version can
+    # never come back as a number that old blocks were stored under.
+    return time.time_ns()
+
+
+def data_version(key: str = VERSION_KEY) -> int:
+    """Return the current version stored under `key`, initialising it if absent."""
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(key: str = VERSION_KEY) -> None:
+    """Invalidate everything versioned on `key` by replacing it with a new one.
+
+    One set(): unlike incr() it needs no read, and it works whether or not the
+    key is still there.
+    """
+    cache.set(key, _new_version(), None)
+
+
+def _count(key: str, n: int) -> None:
+    if not n:
+        return
+    try:
+        cache.incr(key, n)
+    except ValueError:
+        cache.add(key, n, None)
+
+
+def _record_lookups(hits: int, misses: int) -> None:
+    """Add one request's hits and misses to the counters, for a sample of requests."""
+    if random.random() < settings.DASHBOARD_CACHE_STATS_SAMPLE:
+        _count(HITS_KEY, hits)
+        _count(MISSES_KEY, misses)
+
+
+def cached_blocks(builders: Dict[str, Callable[[], Any]], timeout: int = BLOCK_TIMEOUT) -> Dict[str, Any]:
+    """Return the cached value of each dashboard block, building the missing ones.
+
+    Data Flow Contract:
+      in:  builders — {block name: zero-arg callable producing a picklable
+           value}; put anything else a value depends on (e.g. today's date)
+           in its name so it becomes part of the key
+           timeout — seconds to keep new entries
+      out: {block name: value}, in the order of `builders`
+      side effects: one version read, one get_many() and, on a miss, one
+           set_many() on the default cache; hit/miss counters for a sample
+           of calls
+    """
+    version = data_version()
+    keys = {name: f'river:dashboard:{name}:v{version}' for name in builders}
+    found = cache.get_many(keys.values())
+    built = {keys[name]: builder() for name, builder in builders.items() if keys[name] not in found}
+    if built:
+        cache.set_many(built, timeout)
+    _record_lookups(hits=len(found), misses=len(built))
+    return {name: found[key] if key in found else built[key] for name, key in keys.items()}
+
+
+def cached_block(name: str, builder: Callable[[], Any], timeout: int = BLOCK_TIMEOUT) -> Any:
+    """Return one cached block (see cached_blocks)."""
+    return cached_blocks({name: builder}, timeout)[name]
+
+
+def dashboard_cache_stats() -> dict:
+    """Return {'hits', 'misses', 'hit_rate'} of the sampled lookups since the last reset."""
+    hits = cache.get(HITS_KEY) or 0
+    misses = cache.get(MISSES_KEY) or 0
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': (hits / lookups) if lookups else 0.0,
+    }
+
+
+def reset_dashboard_cache_stats() -> None:
+    cache.delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,485 @@
+"""Streaming Excel export engine.
+
+Workbooks are built with openpyxl's write-only mode: each worksheet is
+serialised to a temporary file as rows are appended, so memory stays flat no
+matter how many rows an export has. Styling uses named styles registered once
+per workbook; a row's cells reference a style by name instead of each carrying
+its own Font/Fill/Border objects.
+
+The finished .xlsx is saved to an anonymous temporary file and streamed back
+with FileResponse, which reads it in blocks and closes (and so deletes) it
+once the response has been sent.
+
+Write-only restrictions: rows can only be appended (no going back to style or
+merge a cell), and column widths must be set before the first row.
+"""
+import calendar
+import tempfile
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from typing import Iterable, Iterator, Mapping, Optional, Sequence
+
+import openpyxl
+
+from django.db.models import Count
+from django.http import FileResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+from ..models import Metric, Section, Task, VisitLog
+from .metric_stats import metric_stats
+from .visit_log_services import build_visit_log_queryset
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+HEADER = 'river_header'
+CELL = 'river_cell'
+WRAP = 'river_wrap'
+TITLE = 'river_title'
+
+# Rows fetched per query when streaming large querysets into a sheet.
+EXPORT_CHUNK_SIZE = 2000
+
+_THIN = Side(style='thin')
+_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+
+
+def _named_styles() -> list[NamedStyle]:
+    return [
+        NamedStyle(
+            name=HEADER, border=_BORDER,
+            font=Font(bold=True, color='FFFFFF'),
+            fill=PatternFill(start_color='166534', end_color='166534', fill_type='solid'),
+        ),
+        NamedStyle(name=CELL, border=_BORDER),
+        NamedStyle(name=WRAP, border=_BORDER, alignment=Alignment(wrap_text=True, vertical='top')),
+        NamedStyle(name=TITLE, font=Font(bold=True, size=12, color='166534')),
+    ]
+
+
+def new_workbook() -> Workbook:
+    """Return a write-only Workbook with the river named styles registered."""
+    wb = Workbook(write_only=True)
+    for style in _named_styles():
+        wb.add_named_style(style)
+    return wb
+
+
+class SheetWriter:
+    """Append-only helper over a write-only worksheet.
+
+    `row()` takes one style name per column (or a single name for every
+    column); None leaves a cell unstyled.
+    """
+
+    def __init__(self, wb: Workbook, title: str, widths: Sequence[int] = ()):
+        self.ws = wb.create_sheet(title=title)
+        for index, width in enumerate(widths, 1):
+            self.ws.column_dimensions[get_column_letter(index)].width = width
+
+    def row(self, values: Sequence, styles=None) -> None:
+        if styles is None:
+            self.ws.append(list(values))
+            return
+        if isinstance(styles, str):
+            styles = (styles,) * len(values)
+        cells = []
+        for value, style in zip(values, styles):
+            cell = WriteOnlyCell(self.ws, value=value)
+            if style:
+                cell.style = style
+            cells.append(cell)
+        self.ws.append(cells)
+
+    def rows(self, rows: Iterable[Sequence], styles=None) -> None:
+        for values in rows:
+            self.row(values, styles)
+
+    def title(self, text: str) -> None:
+        self.row([text], TITLE)
+
+    def header(self, values: Sequence) -> None:
+        self.row(values, HEADER)
+
+    def blank(self) -> None:
+        self.ws.append([])
+
+
+def workbook_response(wb: Workbook, filename: str) -> FileResponse:
+    """
+    Data Flow Contract
+    -------------------
+    In:  wb — a (write-only) workbook, fully populated; filename — download name.
+    Out: FileResponse streaming the saved .xlsx as an attachment.
+    Side Effects: writes the workbook to an anonymous temp file, which is
+         removed when the response closes it.
+    """
+    output = tempfile.TemporaryFile(suffix='.xlsx')
+    wb.save(output)
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+def sheet_title(name: str, taken: Optional[set] = None) -> str:
+    """Excel sheet title (<= 31 chars, no []:*?/\\), unique within `taken`."""
+    for char in '[]:*?/\\':
+        name = name.replace(char, '-')
+    title = (name[:28] + '..') if len(name) > 31 else name
+    if taken is not None:
+        base, n = title, 2
+        while title.lower() in taken:
+            suffix = f' ({n})'
+            title = base[:31 - len(suffix)] + suffix
+            n += 1
+        taken.add(title.lower())
+    return title
+
+
+def write_project_report(wb: Workbook) -> None:
+    """
+    Data Flow Contract
+    -------------------
+    In:  wb — workbook from new_workbook().
+    Out: None.
+    Side Effects: appends the "Project Overview" sheet and one sheet per
+         Section (activity logs + planned tasks). Logs, metrics and tasks are
+         each one streamed query (fetched EXPORT_CHUNK_SIZE rows at a time),
+         so neither query count nor memory grows with sections or history.
+    """
+    overview = SheetWriter(wb, 'Project Overview', widths=(30, 15, 15))
+    overview.row(['Liesbeek River Rehabilitation - Project Overview'], TITLE)
+    overview.row(['Generated on', timezone.now().strftime('%Y-%m-%d %H:%M')])
+    overview.blank()
+
+    stats = metric_stats(top_n=10, include_unlabeled=True)
+    totals = stats['totals']
+    overview.title('Project-Wide Totals')
+    overview.header(['Metric', 'Value', 'Unit'])
+    overview.rows([
+        ['Total Sections', Section.objects.count(), 'Sections'],
+        ['Total Activity Logs', VisitLog.objects.count(), 'Logs'],
+        ['General Litter Collected', totals['litter_general'], 'Bags'],
+        ['Recyclable Litter Collected', totals['litter_recyclable'], 'Bags'],
+        ['Total Litter Collected', totals['litter_general'] + totals['litter_recyclable'], 'Bags'],
+        ['Total Plants Planted', totals['plant'], 'Plants'],
+        ['Total Weeding/Removal', totals['weed'], 'Units/Sessions'],
+    ], CELL)
+
+    for metric_type, heading, column in (
+        ('plant', 'Top Planting Species', 'Total Planted'),
+        ('weed', 'Top Weeding/Removal Species', 'Total Removed'),
+    ):
+        overview.blank()
+        overview.title(heading)
+        overview.header(['Species', column])
+        overview.rows(
+            ([item['label'] or 'Unlabeled', item['total']] for item in stats['top_species'][metric_type]),
+            CELL,
+        )
+
+    sections = list(Section.objects.select_related('status').order_by('position', 'name'))
+    rank = {section.pk: index for index, section in enumerate(sections)}
+    # Every stream below is ordered like `sections`, then newest first, and is
+    # walked once in step with it: four queries however many sections there
+    # are, and only the current row in memory.
+    section_order = ('section__position', 'section__name', 'section_id')
+
+    def visit_key(section_id, visit_date, visit_id):
+        return rank.get(section_id, -1), -visit_date.toordinal(), -visit_id
+
+    logs = MergeStream(
+        VisitLog.objects.filter(section__isnull=False)
+        .annotate(photo_count=Count('photos'))
+        .order_by(*section_order, '-date', '-id')
+        .values_list('section_id', 'id', 'date', 'notes', 'photo_count')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE),
+        key=lambda row: (rank.get(row[0], -1),),
+    )
+    metrics = MergeStream(
+        Metric.objects.filter(visit__section__isnull=False)
+        .order_by(*(f'visit__{field}' for field in section_order), '-visit__date', '-visit_id', 'metric_type', 'label', 'id')
+        .values_list('visit__section_id', 'visit__date', 'visit_id', 'metric_type', 'value', 'label')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE),
+        key=lambda row: visit_key(row[0], row[1], row[2]),
+    )
+    tasks = MergeStream(
+        Task.objects.filter(section__isnull=False)
+        .order_by(*section_order, '-date', '-id')
+        .values_list(
+            'section_id', 'date', 'assignee_type', 'template__task_type__name', 'template__name',
+            'instructions', 'is_completed',
+        )
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE),
+        key=lambda row: (rank.get(row[0], -1),),
+    )
+
+    log_styles = (CELL, WRAP, WRAP, CELL)
+    task_styles = (CELL, CELL, CELL, CELL, WRAP, CELL)
+    metric_labels = dict(Metric.METRIC_TYPE_CHOICES)
+    assignee_labels = dict(Task.ASSIGNEE_TYPE_CHOICES)
+    taken = {'project overview'}
+    for index, section in enumerate(sections):
+        ws = SheetWriter(wb, sheet_title(section.name, taken), widths=(15, 12, 20, 25, 45, 12))
+        ws.title(f'Section Detail: {section.name}')
+        ws.row(['Current Stage', section.get_current_stage_display()])
+        ws.row(['Current Status', str(section.status) if section.status else 'N/A'])
+        ws.blank()
+
+        ws.title('Activity Logs')
+        ws.header(['Date', 'Notes', 'Metrics Summary', 'Photos Count'])
+        for _, visit_id, visit_date, notes, photo_count in logs.take((index,)):
+            summary = '; '.join(
+                f'{metric_labels.get(metric_type, metric_type)}: {value} ({label})'
+                for *_, metric_type, value, label in metrics.take(visit_key(section.pk, visit_date, visit_id))
+            )
+            ws.row([visit_date, notes, summary, photo_count], log_styles)
+        ws.blank()
+
+        ws.title('Planned Tasks History')
+        ws.header(['Date', 'Assignee', 'Task Type', 'Task Template', 'Instructions', 'Completed?'])
+        for _, task_date, assignee, type_name, template_name, instructions, completed in tasks.take((index,)):
+            ws.row([
+                task_date,
+                assignee_labels.get(assignee, assignee),
+                type_name or 'Custom',
+                template_name or 'Custom',
+                instructions,
+                'Yes' if completed else 'No',
+            ], task_styles)
+
+
+class MergeStream:
+    """Walk a sorted row stream group by group, in step with another ordering.
+
+    `key(row)` must be non-decreasing along `rows`. take(k) yields the rows
+    whose key equals k, first skipping any group with a smaller key (rows that
+    no longer line up with the driving loop, e.g. written between queries).
+    Calls must use non-decreasing k, and each take() must be fully consumed.
+    """
+
+    def __init__(self, rows: Iterable, key):
+        self._groups = groupby(rows, key=key)
+        self._head = next(self._groups, None)
+
+    def take(self, key) -> Iterator:
+        while self._head is not None and self._head[0] < key:
+            self._head = next(self._groups, None)
+        if self._head is not None and self._head[0] == key:
+            yield from self._head[1]
+            self._head = next(self._groups, None)
+
+
+def build_project_workbook(params: Optional[Mapping] = None) -> tuple[Workbook, str]:
+    """Full project report (write-only); `params` is accepted for a uniform builder signature."""
+    wb = new_workbook()
+    write_project_report(wb)
+    return wb, f"Liesbeek_River_Report_{timezone.now().strftime('%Y-%m-%d')}.xlsx"
+
+
+def build_visit_log_workbook(params: Mapping) -> tuple[Workbook, str]:
+    """
+    Data Flow Contract
+    -------------------
+    In:  params — request.GET-like filters (see build_visit_log_queryset).
+    Out: (workbook, filename) — single "Visit Logs" sheet of the filtered log.
+    Side Effects: none.
+    """
+    queryset = build_visit_log_queryset(params)
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Visit Logs'
+
+    headers = ['Date', 'Section', 'Task', 'Task Type', 'Participants',
+               'General Bags', 'Recyclable Bags', 'Plants', 'Weeds', 'Notes']
+    ws.append(headers)
+    header_font = Font(bold=True, color='FFFFFF')
+    header_fill = PatternFill(start_color='166534', end_color='166534', fill_type='solid')
+    for cell in ws[1]:
+        cell.font = header_font
+        cell.fill = header_fill
+
+    for visit in queryset:
+        metrics = list(visit.metrics.all())
+        general = sum(m.value for m in metrics if m.metric_type == 'litter_general')
+        recyclable = sum(m.value for m in metrics if m.metric_type == 'litter_recyclable')
+        plants = '; '.join(f"{m.label or 'Unlabeled'}: {m.value}" for m in metrics if m.metric_type == 'plant')
+        weeds = '; '.join(f"{m.label or 'Unlabeled'}: {m.value}" for m in metrics if m.metric_type == 'weed')
+        task = visit.task
+        task_name = task.template.name if (task and task.template) else 'Unplanned'
+        task_type = task.template.task_type.name if (task and task.template and task.template.task_type) else ''
+        ws.append([
+            visit.date.isoformat(),
+            visit.section.name if visit.section else 'General',
+            task_name,
+            task_type,
+            visit.participant_count,
+            general,
+            recyclable,
+            plants,
+            weeds,
+            visit.notes,
+        ])
+
+    for col in 'ABCDEFGHIJ':
+        ws.column_dimensions[col].width = 20
+
+    filename = f"visit_logs_{timezone.now().strftime('%Y%m%d_%H%M')}.xlsx"
+    return wb, filename
+
+
+def build_planner_workbook(params: Mapping) -> tuple[Workbook, str]:
+    """
+    Data Flow Contract
+    -------------------
+    In:  params — `week` (YYYY-MM-DD, any day of the week) or `year` + `month`;
+         neither means the current week.
+    Out: (workbook, filename) — "Planner Export" list plus a "By Section" sheet.
+    Side Effects: none. One query however many sections the range touches:
+         tasks are loaded once and grouped by section in Python.
+    """
+    week_str = params.get('week')
+    year_str = params.get('year')
+    month_str = params.get('month')
+    today = timezone.now().date()
+
+    if week_str:
+        # Weekly export
+        try:
+            week_date = datetime.strptime(week_str, '%Y-%m-%d').date()
+            start = week_date - timedelta(days=week_date.weekday())
+        except (ValueError, TypeError):
+            start = today - timedelta(days=today.weekday())
+        end = start + timedelta(days=6)
+        title = f'Weekly Planner: {start.strftime("%d %b")} – {end.strftime("%d %b %Y")}'
+    elif year_str and month_str:
+        # Monthly export
+        try:
+            year = int(year_str)
+            month = int(month_str)
+        except (ValueError, TypeError):
+            year = today.year
+            month = today.month
+        start = date(year, month, 1)
+        # Last day of month
+        if month == 12:
+            end = date(year, month, 31)
+        else:
+            end = date(year, month + 1, 1) - timedelta(days=1)
+        title = f'Monthly Planner: {calendar.month_name[month]} {year}'
+    else:
+        # Default to current week
+        start = today - timedelta(days=today.weekday())
+        end = start + timedelta(days=6)
+        title = f'Weekly Planner: {start.strftime("%d %b")} – {end.strftime("%d %b %Y")}'
+
+    # One query: both sheets are written from this list.
+    tasks = list(Task.objects.filter(
+        date__range=[start, end],
+        is_rolling=False
+    ).select_related('section', 'template__task_type').order_by('date', 'section__position', 'id'))
+
+    # Build Excel
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Planner Export'
+
+    header_font = Font(bold=True, color='FFFFFF')
+    header_fill = PatternFill(start_color='166534', end_color='166534', fill_type='solid')
+    header_align = Alignment(horizontal='center')
+    border = Border(
+        left=Side(style='thin'), right=Side(style='thin'),
+        top=Side(style='thin'), bottom=Side(style='thin'),
+    )
+
+    # Title
+    ws.append([title])
+    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=8)
+    ws.cell(row=1, column=1).font = Font(bold=True, size=14, color='166534')
+    ws.append([f'Generated: {today.strftime("%Y-%m-%d %H:%M")}'])
+    ws.append([f'Tasks: {len(tasks)}'])
+    ws.append([])
+
+    # Headers
+    headers = ['Date', 'Day', 'Section', 'Assignee', 'Task Type', 'Template', 'Instructions', 'Done?']
+    ws.append(headers)
+    for col_idx, cell in enumerate(ws[ws.max_row], 1):
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_align
+        cell.border = border
+
+    # Task rows
+    for task in tasks:
+        row = [
+            task.date,
+            task.date.strftime('%A') if task.date else '',
+            task.section.name if task.section else '—',
+            task.get_assignee_type_display(),
+            task.template.task_type.name if (task.template and task.template.task_type) else 'Custom',
+            task.template.name if task.template else 'Custom',
+            task.instructions,
+            '✓' if task.is_completed else '',
+        ]
+        ws.append(row)
+        for col_idx, cell in enumerate(ws[ws.max_row], 1):
+            cell.border = border
+            if col_idx == 7:
+                cell.alignment = Alignment(wrap_text=True)
+
+    # Column widths
+    widths = [12, 14, 20, 14, 18, 25, 50, 8]
+    for i, w in enumerate(widths, 1):
+        ws.column_dimensions[openpyxl.utils.get_column_letter(i)].width = w
+
+    # Section summary sheet
+    ws2 = wb.create_sheet(title='By Section')
+    tasks_by_section = {}
+    for task in tasks:
+        if task.section is not None:
+            tasks_by_section.setdefault(task.section, []).append(task)
+
+    ws2.append(['Tasks by Section'])
+    ws2.merge_cells(start_row=1, start_column=1, end_row=1, end_column=3)
+    ws2.cell(row=1, column=1).font = Font(bold=True, size=12, color='166534')
+    ws2.append([])
+
+    for section in sorted(tasks_by_section, key=lambda section: (section.position, section.pk)):
+        section_tasks = tasks_by_section[section]
+        ws2.append([section.name, f'{len(section_tasks)} tasks', ''])
+        ws2.cell(row=ws2.max_row, column=1).font = Font(bold=True)
+
+        sub_headers = ['Date', 'Day', 'Assignee', 'Task Type', 'Instructions', 'Done?']
+        ws2.append(sub_headers)
+        for cell in ws2[ws2.max_row]:
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.border = border
+
+        for task in section_tasks:
+            row = [
+                task.date,
+                task.date.strftime('%A') if task.date else '',
+                task.get_assignee_type_display(),
+                task.template.task_type.name if (task.template and task.template.task_type) else 'Custom',
+                task.instructions,
+                '✓' if task.is_completed else '',
+            ]
+            ws2.append(row)
+            for cell in ws2[ws2.max_row]:
+                cell.border = border
+        ws2.append([])
+
+    ws2.column_dimensions['A'].width = 14
+    ws2.column_dimensions['B'].width = 14
+    ws2.column_dimensions['C'].width = 16
+    ws2.column_dimensions['D'].width = 20
+    ws2.column_dimensions['E'].width = 55
+    ws2.column_dimensions['F'].width = 8
+
+    safe_title = title.replace(' ', '_').replace('–', '-').replace(':', '')
+    filename = f'River_{safe_title}_{today.strftime("%Y%m%d")}.xlsx'
+    return wb, filename
@@ -0,0 +1,189 @@
+"""On-disk cache for the visit-log and planner spreadsheet exports.
+
+Staff download the same filtered exports again and again. A generated file is
+kept under EXPORT_CACHE_DIR/<key>/<filename>, where the key is a SHA-256 of:
+
+  * the export kind,
+  * today's date (planner exports default to the current week and carry a
+    "Generated" line, so nothing is reused across midnight),
+  * the normalised filters (single values, empties dropped, sorted), and
+  * a data-version stamp: (row count, max(updated_at)) for every table the
+    export reads. Edits move the max; deletes change the count. Metric has no
+    timestamps, so it contributes (count, max(id)); metric edits go through
+    the visit-log form, which saves (and so re-stamps) the visit itself.
+
+The key doubles as the response's strong ETag, so a browser that already has
+the file gets a 304 after the stamp queries alone. Hits are served from disk
+with FileResponse and touch the file; after each write the oldest-touched
+files are evicted until the directory fits EXPORT_CACHE_MAX_BYTES (LRU by
+total size). EXPORT_CACHE_MAX_BYTES = 0 turns the cache off.
+
+The directory lives outside MEDIA_ROOT on purpose: nginx serves /media/
+without authentication.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Callable, Mapping, Optional
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import FileResponse, HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from openpyxl import Workbook
+
+from ..models import Metric, Section, Task, TaskTemplate, TaskType, VisitLog
+from .excel_export import XLSX_CONTENT_TYPE, workbook_response
+
+# kind -> tables whose contents appear in that export.
+EXPORT_SOURCES = {
+    'visit_logs': (VisitLog, Metric, Section, Task, TaskTemplate, TaskType),
+    'planner': (Task, Section, TaskTemplate, TaskType),
+}
+
+TEMP_SUFFIX = '.part'
+
+
+def cache_enabled() -> bool:
+    return settings.EXPORT_CACHE_MAX_BYTES > 0
+
+
+def cache_root() -> Path:
+    return Path(settings.EXPORT_CACHE_DIR)
+
+
+def normalise_params(params: Mapping) -> list[tuple[str, str]]:
+    """Sorted (name, value) pairs, last value per name (as .get() sees it), empties dropped."""
+    return sorted((str(k), str(v)) for k, v in params.items() if v not in ('', None))
+
+
+def data_stamp(kind: str) -> list:
+    """
+    Data Flow Contract
+    -------------------
+    In:  kind — a key of EXPORT_SOURCES.
+    Out: JSON-ready [table, count, latest] triples, one per source table.
+    Side Effects: one aggregate query per source table.
+    """
+    stamp = []
+    for model in EXPORT_SOURCES[kind]:
+        field = 'updated_at' if any(f.name == 'updated_at' for f in model._meta.fields) else 'id'
+        summary = model.objects.aggregate(count=Count('id'), latest=Max(field))
+        latest = summary['latest']
+        stamp.append([model._meta.db_table, summary['count'], latest.isoformat() if hasattr(latest, 'isoformat') else latest])
+    return stamp
+
+
+def export_cache_key(kind: str, params: Mapping) -> str:
+    """Hex SHA-256 identifying one export's content (see the module docstring)."""
+    payload = json.dumps(
+        [kind, timezone.now().date().isoformat(), normalise_params(params), data_stamp(kind)],
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def open_cached(key: str) -> Optional[tuple[BinaryIO, str]]:
+    """(open file, filename) for a cached export, or None. Touches the file for LRU."""
+    try:
+        candidates = [p for p in (cache_root() / key).iterdir() if not p.name.endswith(TEMP_SUFFIX)]
+    except FileNotFoundError:
+        return None
+    for path in sorted(candidates, key=lambda p: p.name, reverse=True):
+        try:
+            handle = open(path, 'rb')
+        except FileNotFoundError:  # evicted by another worker meanwhile
+            continue
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return handle, path.name
+    return None
+
+
+def store(key: str, wb: Workbook, filename: str) -> Path:
+    """
+    Data Flow Contract
+    -------------------
+    In:  key — export_cache_key(); wb — populated workbook; filename — download name.
+    Out: path of the cached file.
+    Side Effects: writes <key>/<filename> atomically (temp file + rename, so
+         readers never see a partial file), then evicts to the size cap.
+    """
+    directory = cache_root() / key
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=TEMP_SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            wb.save(output)
+        path = directory / filename
+        os.replace(temp_path, path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+    evict(keep=path)
+    return path
+
+
+def evict(max_bytes: Optional[int] = None, keep: Optional[Path] = None) -> int:
+    """Delete least recently used files until the cache fits `max_bytes`. Returns files removed."""
+    if max_bytes is None:
+        max_bytes = settings.EXPORT_CACHE_MAX_BYTES
+    entries = []
+    for path in cache_root().glob('*/*'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+        if total <= max_bytes:
+            break
+        if path == keep or path.name.endswith(TEMP_SUFFIX):
+            continue
+        path.unlink(missing_ok=True)
+        try:
+            path.parent.rmdir()
+        except OSError:  # not empty, or already gone
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def cached_export_response(request, kind: str, builder: Callable[[Mapping], tuple[Workbook, str]]) -> HttpResponse:
+    """
+    Data Flow Contract
+    -------------------
+    In:  request — GET whose query string holds the export filters;
+         kind — a key of EXPORT_SOURCES; builder(params) -> (workbook, filename).
+    Out: 304 if If-None-Match matches; otherwise a FileResponse attachment
+         from the cache (hit) or freshly built and cached (miss). Carries the
+         ETag and private, always-revalidate Cache-Control.
+    Side Effects: stamp queries; on a miss the builder's queries plus a cache
+         write and eviction. With the cache off this is builder + FileResponse.
+    """
+    if not cache_enabled():
+        wb, filename = builder(request.GET)
+        return workbook_response(wb, filename)
+
+    key = export_cache_key(kind, request.GET)
+    etag = f'"{key}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        cached = open_cached(key)
+        if cached is None:
+            wb, filename = builder(request.GET)
+            # Opened right away: an open handle survives another worker's eviction.
+            cached = open(store(key, wb, filename), 'rb'), filename
+        handle, filename = cached
+        response = FileResponse(handle, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,166 @@
+"""Database-backed queue for spreadsheet exports.
+
+Large exports used to run inside a gunicorn sync worker and hold it for the
+whole build. Instead the export views can queue an ExportJob; a separate
+process (`python manage.py run_export_worker`) claims jobs, builds the
+workbook with the same builders the synchronous views use, and stores the
+file under EXPORT_JOB_DIR/<job id>/. The browser polls the job's status
+endpoint and downloads the artifact when it is done, or cancels the job
+when it gives up and falls back to the synchronous export.
+
+Claiming uses SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL, so several
+workers never pick the same job. SQLite ignores row locks; the conditional
+status update in claim_next_job() is what keeps claims exclusive there.
+No broker (Redis/Celery) is involved: the database is the queue.
+"""
+import logging
+import tempfile
+from datetime import timedelta
+from typing import Mapping, Optional
+
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import ExportJob
+from .excel_export import build_planner_workbook, build_project_workbook, build_visit_log_workbook
+
+logger = logging.getLogger(__name__)
+
+# kind -> builder(params) -> (workbook, filename)
+EXPORT_BUILDERS = {
+    'data': build_project_workbook,
+    'visit_logs': build_visit_log_workbook,
+    'planner': build_planner_workbook,
+}
+
+# A job still "running" after this long belongs to a worker that died.
+STALE_AFTER = timedelta(minutes=30)
+# Finished jobs (and their files) are purged after this long.
+KEEP_FOR = timedelta(days=7)
+CANCELLED_ERROR = 'Cancelled by the requester.'
+
+
+def enqueue_export(kind: str, params: Mapping, user=None) -> ExportJob:
+    """
+    Data Flow Contract
+    -------------------
+    In:  kind — a key of EXPORT_BUILDERS; params — single-valued export
+         filters (e.g. QueryDict.dict()); user — requester or None.
+    Out: the new ExportJob (status queued).
+    Side Effects: one INSERT.
+    Fails: ValueError for an unknown kind.
+    """
+    if kind not in EXPORT_BUILDERS:
+        raise ValueError(f'Unknown export kind: {kind!r}')
+    if user is not None and not user.is_authenticated:
+        user = None
+    return ExportJob.objects.create(kind=kind, params=dict(params), requested_by=user)
+
+
+def claim_next_job() -> Optional[ExportJob]:
+    """Claim the oldest queued job for this worker, or return None if the queue is empty."""
+    with transaction.atomic():
+        job = (
+            ExportJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ExportJob.STATUS_QUEUED)
+            .order_by('created_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        started = timezone.now()
+        claimed = ExportJob.objects.filter(pk=job.pk, status=ExportJob.STATUS_QUEUED).update(
+            status=ExportJob.STATUS_RUNNING, started_at=started,
+        )
+    if not claimed:
+        return None
+    job.status, job.started_at = ExportJob.STATUS_RUNNING, started
+    return job
+
+
+def run_job(job: ExportJob) -> ExportJob:
+    """
+    Data Flow Contract
+    -------------------
+    In:  job — a claimed (running) ExportJob.
+    Out: the same job, now done (artifact + filename set) or failed (error set).
+    Side Effects: builds the workbook, writes EXPORT_JOB_DIR/<id>/<filename>,
+         UPDATEs the job unless it was cancelled meanwhile. Builder errors fail the job instead of propagating,
+         so one bad export cannot stop the worker.
+    """
+    try:
+        wb, filename = EXPORT_BUILDERS[job.kind](job.params)
+        with tempfile.TemporaryFile(suffix='.xlsx') as output:
+            wb.save(output)
+            output.seek(0)
+            job.artifact.save(f'{job.pk}/{filename}', File(output), save=False)
+    except Exception as exc:  # noqa: BLE001 — recorded on the job and logged
+        logger.exception('Export job %s (%s) failed', job.pk, job.kind)
+        job.status = ExportJob.STATUS_FAILED
+        job.error = f'{type(exc).__name__}: {exc}'[:1000]
+    else:
+        job.status = ExportJob.STATUS_DONE
+        job.filename = filename
+    job.finished_at = timezone.now()
+    recorded = ExportJob.objects.filter(pk=job.pk, status=ExportJob.STATUS_RUNNING).update(
+        status=job.status, artifact=job.artifact.name or '', filename=job.filename,
+        error=job.error, finished_at=job.finished_at,
+    )
+    if not recorded:
+        # Cancelled while building: nobody will download this file.
+        if job.artifact:
+            job.artifact.delete(save=False)
+        job.status, job.error = ExportJob.STATUS_FAILED, CANCELLED_ERROR
+    return job
+
+
+def cancel_job(job: ExportJob) -> bool:
+    """
+    Data Flow Contract
+    -------------------
+    In:  job — an ExportJob its requester no longer waits for.
+    Out: True if the job was still queued or running.
+    Side Effects: deletes a queued job; marks a running job failed, so
+         run_job() discards its file instead of recording it.
+    """
+    if ExportJob.objects.filter(pk=job.pk, status=ExportJob.STATUS_QUEUED).delete()[0]:
+        return True
+    return bool(ExportJob.objects.filter(pk=job.pk, status=ExportJob.STATUS_RUNNING).update(
+        status=ExportJob.STATUS_FAILED, error=CANCELLED_ERROR, finished_at=timezone.now(),
+    ))
+
+
+def requeue_stale_jobs(older_than: timedelta = STALE_AFTER) -> int:
+    """Put jobs whose worker died mid-build back on the queue. Returns the count."""
+    return ExportJob.objects.filter(
+        status=ExportJob.STATUS_RUNNING, started_at__lt=timezone.now() - older_than,
+    ).update(status=ExportJob.STATUS_QUEUED, started_at=None)
+
+
+def purge_finished_jobs(older_than: timedelta = KEEP_FOR) -> int:
+    """Delete finished jobs older than `older_than` together with their files."""
+    expired = ExportJob.objects.filter(
+        status__in=[ExportJob.STATUS_DONE, ExportJob.STATUS_FAILED],
+        finished_at__lt=timezone.now() - older_than,
+    )
+    purged = 0
+    for job in expired.iterator():
+        if job.artifact:
+            job.artifact.delete(save=False)
+        job.delete()
+        purged += 1
+    return purged
+
+
+def job_status(job: ExportJob) -> dict:
+    """JSON-ready summary of a job for the polling endpoint (without URLs)."""
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'filename': job.filename,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
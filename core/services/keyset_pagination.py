@@ -0,0 +1,176 @@
+"""Keyset (seek) pagination over an explicit, total sort key.
+
+OFFSET pagination makes the database walk and discard every earlier row, and
+Django's Paginator adds a COUNT over the whole filtered queryset. Keyset
+pagination instead remembers the sort-key values of the last row shown and
+asks for rows strictly after them, so page 500 costs the same as page 1.
+
+A sort key is a sequence of (field path, descending) pairs and must end in a
+unique column (normally 'id') so the order is total. NULLs sort last in both
+directions, matching the `nulls_last=True` orderings used elsewhere.
+"""
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Optional, Sequence
+
+from django.db.models import F, Model, Q, QuerySet
+
+SortKey = Sequence[tuple[str, bool]]
+
+
+def _resolve(model: type[Model], path: str):
+    """Return (model field, nullable) for a `__`-separated field path."""
+    nullable = False
+    parts = path.split('__')
+    for part in parts[:-1]:
+        relation = model._meta.get_field(part)
+        nullable = nullable or relation.null
+        model = relation.related_model
+    final = model._meta.get_field(parts[-1])
+    return final, nullable or final.null
+
+
+def keyset_ordering(model: type[Model], keys: SortKey, reverse: bool = False) -> list:
+    """Build order_by() arguments for `keys` (optionally reversed).
+
+    Non-nullable columns use plain ascending/descending order so indexes stay
+    usable; nullable ones pin NULLs last (first when reversed).
+    """
+    ordering = []
+    for path, descending in keys:
+        desc = descending != reverse
+        _, nullable = _resolve(model, path)
+        if not nullable:
+            ordering.append(f'-{path}' if desc else path)
+        elif reverse:
+            ordering.append(F(path).desc(nulls_first=True) if desc else F(path).asc(nulls_first=True))
+        else:
+            ordering.append(F(path).desc(nulls_last=True) if desc else F(path).asc(nulls_last=True))
+    return ordering
+
+
+def _row_values(obj: Model, keys: SortKey) -> list:
+    values = []
+    for path, _ in keys:
+        value = obj
+        for part in path.split('__'):
+            value = getattr(value, part) if value is not None else None
+        values.append(value)
+    return values
+
+
+def _fingerprint(keys: SortKey) -> str:
+    return ','.join(f'-{path}' if descending else path for path, descending in keys)
+
+
+def encode_cursor(values: Sequence[Any], keys: SortKey) -> str:
+    """Serialise sort-key values into an opaque URL-safe token."""
+    payload = [_fingerprint(keys)] + [
+        v.isoformat() if isinstance(v, (date, datetime)) else v for v in values
+    ]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str, model: type[Model], keys: SortKey) -> list:
+    """Inverse of encode_cursor. Raises ValueError on a malformed or foreign token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise ValueError('Malformed cursor.') from exc
+    if not isinstance(payload, list) or len(payload) != len(keys) + 1 or payload[0] != _fingerprint(keys):
+        raise ValueError('Cursor does not match the current sort order.')
+    values = []
+    for (path, _), value in zip(keys, payload[1:]):
+        model_field, _ = _resolve(model, path)
+        values.append(None if value is None else model_field.to_python(value))
+    return values
+
+
+def _seek_filter(keys: SortKey, values: Sequence[Any], forward: bool) -> Q:
+    """Q matching rows strictly after (forward) or before `values` in key order."""
+    condition = Q(pk__in=[])
+    equal = Q()
+    for (path, descending), value in zip(keys, values):
+        if forward:
+            # NULLs sort last: nothing follows a NULL, and NULL follows any value.
+            step = None if value is None else (
+                Q(**{f'{path}__lt' if descending else f'{path}__gt': value}) | Q(**{f'{path}__isnull': True})
+            )
+        else:
+            step = Q(**{f'{path}__isnull': False}) if value is None else Q(
+                **{f'{path}__gt' if descending else f'{path}__lt': value}
+            )
+        if step is not None:
+            condition |= equal & step
+        equal &= Q(**{f'{path}__isnull': True}) if value is None else Q(**{path: value})
+    return condition
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+
+def keyset_page(queryset: QuerySet, keys: SortKey, page_size: int,
+                after: Optional[str] = None, before: Optional[str] = None) -> KeysetPage:
+    """
+    Data Flow Contract
+    -------------------
+    In:  queryset — filtered queryset (its ordering is replaced by `keys`).
+         keys — total sort key; see module docstring.
+         page_size — rows per page.
+         after / before — cursor tokens from a previous KeysetPage; `after`
+         wins if both are given. Neither means the first page.
+    Out: KeysetPage with up to page_size items in key order and cursors for
+         the neighbouring pages (None at either end).
+    Side Effects: one query (page_size + 1 rows; the extra row only signals
+         that another page exists).
+    Fails: ValueError for a malformed cursor or one issued for other keys.
+    """
+    model = queryset.model
+    forward = before is None or after is not None
+    token = after if after is not None else before
+    if token is not None:
+        queryset = queryset.filter(_seek_filter(keys, decode_cursor(token, model, keys), forward))
+
+    rows = list(queryset.order_by(*keyset_ordering(model, keys, reverse=not forward))[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if not forward:
+        rows.reverse()
+
+    page = KeysetPage(items=rows)
+    if rows:
+        first = encode_cursor(_row_values(rows[0], keys), keys)
+        last = encode_cursor(_row_values(rows[-1], keys), keys)
+        if forward:
+            page.next_cursor = last if has_more else None
+            page.previous_cursor = first if token is not None else None
+        else:
+            page.next_cursor = last
+            page.previous_cursor = first if has_more else None
+    return page
+
+
+def capped_count(queryset: QuerySet, cap: int = 1000) -> tuple[int, bool]:
+    """Count rows, but stop at `cap`. Returns (count, is_exact).
+
+    The database stops scanning once it has cap + 1 rows, so the cost is
+    bounded however large the filtered set is.
+    """
+    counted = queryset.order_by()[:cap + 1].count()
+    return min(counted, cap), counted <= cap
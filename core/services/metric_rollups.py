@@ -0,0 +1,148 @@
+"""Incrementally maintained Metric rollups (section x type x label x ISO week).
+
+Writes go through refresh_rollups(), which recomputes whole buckets from the
+Metric table so the result is idempotent no matter how often a bucket is
+touched. Signals in core.signals queue the affected buckets; wrap multi-row
+writes (e.g. the visit-log formsets) in deferred_rollup_refresh() so every
+bucket is recomputed once, at the end.
+"""
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Iterable, Iterator, Optional
+
+from django.db import transaction
+from django.db.models import Count, Q, QuerySet, Sum
+from django.db.models.functions import TruncWeek
+
+from ..models import Metric, MetricRollup, VisitLog
+from .dashboard_cache import bump_data_version
+
+# (section_id, metric_type, label, week_start)
+RollupKey = tuple[Optional[int], str, str, date]
+
+_state = threading.local()
+
+
+def week_start(day: date) -> date:
+    """Return the Monday of the ISO week containing `day`.
+
+    Accepts anything VisitLog.date accepts on save (date, datetime, ISO string).
+    """
+    day = VisitLog._meta.get_field('date').to_python(day)
+    return day - timedelta(days=day.weekday())
+
+
+def _aggregate(metrics: QuerySet) -> list[MetricRollup]:
+    """Group a Metric queryset into unsaved MetricRollup rows."""
+    rows = (
+        metrics.order_by()
+        .values('visit__section_id', 'metric_type', 'label', week=TruncWeek('visit__date'))
+        .annotate(total=Sum('value'), entries=Count('id'))
+    )
+    return [
+        MetricRollup(
+            section_id=row['visit__section_id'],
+            metric_type=row['metric_type'],
+            label=row['label'],
+            week_start=row['week'],
+            total=row['total'] or 0,
+            entry_count=row['entries'],
+        )
+        for row in rows
+    ]
+
+
+def refresh_rollups(keys: Iterable[RollupKey]) -> None:
+    """Recompute the given buckets from the Metric table.
+
+    Data Flow Contract:
+      in:  keys — iterable of (section_id, metric_type, label, week_start)
+      out: None
+      side effects: deletes and re-inserts the MetricRollup rows for `keys`
+    """
+    keys = set(keys)
+    if not keys:
+        return
+
+    metric_filter = Q()
+    rollup_filter = Q()
+    for section_id, metric_type, label, start in keys:
+        metric_filter |= Q(
+            visit__section_id=section_id,
+            metric_type=metric_type,
+            label=label,
+            visit__date__range=(start, start + timedelta(days=6)),
+        )
+        rollup_filter |= Q(section_id=section_id, metric_type=metric_type, label=label, week_start=start)
+
+    rows = _aggregate(Metric.objects.filter(metric_filter))
+    with transaction.atomic():
+        MetricRollup.objects.filter(rollup_filter).delete()
+        MetricRollup.objects.bulk_create(rows)
+
+
+def queue_rollup_refresh(keys: Iterable[RollupKey]) -> None:
+    """Refresh `keys` now, or at the end of the enclosing deferred block."""
+    pending = getattr(_state, 'pending', None)
+    if pending is not None:
+        pending.update(keys)
+        return
+    refresh_rollups(keys)
+
+
+@contextmanager
+def deferred_rollup_refresh() -> Iterator[None]:
+    """Collect rollup refreshes inside the block and apply them once on exit.
+
+    Nested blocks fold into the outermost one. Nothing is applied if the block
+    raises, mirroring the transaction the writes were (presumably) part of.
+    """
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+    _state.pending = set()
+    try:
+        yield
+        keys = _state.pending
+    finally:
+        _state.pending = None
+    refresh_rollups(keys)
+
+
+def rebuild_rollups() -> int:
+    """Rebuild the whole MetricRollup table from Metric. Returns rows written."""
+    rows = _aggregate(Metric.objects.all())
+    with transaction.atomic():
+        MetricRollup.objects.all().delete()
+        MetricRollup.objects.bulk_create(rows, batch_size=500)
+        transaction.on_commit(bump_data_version)
+    return len(rows)
+
+
+def find_rollup_drift() -> list[dict]:
+    """Compare MetricRollup against a fresh aggregate of Metric.
+
+    Data Flow Contract:
+      in:  nothing
+      out: list[dict] — one entry per mismatched bucket with keys key,
+           expected (total, entry_count) and actual (total, entry_count);
+           a missing side is reported as None. Empty list means consistent.
+      side effects: none (pure read)
+    """
+    expected = {
+        (r.section_id, r.metric_type, r.label, r.week_start): (r.total, r.entry_count)
+        for r in _aggregate(Metric.objects.all())
+    }
+    actual = {
+        (section_id, metric_type, label, start): (total, entries)
+        for section_id, metric_type, label, start, total, entries in MetricRollup.objects.values_list(
+            'section_id', 'metric_type', 'label', 'week_start', 'total', 'entry_count'
+        )
+    }
+    drift = []
+    for key in sorted(expected.keys() | actual.keys(), key=lambda k: (k[3], k[0] or 0, k[1], k[2])):
+        if expected.get(key) != actual.get(key):
+            drift.append({'key': key, 'expected': expected.get(key), 'actual': actual.get(key)})
+    return drift
+
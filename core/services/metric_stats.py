@@ -0,0 +1,65 @@
+"""Single-pass metric statistics (totals, species counts, top-N species).
+
+Reads MetricRollup rather than Metric. Totals and species counts come from one
+conditional aggregate; the top-N species per type come from one ranked query
+(ROW_NUMBER() OVER (PARTITION BY metric_type ...)). Query count is therefore
+two for any scope, however many metric types exist.
+"""
+from typing import Iterable, Optional
+
+from django.db.models import Count, F, Q, Sum, Window
+from django.db.models.functions import RowNumber
+
+from ..models import Metric, MetricRollup, Section
+
+
+def metric_stats(section: Optional[Section] = None, top_n: int = 5, include_unlabeled: bool = False,
+                 metric_types: Optional[Iterable[str]] = None) -> dict:
+    """Compute every metric total, species count and top-N list for a scope.
+
+    Data Flow Contract:
+      in:  section — limit to one Section, or None for project-wide
+           top_n — species rows to keep per metric type
+           include_unlabeled — whether blank labels may appear in top_species
+           metric_types — codes to report (default: all Metric.METRIC_TYPE_CHOICES)
+      out: dict with keys
+             totals — {metric_type: int}
+             species_counts — {metric_type: int} distinct non-blank labels
+             top_species — {metric_type: [{'label': str, 'total': int}, ...]}
+           every requested type is present (0 / [] when unrecorded)
+      side effects: none (2 queries)
+    """
+    types = list(metric_types) if metric_types is not None else [code for code, _ in Metric.METRIC_TYPE_CHOICES]
+    rollups = MetricRollup.objects.order_by().filter(metric_type__in=types)
+    if section is not None:
+        rollups = rollups.filter(section=section)
+
+    aggregates = {}
+    for i, metric_type in enumerate(types):
+        aggregates[f'total_{i}'] = Sum('total', filter=Q(metric_type=metric_type), default=0)
+        aggregates[f'species_{i}'] = Count(
+            'label', filter=Q(metric_type=metric_type) & ~Q(label=''), distinct=True
+        )
+    summary = rollups.aggregate(**aggregates)
+
+    ranked = rollups if include_unlabeled else rollups.exclude(label='')
+    ranked = (
+        ranked.values('metric_type', 'label')
+        .annotate(total=Sum('total'))
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=F('metric_type'),
+            order_by=[F('total').desc(), F('label').asc()],
+        ))
+        .filter(rank__lte=top_n)
+        .order_by('metric_type', 'rank')
+    )
+    top_species = {metric_type: [] for metric_type in types}
+    for row in ranked:
+        top_species[row['metric_type']].append({'label': row['label'], 'total': row['total']})
+
+    return {
+        'totals': {t: summary[f'total_{i}'] for i, t in enumerate(types)},
+        'species_counts': {t: summary[f'species_{i}'] for i, t in enumerate(types)},
+        'top_species': top_species,
+    }
@@ -0,0 +1,146 @@
+"""Content-addressed photo storage.
+
+Field staff often attach the same photo to several visit logs. Every Photo
+now points at a PhotoBlob keyed by the SHA-256 of the uploaded bytes, stored
+once at
+
+    photos/blobs/<first two hex digits>/<sha256><ext>
+
+with its derivatives next to it (<sha256>_thumb.jpg, ...), so they are shared
+as well. The digest is taken while the upload streams in
+(core.upload_handlers); other files are hashed here in one pass.
+
+A Photo save finds (or stores) its blob in pre_save, which only stamps
+`referenced_at`; the reference itself is counted in post_save, in the same
+transaction as the row, so a save that fails never leaks one (core.signals).
+A blob that drops to zero keeps its files until `cleanup_photos` runs
+collect_blobs(). That only touches blobs whose `referenced_at` is older than
+BLOB_GRACE: a blob picked by an upload whose Photo row is not written yet is
+left alone, as is its count. Older blobs are recounted from the Photo table
+first, so a count that drifted (a bulk delete, a crash) cannot delete a file
+that is still in use.
+"""
+import hashlib
+import os
+from datetime import timedelta
+from typing import Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..models import Photo, PhotoBlob
+from .photo_derivatives import DERIVATIVES, derivative_name
+
+BLOB_DIR = 'photos/blobs'
+# Far longer than any photo save takes between pre_save and commit.
+BLOB_GRACE = timedelta(hours=1)
+
+
+def content_digest(file) -> str:
+    """SHA-256 of `file`: the digest an upload handler attached, else one read of its chunks."""
+    digest = getattr(file, 'sha256', None)
+    if digest:
+        return digest
+    sha256 = hashlib.sha256()
+    for chunk in file.chunks():
+        sha256.update(chunk)
+    file.seek(0)
+    return sha256.hexdigest()
+
+
+def blob_name(digest: str, original_name: str) -> str:
+    extension = os.path.splitext(original_name)[1].lower() or '.jpg'
+    return f'{BLOB_DIR}/{digest[:2]}/{digest}{extension}'
+
+
+def store_blob(file) -> PhotoBlob:
+    """
+    Data Flow Contract
+    -------------------
+    In:  file — an uploaded (or any Django File) photo.
+    Out: the PhotoBlob for its content. Its ref_count is unchanged: the
+         caller counts its reference with add_blob_reference() once the
+         Photo row is written.
+    Side Effects: stamps referenced_at, which keeps collect_blobs() away
+         for BLOB_GRACE; writes the file to storage only if no blob has this
+         content yet; one UPDATE + SELECT (known content) or an UPDATE +
+         INSERT.
+    """
+    digest = content_digest(file)
+    now = timezone.now()
+    if PhotoBlob.objects.filter(pk=digest).update(referenced_at=now):
+        return PhotoBlob.objects.get(pk=digest)
+
+    storage = Photo._meta.get_field('file').storage
+    name = blob_name(digest, file.name)
+    if not storage.exists(name):
+        name = storage.save(name, file)
+    try:
+        with transaction.atomic():
+            return PhotoBlob.objects.create(pk=digest, file=name, ref_count=0, referenced_at=now)
+    except IntegrityError:
+        # Another request stored the same content a moment ago.
+        PhotoBlob.objects.filter(pk=digest).update(referenced_at=now)
+        return PhotoBlob.objects.get(pk=digest)
+
+
+def add_blob_reference(blob_id: Optional[str]) -> None:
+    """Count one more Photo row pointing at the blob."""
+    if blob_id:
+        PhotoBlob.objects.filter(pk=blob_id).update(ref_count=F('ref_count') + 1)
+
+
+def release_blob(blob_id: Optional[str]) -> None:
+    """Drop one reference; the files stay until collect_blobs()."""
+    if blob_id:
+        PhotoBlob.objects.filter(pk=blob_id, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+
+
+def recount_blob_references(grace: timedelta = BLOB_GRACE) -> int:
+    """Reset ref_count from the Photo table for blobs not picked within `grace`. Returns how many were wrong."""
+    actual = Coalesce(
+        Subquery(
+            Photo.objects.filter(blob_id=OuterRef('pk')).order_by()
+            .values('blob_id').annotate(n=Count('id')).values('n')
+        ),
+        0,
+    )
+    settled = PhotoBlob.objects.filter(referenced_at__lt=timezone.now() - grace)
+    return settled.exclude(ref_count=actual).update(ref_count=actual)
+
+
+def blob_file_names(blob: PhotoBlob) -> list:
+    """Storage names of a blob's original and derivatives."""
+    return [blob.file.name] + [derivative_name(blob.file.name, suffix) for suffix, _ in DERIVATIVES.values()]
+
+
+def collect_blobs(dry_run: bool = False, grace: timedelta = BLOB_GRACE) -> list:
+    """
+    Data Flow Contract
+    -------------------
+    In:  dry_run — only report; grace — how long after an upload picked a
+         blob it is left alone (its Photo row may not be written yet).
+    Out: the PhotoBlobs that nothing references (deleted unless dry_run).
+    Side Effects: recounts references of settled blobs; deletes each
+         unreferenced blob row, then its original and derivative files.
+    """
+    cutoff = timezone.now() - grace
+    if not dry_run:
+        recount_blob_references(grace)
+    unreferenced = list(PhotoBlob.objects.filter(referenced_at__lt=cutoff, photos__isnull=True))
+    if dry_run:
+        return unreferenced
+
+    storage = Photo._meta.get_field('file').storage
+    collected = []
+    for blob in unreferenced:
+        # Conditional delete: a new upload may have picked the blob meanwhile.
+        unclaimed = PhotoBlob.objects.filter(pk=blob.pk, ref_count=0, referenced_at__lt=cutoff, photos__isnull=True)
+        if not unclaimed.delete()[0]:
+            continue
+        for name in blob_file_names(blob):
+            storage.delete(name)
+        collected.append(blob)
+    return collected
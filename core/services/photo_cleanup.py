@@ -0,0 +1,164 @@
+"""Set-based scan for photo rows and media files that have lost each other.
+
+The old cleanup_photos asked storage.exists() once per Photo row and deleted
+orphans one at a time. That is one stat (or one HTTP round trip on a remote
+backend) per row. This module lists the photo tree once instead:
+
+  1. list_media_files() walks `photos/` with one listdir per directory,
+     spread over a thread pool when the backend is remote,
+  2. the Photo table is streamed with values_list(...).iterator() and
+     diffed against that set, both ways:
+       - rows whose original is not on disk  -> deleted in batches,
+       - files that no row or blob references -> deleted through the pool.
+
+Both directions race with uploads, so neither trusts the listing alone.
+Files younger than MIN_FILE_AGE are never treated as orphans: an upload
+writes its file before the row is committed. Rows created after the scan
+started are never treated as orphans, and delete_photo_rows() re-checks each
+candidate's file with storage.exists() just before deleting, because the
+listing may predate a new or replaced original.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Photo, PhotoBlob
+from .photo_blobs import blob_file_names
+
+PHOTO_DIR = 'photos'
+MIN_FILE_AGE = timedelta(hours=1)
+REMOTE_WORKERS = 8
+
+
+def photo_storage():
+    return Photo._meta.get_field('file').storage
+
+
+def default_workers(storage) -> int:
+    """Local disks gain nothing from threads; remote backends wait on the network."""
+    return 1 if isinstance(storage, FileSystemStorage) else REMOTE_WORKERS
+
+
+def _run(workers: int, fn, items: Iterable) -> list:
+    if workers <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, items))
+
+
+def list_media_files(storage=None, top: str = PHOTO_DIR, workers: int = 1) -> set:
+    """Every file name under `top`, one listdir per directory (a level at a time over the pool)."""
+    storage = storage or photo_storage()
+
+    def listdir(path):
+        try:
+            return path, storage.listdir(path)
+        except FileNotFoundError:
+            return path, ([], [])
+
+    files, level = set(), [top]
+    while level:
+        next_level = []
+        for path, (dirs, names) in _run(workers, listdir, level):
+            files.update(f'{path}/{name}' for name in names)
+            next_level.extend(f'{path}/{name}' for name in dirs)
+        level = next_level
+    return files
+
+
+def diff_photo_rows(files: set, batch_size: int = 2000, listed_at=None) -> tuple:
+    """
+    One streamed pass over Photo: (ids of rows whose original is empty or
+    not in `files`, storage names referenced by the other rows and by blobs).
+    Rows created at or after `listed_at` count as referenced, not missing.
+    """
+    missing, referenced = [], set()
+    rows = Photo.objects.order_by().values_list('id', 'file', 'thumbnail', 'medium', 'timestamp')
+    for pk, name, thumbnail, medium, created in rows.iterator(chunk_size=batch_size):
+        if (not name or name not in files) and (listed_at is None or created < listed_at):
+            missing.append(pk)
+        else:
+            referenced.update(filter(None, (name, thumbnail, medium)))
+    for blob in PhotoBlob.objects.only('file').iterator(chunk_size=batch_size):
+        referenced.update(blob_file_names(blob))
+    return missing, referenced
+
+
+def unreferenced_files(files: set, referenced: set, storage=None, workers: int = 1,
+                       min_age: timedelta = MIN_FILE_AGE) -> list:
+    """Files in `files` that nothing references and that are older than `min_age`, sorted."""
+    storage = storage or photo_storage()
+    cutoff = timezone.now() - min_age
+    candidates = sorted(files - referenced)
+
+    def old_enough(name):
+        try:
+            return storage.get_modified_time(name) < cutoff
+        except (FileNotFoundError, NotImplementedError):
+            return False
+
+    return [name for name, old in zip(candidates, _run(workers, old_enough, candidates)) if old]
+
+
+def delete_photo_rows(ids: list, storage=None, workers: int = 1, batch_size: int = 500) -> int:
+    """
+    Delete the Photo rows among `ids` whose original is still missing,
+    one transaction per batch (delete signals still fire). Each candidate is
+    re-read and checked with storage.exists() first: a photo uploaded or
+    replaced after the listing must not lose its row.
+    """
+    storage = storage or photo_storage()
+    deleted = 0
+    for start in range(0, len(ids), batch_size):
+        rows = list(Photo.objects.filter(pk__in=ids[start:start + batch_size]).values_list('id', 'file'))
+        present = _run(workers, lambda row: bool(row[1]) and storage.exists(row[1]), rows)
+        lost = [pk for (pk, _), exists in zip(rows, present) if not exists]
+        with transaction.atomic():
+            deleted += Photo.objects.filter(pk__in=lost).delete()[1].get(Photo._meta.label, 0)
+    return deleted
+
+
+def delete_files(names: list, storage=None, workers: int = 1) -> int:
+    storage = storage or photo_storage()
+    _run(workers, storage.delete, names)
+    return len(names)
+
+
+def scan_photos(storage=None, workers: Optional[int] = None, batch_size: int = 500,
+                min_age: timedelta = MIN_FILE_AGE) -> dict:
+    """
+    Data Flow Contract
+    -------------------
+    In:  storage — the photo storage (default: Photo.file's); workers —
+         thread-pool size for storage calls (default: 1 local, 8 remote).
+    Out: {'files': every name under photos/,
+          'missing_rows': ids of Photo rows (older than the scan) whose
+                          original was not listed — candidates only,
+                          delete_photo_rows() re-checks them,
+          'orphan_files': names no row or blob references}.
+    Side Effects: none; reads the Photo/PhotoBlob tables and lists storage.
+    """
+    storage = storage or photo_storage()
+    workers = workers or default_workers(storage)
+    listed_at = timezone.now()
+    files = list_media_files(storage, workers=workers)
+    missing, referenced = diff_photo_rows(files, batch_size=batch_size, listed_at=listed_at)
+    orphans = unreferenced_files(files, referenced, storage=storage, workers=workers, min_age=min_age)
+    return {'files': files, 'missing_rows': missing, 'orphan_files': orphans}
+
+
+def total_size(names: list, storage=None, workers: int = 1) -> int:
+    """Bytes held by `names` (files that vanished meanwhile count as 0)."""
+    storage = storage or photo_storage()
+
+    def size(name):
+        try:
+            return storage.size(name)
+        except OSError:
+            return 0
+
+    return sum(_run(workers, size, names))
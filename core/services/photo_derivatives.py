@@ -0,0 +1,120 @@
+"""Downscaled copies of uploaded photos (thumbnail and medium).
+
+Phone uploads are 3–8 MB originals, yet lists show them as 32 px avatars.
+The process_photos worker (services.photo_processing) writes two JPEGs next
+to the original:
+
+    photos/2026/03/02/IMG_1234.jpg
+    photos/2026/03/02/IMG_1234_thumb.jpg    (fits 160x160)
+    photos/2026/03/02/IMG_1234_medium.jpg   (fits 1280x1280)
+
+EXIF orientation is applied before resizing (the copies carry no EXIF), and
+images already smaller than a variant are re-encoded rather than upscaled.
+Photo.thumbnail_url / medium_url fall back to the original until the copies
+exist, so templates never break on a photo that has not been processed.
+"""
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from ..models import Photo
+
+logger = logging.getLogger(__name__)
+
+# field name -> (filename suffix, bounding box in px)
+DERIVATIVES = {
+    'thumbnail': ('thumb', (160, 160)),
+    'medium': ('medium', (1280, 1280)),
+}
+JPEG_QUALITY = 82
+# What decoding a broken, truncated or hostile upload raises.
+UNREADABLE = (OSError, UnidentifiedImageError, Image.DecompressionBombError)
+
+
+def derivative_name(original: str, suffix: str) -> str:
+    """Storage name for a derivative of `original`, in the same directory."""
+    stem, _ = os.path.splitext(original)
+    return f'{stem}_{suffix}.jpg'
+
+
+def render_jpeg(image: Image.Image, box: tuple) -> bytes:
+    """A JPEG copy of `image` that fits inside `box`, never upscaled."""
+    copy = image.copy()
+    copy.thumbnail(box, Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    copy.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def derivatives_stale(photo: Photo) -> bool:
+    """True when a derivative is missing or was built from a different original."""
+    if not photo.file:
+        return False
+    return any(
+        getattr(photo, name).name != derivative_name(photo.file.name, suffix)
+        for name, (suffix, _) in DERIVATIVES.items()
+    )
+
+
+def build_derivatives(photo: Photo, force: bool = False) -> bool:
+    """
+    Data Flow Contract
+    -------------------
+    In:  photo — a saved Photo with an original file; force — rebuild
+         copies that already exist.
+    Out: True if any derivative was written, False otherwise (nothing
+         missing, no original, or an unreadable image — logged).
+    Side Effects: reads the original, saves up to two JPEGs through the
+         file's storage, one UPDATE of the derivative columns.
+    """
+    if not photo.file:
+        return False
+    missing = {
+        name: (suffix, box) for name, (suffix, box) in DERIVATIVES.items()
+        if force or getattr(photo, name).name != derivative_name(photo.file.name, suffix)
+    }
+    if not missing:
+        return False
+
+    try:
+        image = open_normalised(photo)
+    except UNREADABLE as exc:
+        logger.warning('Cannot build derivatives for photo %s (%s): %s', photo.pk, photo.file.name, exc)
+        return False
+    write_derivatives(photo, image, missing)
+    return True
+
+
+def open_normalised(photo: Photo) -> Image.Image:
+    """Decode the original, upright (EXIF orientation applied) and in RGB. Raises UNREADABLE."""
+    with photo.file.storage.open(photo.file.name, 'rb') as handle:
+        image = Image.open(handle)
+        return ImageOps.exif_transpose(image).convert('RGB')
+
+
+def write_derivatives(photo: Photo, image: Image.Image, variants: dict = DERIVATIVES) -> dict:
+    """Save `variants` (a subset of DERIVATIVES) of the decoded `image`; one UPDATE. Returns field -> name."""
+    storage = photo.file.storage
+    written = {}
+    for name, (suffix, box) in variants.items():
+        target = derivative_name(photo.file.name, suffix)
+        if storage.exists(target):
+            storage.delete(target)
+        written[name] = storage.save(target, ContentFile(render_jpeg(image, box)))
+
+    # .update() so the post_save handler does not queue this photo again.
+    Photo.objects.filter(pk=photo.pk).update(**written)
+    for name, value in written.items():
+        setattr(photo, name, value)
+    return written
+
+
+def delete_derivatives(photo: Photo) -> None:
+    """Remove the derivative files of `photo` (the original is left alone)."""
+    for name in DERIVATIVES:
+        field = getattr(photo, name)
+        if field and field.storage.exists(field.name):
+            field.storage.delete(field.name)
@@ -0,0 +1,206 @@
+"""Database-backed queue for photo processing.
+
+The visit-log views store an upload as-is and return; the Photo row starts
+out `pending`. A separate process (`python manage.py process_photos`) claims
+pending photos and, for each one:
+
+  1. decodes the original and applies its EXIF orientation,
+  2. re-encodes the original without EXIF (no GPS or camera data left in
+     public media), upright, in its own format, under a new name, then
+     points the rows at it (the old file is never missing meanwhile),
+  3. writes the thumbnail and medium derivatives (services.photo_derivatives).
+
+Photos sharing a PhotoBlob (services.photo_blobs) share that work: the first
+worker to lease the blob normalises it once, photos of a blob being
+normalised are not claimed, and photos of a normalised blob only pick up its
+derivatives.
+
+So request latency no longer depends on image size, and a slow or hostile
+image only ever ties up the worker. Claiming follows export_jobs: SELECT ...
+FOR UPDATE SKIP LOCKED on PostgreSQL plus a conditional status update.
+Until a photo is done, Photo.thumbnail_url / medium_url serve the original.
+"""
+import io
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image
+
+from ..models import Photo, PhotoBlob
+from .photo_derivatives import DERIVATIVES, UNREADABLE, derivative_name, open_normalised, write_derivatives
+
+logger = logging.getLogger(__name__)
+
+# A photo still "processing" after this long belongs to a worker that died.
+STALE_AFTER = timedelta(minutes=10)
+# Re-encoding settings per original format; anything else is stored as JPEG.
+REENCODE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+}
+
+
+def queue_photo(photo: Photo) -> bool:
+    """Put `photo` back on the queue (e.g. its original was replaced). Returns False if already queued."""
+    queued = Photo.objects.filter(pk=photo.pk).exclude(processing_status=Photo.STATUS_PENDING).update(
+        processing_status=Photo.STATUS_PENDING, processing_started_at=None, processing_error='',
+    )
+    if queued:
+        photo.processing_status, photo.processing_started_at, photo.processing_error = Photo.STATUS_PENDING, None, ''
+    return bool(queued)
+
+
+def claim_next_photo() -> Optional[Photo]:
+    """Claim the oldest pending photo for this worker, or return None if the queue is empty."""
+    with transaction.atomic():
+        photo = (
+            Photo.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(processing_status=Photo.STATUS_PENDING)
+            # Another worker is normalising this photo's blob: wait for it.
+            .exclude(blob__normalised=False, blob__processing_started_at__gte=timezone.now() - STALE_AFTER)
+            .order_by('id')
+            .first()
+        )
+        if photo is None:
+            return None
+        started = timezone.now()
+        claimed = Photo.objects.filter(pk=photo.pk, processing_status=Photo.STATUS_PENDING).update(
+            processing_status=Photo.STATUS_PROCESSING, processing_started_at=started,
+        )
+    if not claimed:
+        return None
+    photo.processing_status, photo.processing_started_at = Photo.STATUS_PROCESSING, started
+    return photo
+
+
+def reencode_original(photo: Photo, image: Image.Image, image_format: Optional[str]) -> str:
+    """Write `image` (already upright, no EXIF) next to the original, in its format. Returns the new name."""
+    image_format = image_format if image_format in REENCODE_OPTIONS else 'JPEG'
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **REENCODE_OPTIONS[image_format])
+    # The original still exists, so storage picks a fresh name beside it.
+    return photo.file.storage.save(photo.file.name, ContentFile(buffer.getvalue()))
+
+
+def normalise(photo: Photo) -> str:
+    """Decode, re-encode and build derivatives for `photo`'s current file. Returns the new original's name."""
+    with photo.file.storage.open(photo.file.name, 'rb') as handle:
+        image_format = Image.open(handle).format
+    image = open_normalised(photo)
+    photo.file.name = reencode_original(photo, image, image_format)
+    write_derivatives(photo, image)
+    return photo.file.name
+
+
+def discard_normalised(photo: Photo, name: str) -> None:
+    """Drop a normalised original `name` and its derivatives after the photo's file changed under the worker."""
+    storage = photo.file.storage
+    for field, (suffix, _) in DERIVATIVES.items():
+        derivative = derivative_name(name, suffix)
+        # write_derivatives() already pointed the row at them; unless a newer run replaced them, unset.
+        Photo.objects.filter(pk=photo.pk, **{field: derivative}).update(**{field: ''})
+        storage.delete(derivative)
+    storage.delete(name)
+
+
+def lease_blob(blob_id: str) -> bool:
+    """Take the right to normalise blob `blob_id`. False if it is done or another worker holds it."""
+    now = timezone.now()
+    return bool(
+        PhotoBlob.objects.filter(pk=blob_id, normalised=False)
+        .filter(Q(processing_started_at__isnull=True) | Q(processing_started_at__lt=now - STALE_AFTER))
+        .update(processing_started_at=now)
+    )
+
+
+def process_blob_photo(photo: Photo) -> bool:
+    """Normalise `photo`'s blob once, or reuse it. False if another worker holds the blob."""
+    blob = PhotoBlob.objects.get(pk=photo.blob_id)
+    photo.file.name = blob.file.name
+    if not blob.normalised:
+        if not lease_blob(blob.pk):
+            return False
+        try:
+            previous = blob.file.name
+            normalised = normalise(photo)
+        finally:
+            PhotoBlob.objects.filter(pk=blob.pk).update(processing_started_at=None)
+        # One swap for the blob and every photo sharing it; only then does
+        # the original (with its EXIF) go.
+        PhotoBlob.objects.filter(pk=blob.pk).update(file=normalised, normalised=True)
+        Photo.objects.filter(blob_id=blob.pk, file=previous).update(file=normalised)
+        photo.file.storage.delete(previous)
+        return True
+
+    storage = photo.file.storage
+    names = {field: derivative_name(blob.file.name, suffix) for field, (suffix, _) in DERIVATIVES.items()}
+    missing = {field: spec for field, spec in DERIVATIVES.items() if not storage.exists(names[field])}
+    if missing:
+        write_derivatives(photo, open_normalised(photo), missing)
+    Photo.objects.filter(pk=photo.pk).update(
+        file=blob.file.name, **{field: names[field] for field in DERIVATIVES if field not in missing},
+    )
+    for field in DERIVATIVES:
+        setattr(photo, field, names[field])
+    return True
+
+
+def process_photo(photo: Photo) -> Photo:
+    """
+    Data Flow Contract
+    -------------------
+    In:  photo — a claimed (processing) Photo.
+    Out: the same photo, now done (original normalised, derivatives set),
+         failed (processing_error set) or, when another worker is
+         normalising its blob, pending again.
+    Side Effects: writes a normalised original and two derivatives through
+         the file's storage and points the rows at them (once per blob;
+         photos of a normalised blob only reuse its files); UPDATEs the
+         row. Image errors fail the photo instead of propagating, so one
+         bad upload cannot stop the worker. If the photo was re-queued
+         meanwhile (original replaced), the result is not recorded and the
+         next claim processes it again.
+    """
+    try:
+        if photo.blob_id:
+            if not process_blob_photo(photo):
+                Photo.objects.filter(pk=photo.pk, processing_status=Photo.STATUS_PROCESSING).update(
+                    processing_status=Photo.STATUS_PENDING, processing_started_at=None,
+                )
+                photo.processing_status, photo.processing_started_at = Photo.STATUS_PENDING, None
+                return photo
+        else:
+            previous = photo.file.name
+            normalised = normalise(photo)
+            # Only if the original is still the one we read: a replacement
+            # uploaded meanwhile must not be overwritten with the old image.
+            if Photo.objects.filter(pk=photo.pk, file=previous).update(file=normalised):
+                photo.file.storage.delete(previous)
+            else:
+                discard_normalised(photo, normalised)
+    except UNREADABLE as exc:
+        logger.warning('Photo %s (%s) could not be processed: %s', photo.pk, photo.file.name, exc)
+        photo.processing_status = Photo.STATUS_FAILED
+        photo.processing_error = f'{type(exc).__name__}: {exc}'[:1000]
+    else:
+        photo.processing_status = Photo.STATUS_DONE
+        photo.processing_error = ''
+    Photo.objects.filter(pk=photo.pk, processing_status=Photo.STATUS_PROCESSING).update(
+        processing_status=photo.processing_status, processing_error=photo.processing_error,
+    )
+    return photo
+
+
+def requeue_stale_photos(older_than: timedelta = STALE_AFTER) -> int:
+    """Put photos whose worker died mid-processing back on the queue. Returns the count."""
+    return Photo.objects.filter(
+        processing_status=Photo.STATUS_PROCESSING, processing_started_at__lt=timezone.now() - older_than,
+    ).update(processing_status=Photo.STATUS_PENDING, processing_started_at=None)
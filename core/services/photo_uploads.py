@@ -0,0 +1,168 @@
+"""Chunked, resumable photo uploads.
+
+A visit-log photo used to travel inside the multipart form POST. On a weak
+riverbank signal that request failed part-way and the whole photo was sent
+again. Instead, static/js/mobile.js downscales the photo on the device and
+sends it in small chunks before the form is submitted:
+
+    POST photos/uploads/             {filename, size, content_type} -> {id, offset: 0}
+    PUT  photos/uploads/<id>/        raw bytes, Upload-Offset: n    -> {offset}
+    GET  photos/uploads/<id>/        -> {offset}    (where to resume)
+
+Each chunk is appended to PHOTO_UPLOAD_DIR/<id>.part, so the file is
+assembled as it arrives. A chunk that does not start at the committed offset
+is refused with the current offset (409); a retried chunk that is already
+stored is acknowledged as-is. The form then carries only the upload id
+(`photos-N-upload`), and PhotoForm turns the finished part file into the
+photo's file. Sessions nobody finishes are purged by the process_photos
+worker after a day.
+"""
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.validators import get_available_image_extensions
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import PhotoUpload
+
+# Bytes per PUT. Well below DATA_UPLOAD_MAX_MEMORY_SIZE, small enough to get
+# through on a poor mobile connection.
+UPLOAD_CHUNK_SIZE = 256 * 1024
+# Unfinished or unclaimed sessions are deleted after this long.
+KEEP_UNFINISHED_FOR = timedelta(days=1)
+
+
+class UploadError(ValueError):
+    """The upload request is invalid (bad size, name, or unknown session)."""
+
+
+class UploadOffsetMismatch(UploadError):
+    """A chunk does not continue the stored data; `offset` is where to resume."""
+
+    def __init__(self, offset: int):
+        super().__init__(f'Expected a chunk at offset {offset}.')
+        self.offset = offset
+
+
+def part_path(upload: PhotoUpload) -> Path:
+    return Path(settings.PHOTO_UPLOAD_DIR) / f'{upload.pk}.part'
+
+
+def start_upload(user, filename: str, size: int, content_type: str = '') -> PhotoUpload:
+    """
+    Data Flow Contract
+    -------------------
+    In:  user — uploader (or None); filename, size (bytes), content_type —
+         as reported by the browser for the (already downscaled) photo.
+    Out: a new PhotoUpload with received=0.
+    Side Effects: one INSERT; creates an empty part file.
+    Fails: UploadError for a non-image name or a size outside 1..PHOTO_UPLOAD_MAX_BYTES.
+    """
+    filename = os.path.basename(str(filename or '')).strip()[:255]
+    extension = os.path.splitext(filename)[1].lstrip('.').lower()
+    if extension not in get_available_image_extensions():
+        raise UploadError('Only image files can be uploaded.')
+    if not isinstance(size, int) or isinstance(size, bool) or not 0 < size <= settings.PHOTO_UPLOAD_MAX_BYTES:
+        raise UploadError(f'Size must be between 1 and {settings.PHOTO_UPLOAD_MAX_BYTES} bytes.')
+    if user is not None and not user.is_authenticated:
+        user = None
+
+    upload = PhotoUpload.objects.create(user=user, filename=filename, size=size, content_type=str(content_type)[:100])
+    os.makedirs(settings.PHOTO_UPLOAD_DIR, exist_ok=True)
+    part_path(upload).touch()
+    return upload
+
+
+def append_chunk(upload_id, offset: int, data: bytes) -> PhotoUpload:
+    """
+    Data Flow Contract
+    -------------------
+    In:  upload_id — PhotoUpload pk; offset — where `data` starts in the file.
+    Out: the upload with `received` advanced past `data`.
+    Side Effects: locks the row, writes to the part file, one UPDATE.
+    Fails: UploadOffsetMismatch if `offset` is not the committed length (a
+         repeat of stored bytes is accepted instead); UploadError for an
+         unknown id or data past the declared size.
+    """
+    with transaction.atomic():
+        upload = PhotoUpload.objects.select_for_update().filter(pk=upload_id).first()
+        if upload is None:
+            raise UploadError('Unknown upload.')
+        end = offset + len(data)
+        if offset < upload.received and end <= upload.received:
+            return upload  # a retry of a chunk that already arrived
+        if offset != upload.received:
+            raise UploadOffsetMismatch(upload.received)
+        if end > upload.size:
+            raise UploadError('Chunk runs past the declared size.')
+
+        with open(part_path(upload), 'r+b') as part:
+            # Drop anything a request that died mid-write left behind.
+            part.truncate(upload.received)
+            part.seek(upload.received)
+            part.write(data)
+        upload.received = end
+        upload.save(update_fields=['received', 'updated_at'])
+    return upload
+
+
+class PartFile(UploadedFile):
+    """A finished upload's part file. It is opened only while read: `with part.open(): ...`."""
+
+    def __init__(self, path: Path, **kwargs):
+        super().__init__(file=None, **kwargs)
+        self.path = path
+
+    def open(self, mode='rb'):
+        if self.closed:
+            self.file = open(self.path, mode)
+        else:
+            self.seek(0)
+        return self
+
+
+def completed_file(upload_id, user) -> PartFile:
+    """
+    Data Flow Contract
+    -------------------
+    In:  upload_id — PhotoUpload pk; user — the user submitting the form
+         (anonymous/None only matches uploads started without a login).
+    Out: the assembled photo as a closed PartFile, ready for a form's
+         ImageField once opened.
+    Side Effects: one SELECT.
+    Fails: UploadError if the upload is unknown, belongs to someone else,
+         or has not received all of its bytes.
+    """
+    if user is not None and not user.is_authenticated:
+        user = None
+    upload = PhotoUpload.objects.filter(pk=upload_id, user=user).first()
+    if upload is None or not upload.is_complete:
+        raise UploadError('The photo upload has not finished.')
+    return PartFile(
+        part_path(upload), name=upload.filename,
+        content_type=upload.content_type or None, size=upload.size,
+    )
+
+
+def discard_upload(upload_id) -> None:
+    """Delete an upload session and its part file (after it became a Photo, or was abandoned)."""
+    upload = PhotoUpload.objects.filter(pk=upload_id).first()
+    if upload is None:
+        return
+    part_path(upload).unlink(missing_ok=True)
+    upload.delete()
+
+
+def purge_stale_uploads(older_than: timedelta = KEEP_UNFINISHED_FOR) -> int:
+    """Delete sessions untouched for `older_than` together with their part files."""
+    stale = PhotoUpload.objects.filter(updated_at__lt=timezone.now() - older_than)
+    purged = 0
+    for upload in stale.iterator():
+        part_path(upload).unlink(missing_ok=True)
+        upload.delete()
+        purged += 1
+    return purged
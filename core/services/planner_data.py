@@ -0,0 +1,105 @@
+"""Compact planner task feed and its conditional-GET validator.
+
+The planner pages and the planner/data/ endpoint share planner_etag(), so the
+ETag embedded in a rendered page matches what the endpoint would send for the
+same range: a client holding a fresh page gets 304 until something changes.
+
+The validator is (range, task count, max(updated_at), visit-log count and
+id sum). Every Task write path either goes through save() (auto_now) or sets
+updated_at explicitly (see update_task_series); deletes and moves out of the
+range change the count. The feed also carries each task's visit_log_id, and
+logging or deleting a visit does not touch the task row, so the linked
+visit-log ids are part of the validator too.
+"""
+import hashlib
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+from django.db.models import Count, Max, QuerySet, Sum
+from django.utils import timezone
+
+from ..models import Task
+from .task_services import with_visit_log_id
+
+# Order of the values in every task tuple returned by planner_rows().
+PLANNER_FIELDS = (
+    'id', 'date', 'assignee_type', 'section_id', 'template_id',
+    'is_completed', 'is_series', 'visit_log_id', 'instructions',
+)
+# The monthly grid spans at most six weeks; allow some slack beyond that.
+MAX_RANGE_DAYS = 62
+
+
+def parse_planner_range(params: dict) -> tuple[date, date]:
+    """
+    Data Flow Contract
+    -------------------
+    In:  params — request.GET-like mapping with ISO `start` and `end`.
+         Missing values default to the current Monday–Sunday week.
+    Out: (start, end) inclusive.
+    Fails: ValueError on unparseable dates, end < start, or a range longer
+           than MAX_RANGE_DAYS.
+    """
+    today = timezone.now().date()
+    monday = today - timedelta(days=today.weekday())
+    start_str = params.get('start')
+    end_str = params.get('end')
+    start = datetime.strptime(start_str, '%Y-%m-%d').date() if start_str else monday
+    end = datetime.strptime(end_str, '%Y-%m-%d').date() if end_str else start + timedelta(days=6)
+    if end < start:
+        raise ValueError('end must not be before start.')
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise ValueError(f'Range cannot exceed {MAX_RANGE_DAYS} days.')
+    return start, end
+
+
+def planner_queryset(start: date, end: date) -> QuerySet:
+    """Non-rolling tasks dated within [start, end] — the planners' scope."""
+    return Task.objects.filter(date__range=[start, end], is_rolling=False)
+
+
+def planner_etag(start: date, end: date, count: int, last_updated: Optional[datetime],
+                 log_count: int = 0, log_total: int = 0) -> str:
+    """Build the strong ETag (quoted) for a range from its tasks and their visit logs."""
+    stamp = last_updated.isoformat() if last_updated else '-'
+    validator = f'{start.isoformat()}|{end.isoformat()}|{count}|{stamp}|{log_count}|{log_total}'
+    digest = hashlib.sha1(validator.encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def planner_etag_for_range(start: date, end: date) -> str:
+    """planner_etag() for a range, computed with one aggregate query."""
+    summary = with_visit_log_id(planner_queryset(start, end)).aggregate(
+        count=Count('id'), last_updated=Max('updated_at'),
+        log_count=Count('visit_log_id'), log_total=Sum('visit_log_id'),
+    )
+    return planner_etag(start, end, summary['count'], summary['last_updated'],
+                        summary['log_count'], summary['log_total'] or 0)
+
+
+def planner_etag_for_tasks(start: date, end: date, tasks: Iterable[Task]) -> str:
+    """planner_etag() from tasks a view has already loaded with_visit_log_id() (no query)."""
+    tasks = list(tasks)
+    last_updated = max((t.updated_at for t in tasks), default=None)
+    log_ids = [t.visit_log_id for t in tasks if t.visit_log_id]
+    return planner_etag(start, end, len(tasks), last_updated, len(log_ids), sum(log_ids))
+
+
+def planner_rows(start: date, end: date) -> list[list]:
+    """
+    Data Flow Contract
+    -------------------
+    In:  start, end — inclusive date range (see parse_planner_range).
+    Out: list of task tuples in PLANNER_FIELDS order, sorted by date, id.
+         Dates are ISO strings; section/template are ids (the page already
+         holds the reference data).
+    Side Effects: none (one query).
+    """
+    tasks = with_visit_log_id(planner_queryset(start, end)).order_by('date', 'id').values_list(
+        'id', 'date', 'assignee_type', 'section_id', 'template_id',
+        'is_completed', 'group_id', 'visit_log_id', 'instructions',
+    )
+    return [
+        [pk, day.isoformat(), assignee, section_id, template_id, completed, group_id is not None, log_id, text]
+        for pk, day, assignee, section_id, template_id, completed, group_id, log_id, text in tasks
+    ]
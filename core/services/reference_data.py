@@ -0,0 +1,60 @@
+"""Cached reference data for the planner and Kanban task-creation modals.
+
+Sections and active task templates change rarely but were queried on every
+planner/Kanban request. They are cached under a reference version that
+core.signals bumps whenever a Section, TaskTemplate or TaskType changes. The
+templates also pass `reference_version` to {% cache %} so the rendered modal
+fragment is reused until the next bump.
+
+The version is separate from the dashboard data version: logging a visit or
+ticking a task must not throw away the modal fragments.
+"""
+from django.core.cache import cache
+
+from ..models import Section, TaskTemplate
+from .dashboard_cache import BLOCK_TIMEOUT, bump_data_version, data_version
+
+REFERENCE_VERSION_KEY = 'river:reference_version'
+
+
+def reference_version() -> int:
+    """Return the current reference-data version (see dashboard_cache.data_version)."""
+    return data_version(REFERENCE_VERSION_KEY)
+
+
+def bump_reference_version() -> None:
+    """Invalidate cached reference lists and modal fragments."""
+    bump_data_version(REFERENCE_VERSION_KEY)
+
+
+def _build_planner_reference_data() -> dict:
+    templates = {'team': [], 'manager': [], 'chairperson': []}
+    for template in TaskTemplate.objects.filter(is_active=True):
+        templates.setdefault(template.assignee_type, []).append(template)
+    return {
+        'sections': list(Section.objects.all()),
+        'team_task_templates': templates['team'],
+        'manager_task_templates': templates['manager'],
+        'chairperson_task_templates': templates['chairperson'],
+    }
+
+
+def planner_reference_data() -> dict:
+    """
+    Data Flow Contract
+    -------------------
+    In:  nothing.
+    Out: dict with keys sections (list[Section], Section.Meta ordering),
+         team_task_templates / manager_task_templates /
+         chairperson_task_templates (active TaskTemplates, by name), and
+         reference_version (int, for {% cache %} vary_on).
+    Side Effects: reads/writes the default cache; two queries on a miss
+         (one for sections, one for all active templates), none on a hit.
+    """
+    version = reference_version()
+    key = f'river:reference:planner:v{version}'
+    data = cache.get(key)
+    if data is None:
+        data = _build_planner_reference_data()
+        cache.set(key, data, BLOCK_TIMEOUT)
+    return {**data, 'reference_version': version}
@@ -0,0 +1,200 @@
+"""Full-text search over visit logs and planner tasks.
+
+Each VisitLog and Task has one SearchDocument whose `body` is the
+text the old icontains filters looked at (notes/instructions plus section,
+template and task-type names). core.signals keeps the documents in sync, and
+bulk write paths call index_documents() themselves.
+
+Matching goes through a backend picked from the database vendor:
+
+- PostgreSQL: to_tsvector('simple', body) @@ to_tsquery(...), served by the
+  GIN expression index created in migration 0035.
+- SQLite: the FTS5 table core_searchdocument_fts (external content, kept in
+  sync with core_searchdocument by triggers from the same migration).
+- Anything else: AND of body ICONTAINS per term (no index, but correct).
+
+Queries are split into word terms and every term must match as a word prefix,
+so "upp lies" finds "Upper Liesbeek". A query with no word characters (e.g.
+"%") falls back to a literal substring match on the body.
+"""
+import re
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, QuerySet
+from django.db.models.expressions import RawSQL
+
+from ..models import SearchDocument, Task, VisitLog
+
+KIND_VISIT_LOG = 'visitlog'
+KIND_TASK = 'task'
+
+FTS_TABLE = 'core_searchdocument_fts'
+# Must match the index expression in migration 0035 exactly, or PostgreSQL
+# will not use the GIN index.
+PG_VECTOR = "to_tsvector('simple'::regconfig, body)"
+
+_TERM = re.compile(r'[^\W_]+')
+
+
+def search_terms(q: str) -> list[str]:
+    """Split free text into lower-cased word terms (underscores separate words)."""
+    return _TERM.findall((q or '').lower())
+
+
+class SearchBackend(ABC):
+    """Turns a SearchDocument queryset into the documents matching `terms`.
+
+    Implementations must only reference columns of core_searchdocument
+    unqualified: the queryset is used as a subquery and gets re-aliased.
+    """
+
+    @abstractmethod
+    def match(self, documents: QuerySet, terms: list[str]) -> QuerySet:
+        """The subset of `documents` whose body contains every term (as a word prefix)."""
+
+
+class PostgresSearchBackend(SearchBackend):
+    def match(self, documents: QuerySet, terms: list[str]) -> QuerySet:
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return documents.filter(RawSQL(
+            f"{PG_VECTOR} @@ to_tsquery('simple'::regconfig, %s)", [tsquery], output_field=BooleanField(),
+        ))
+
+
+class SqliteFTSSearchBackend(SearchBackend):
+    def match(self, documents: QuerySet, terms: list[str]) -> QuerySet:
+        # Quoted prefix terms, implicitly ANDed; terms are \w-only so the
+        # quotes cannot be broken out of.
+        fts_query = ' '.join(f'"{term}"*' for term in terms)
+        return documents.filter(RawSQL(
+            f'id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)', [fts_query],
+            output_field=BooleanField(),
+        ))
+
+
+class LikeSearchBackend(SearchBackend):
+    def match(self, documents: QuerySet, terms: list[str]) -> QuerySet:
+        for term in terms:
+            documents = documents.filter(body__icontains=term)
+        return documents
+
+
+def get_search_backend() -> SearchBackend:
+    """Return the backend for the default database connection."""
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    if connection.vendor == 'sqlite':
+        return SqliteFTSSearchBackend()
+    return LikeSearchBackend()
+
+
+def matching_ids(kind: str, q: str) -> QuerySet:
+    """
+    Data Flow Contract
+    -------------------
+    In:  kind — KIND_VISIT_LOG or KIND_TASK; q — raw search text.
+    Out: QuerySet of matching object ids (values('object_id')), meant for
+         `.filter(pk__in=...)` so it runs as a subquery.
+    Side Effects: none.
+    """
+    documents = SearchDocument.objects.filter(kind=kind)
+    terms = search_terms(q)
+    if not terms:
+        documents = documents.filter(body__icontains=(q or '').strip())
+    else:
+        documents = get_search_backend().match(documents, terms)
+    return documents.values('object_id')
+
+
+def _join(*parts) -> str:
+    return ' '.join(part for part in parts if part)
+
+
+def _bodies(kind: str, ids: Iterable[int]) -> dict[int, str]:
+    if kind == KIND_VISIT_LOG:
+        rows = VisitLog.objects.filter(pk__in=ids).values_list(
+            'id', 'notes', 'section__name', 'task__template__name',
+        )
+    else:
+        rows = Task.objects.filter(pk__in=ids).values_list(
+            'id', 'instructions', 'section__name', 'template__name', 'template__task_type__name',
+        )
+    return {row[0]: _join(*row[1:]) for row in rows}
+
+
+def index_documents(kind: str, ids: Iterable[int]) -> None:
+    """
+    Data Flow Contract
+    -------------------
+    In:  kind — KIND_VISIT_LOG or KIND_TASK; ids — primary keys to (re)index.
+    Out: None.
+    Side Effects: upserts one SearchDocument per existing object and deletes
+         documents for ids that no longer exist. Two queries when every id
+         exists (read + upsert).
+    """
+    ids = set(ids)
+    if not ids:
+        return
+    bodies = _bodies(kind, ids)
+    # One upsert statement, so no savepoint: this runs in every save signal.
+    if bodies:
+        SearchDocument.objects.bulk_create(
+            [SearchDocument(kind=kind, object_id=pk, body=body) for pk, body in bodies.items()],
+            update_conflicts=True,
+            unique_fields=['kind', 'object_id'],
+            update_fields=['body', 'updated_at'],
+        )
+    missing = ids - bodies.keys()
+    if missing:
+        delete_documents(kind, missing)
+
+
+def delete_documents(kind: str, ids: Iterable[int]) -> None:
+    SearchDocument.objects.filter(kind=kind, object_id__in=list(ids)).delete()
+
+
+def reindex_tasks(task_ids: Iterable[int]) -> None:
+    """Reindex tasks and the visit logs whose text includes their template name."""
+    task_ids = list(task_ids)
+    if not task_ids:
+        return
+    index_documents(KIND_TASK, task_ids)
+    index_documents(KIND_VISIT_LOG, VisitLog.objects.filter(task_id__in=task_ids).values_list('id', flat=True))
+
+
+def reindex_for(section_id: int = None, template_id: int = None, task_type_id: int = None) -> None:
+    """Reindex everything whose text includes a renamed Section, TaskTemplate or TaskType."""
+    if section_id is not None:
+        reindex_tasks(Task.objects.filter(section_id=section_id).values_list('id', flat=True))
+        index_documents(KIND_VISIT_LOG, VisitLog.objects.filter(section_id=section_id).values_list('id', flat=True))
+    if template_id is not None:
+        reindex_tasks(Task.objects.filter(template_id=template_id).values_list('id', flat=True))
+    if task_type_id is not None:
+        reindex_tasks(Task.objects.filter(template__task_type_id=task_type_id).values_list('id', flat=True))
+
+
+def rebuild_search_index(batch_size: int = 500) -> int:
+    """Rebuild every SearchDocument from scratch. Returns documents written."""
+    written = 0
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        for kind, model in ((KIND_VISIT_LOG, VisitLog), (KIND_TASK, Task)):
+            ids = list(model.objects.values_list('id', flat=True))
+            for start in range(0, len(ids), batch_size):
+                bodies = _bodies(kind, ids[start:start + batch_size])
+                SearchDocument.objects.bulk_create(
+                    [SearchDocument(kind=kind, object_id=pk, body=body) for pk, body in bodies.items()]
+                )
+                written += len(bodies)
+    return written
+
+
+def find_missing_documents() -> dict[str, int]:
+    """Count objects with no SearchDocument, per kind (0 everywhere means in sync)."""
+    missing = {}
+    for kind, model in ((KIND_VISIT_LOG, VisitLog), (KIND_TASK, Task)):
+        indexed = SearchDocument.objects.filter(kind=kind).values('object_id')
+        missing[kind] = model.objects.exclude(pk__in=indexed).count()
+    return missing
@@ -0,0 +1,48 @@
+"""Section ordering."""
+from typing import Sequence
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Section
+from .dashboard_cache import bump_data_version
+from .reference_data import bump_reference_version
+
+
+def reorder_sections(order: Sequence) -> int:
+    """
+    Data Flow Contract
+    -------------------
+    In:  order — every section id (ints or numeric strings, as the section
+         list's drag-and-drop sends them), upstream first.
+    Out: number of sections whose position changed.
+    Side Effects: one transaction: a locking read of (id, position) and a
+         single CASE-based bulk_update of the changed rows only (position =
+         index in `order`, updated_at = now). Bumps the reference and data
+         versions on commit when anything moved.
+    Fails: ValueError (nothing written) if `order` is not exactly the
+           existing section ids, each once.
+    """
+    try:
+        ids = [int(pk) for pk in order]
+    except (TypeError, ValueError):
+        raise ValueError('order must be a list of section ids.')
+    if len(set(ids)) != len(ids):
+        raise ValueError('order lists a section more than once.')
+
+    with transaction.atomic():
+        current = dict(Section.objects.select_for_update().values_list('id', 'position'))
+        if set(ids) != current.keys():
+            raise ValueError('order must list every section exactly once.')
+        # .update()/bulk_update() skip auto_now; export cache stamps rely on updated_at.
+        now = timezone.now()
+        changed = [
+            Section(id=pk, position=index, updated_at=now)
+            for index, pk in enumerate(ids) if current[pk] != index
+        ]
+        Section.objects.bulk_update(changed, ['position', 'updated_at'])
+        if changed:
+            # bulk_update sends no post_save; section order feeds cached dropdowns.
+            transaction.on_commit(bump_reference_version)
+            transaction.on_commit(bump_data_version)
+    return len(changed)
@@ -1,9 +1,17 @@
+import hashlib
+import logging
 import uuid
 from datetime import timedelta, date
-from typing import Optional
+from typing import Iterable, Optional
 from django.db import transaction
-from django.db.models import Q
-from ..models import Task, TaskCompletionHistory
+from django.db.models import Count, Max, OuterRef, QuerySet, Subquery
+from django.utils import timezone
+from ..models import Task, TaskCompletionHistory, VisitLog
+from ..validation import validation_scope
+from .dashboard_cache import bump_data_version
+from .search import KIND_TASK, index_documents, matching_ids, reindex_tasks
+
+logger = logging.getLogger(__name__)
 
 
 def resolve_task_type(task: Optional[Task]) -> str:
@@ -14,6 +22,40 @@ def resolve_task_type(task: Optional[Task]) -> str:
     return 'unplanned'
 
 
+def with_visit_log_id(queryset: QuerySet) -> QuerySet:
+    """
+    Data Flow Contract
+    -------------------
+    In:  queryset — any Task queryset.
+    Out: the same queryset annotated with visit_log_id: the pk of the task's
+         most recent VisitLog (VisitLog.Meta ordering, i.e. what
+         task.visitlog_set.first() returns), or None.
+    Side Effects: none; the lookup is a correlated subquery in the same SELECT,
+         so templates can link "Edit log" without a query per card.
+    """
+    latest_log = VisitLog.objects.filter(task=OuterRef('pk')).order_by('-date', '-created_at', '-pk')
+    return queryset.annotate(visit_log_id=Subquery(latest_log.values('pk')[:1]))
+
+
+def build_planner_grid(tasks: Iterable[Task], days: Iterable[date],
+                       assignee_types: Iterable[str]) -> dict[tuple[date, str], list[Task]]:
+    """
+    Data Flow Contract
+    -------------------
+    In:  tasks — Task rows for the visible range (any order; kept as given
+         within a cell). days / assignee_types — the grid axes.
+    Out: {(date, assignee_type): [Task, ...]} with a (possibly empty) list for
+         every day x assignee cell. Tasks outside the axes are dropped.
+    Side Effects: evaluates `tasks` once; no further queries.
+    """
+    grid = {(day, assignee): [] for day in days for assignee in assignee_types}
+    for task in tasks:
+        cell = grid.get((task.date, task.assignee_type))
+        if cell is not None:
+            cell.append(task)
+    return grid
+
+
 def mark_task_completed(task: Optional[Task], user=None) -> None:
     """Mark a task completed and record a completion-history event.
 
@@ -30,6 +72,10 @@ def mark_task_completed(task: Optional[Task], user=None) -> None:
 def create_task_series(base_task_data: dict, start_date: date, end_date: date, exclude_weekends: bool = True) -> int:
     """
     Creates a series of tasks for a date range.
+
+    Tasks in a series differ only in date, so one prototype goes through
+    full_clean() (foreign keys checked once) before the bulk insert, which
+    skips Task.save(). Raises ValidationError before anything is written.
     """
     tasks_to_create = []
     current_date = start_date
@@ -39,6 +85,9 @@ def create_task_series(base_task_data: dict, start_date: date, end_date: date, e
     if (end_date - start_date).days > 90:
         raise ValueError("Task series range cannot exceed 90 days.")
 
+    with validation_scope():
+        Task(**base_task_data, date=start_date, group_id=group_id).full_clean()
+
     with transaction.atomic():
         while current_date <= end_date:
             # Skip weekends if requested (Saturday=5, Sunday=6)
@@ -55,6 +104,10 @@ def create_task_series(base_task_data: dict, start_date: date, end_date: date, e
             
         if tasks_to_create:
             Task.objects.bulk_create(tasks_to_create)
+            # bulk_create sends no post_save, so invalidate cached blocks and
+            # index the new tasks here.
+            transaction.on_commit(bump_data_version)
+            index_documents(KIND_TASK, [t.pk for t in tasks_to_create])
             
     return len(tasks_to_create)
 
@@ -66,7 +119,10 @@ def update_task_series(group_id: uuid.UUID, update_data: dict, update_all: bool
     if not update_all or not group_id:
         # Update only the current task
         if current_task_id:
-            Task.objects.filter(id=current_task_id).update(**update_data)
+            # .update() skips auto_now; planner ETags rely on updated_at.
+            Task.objects.filter(id=current_task_id).update(**update_data, updated_at=timezone.now())
+            transaction.on_commit(bump_data_version)
+            reindex_tasks([current_task_id])
             return 1
         return 0
 
@@ -76,7 +132,9 @@ def update_task_series(group_id: uuid.UUID, update_data: dict, update_all: bool
     filtered_update_data = {k: v for k, v in update_data.items() if k in sync_fields}
     
     with transaction.atomic():
-        updated_count = Task.objects.filter(group_id=group_id).update(**filtered_update_data)
+        updated_count = Task.objects.filter(group_id=group_id).update(**filtered_update_data, updated_at=timezone.now())
+        transaction.on_commit(bump_data_version)
+        reindex_tasks(Task.objects.filter(group_id=group_id).values_list('id', flat=True))
         
     return updated_count
 
@@ -95,81 +153,239 @@ def delete_task_series(group_id: uuid.UUID, delete_all: bool = False, current_ta
         
     return deleted_count
 
-def move_todo_task(task_id: int, new_status: str, new_index: int) -> None:
+# Rolling Kanban order: sparse todo_position values, TODO_GAP apart after a
+# rebalance, so a drop normally takes a value between its two neighbours and
+# writes only the moved row. A column is only renumbered when two neighbours
+# have no integer left between them (or the bottom runs past the column max).
+TODO_GAP = 1024
+TODO_POSITION_MAX = 2 ** 31 - 1  # PositiveIntegerField on PostgreSQL
+# rebalance_todo_positions renumbers a column before drops run out of room.
+TODO_MIN_GAP = 8
+# Written by every move; updated_at feeds the column version tokens.
+TODO_MOVE_FIELDS = ['todo_position', 'todo_status', 'updated_at']
+
+
+def _position_between(before: Optional[int], after: Optional[int]) -> Optional[int]:
+    """A free todo_position strictly between two neighbours (None = column edge), or None if there is none."""
+    if before is None and after is None:
+        return TODO_GAP
+    if before is None:
+        if after > TODO_GAP:
+            return after - TODO_GAP
+        return after // 2 if after > 0 else None
+    if after is None:
+        return before + TODO_GAP if before + TODO_GAP <= TODO_POSITION_MAX else None
+    middle = (before + after) // 2
+    return middle if before < middle < after else None
+
+
+def rolling_column(status: str) -> QuerySet:
+    """Rolling tasks in a Kanban column, in display order."""
+    return Task.objects.filter(is_rolling=True, todo_status=status).order_by('todo_position', 'id')
+
+
+def next_todo_position(status: str, exclude_id: Optional[int] = None) -> int:
+    """A todo_position below the last card of a column (TODO_GAP past it), capped at the column max."""
+    last = rolling_column(status).exclude(id=exclude_id).aggregate(last=Max('todo_position'))['last']
+    return min((last or 0) + TODO_GAP, TODO_POSITION_MAX)
+
+
+def rebalance_todo_column(status: str, order: Optional[list[Task]] = None) -> int:
     """
-    Updates the status and position of a rolling task and re-indexes
-    both source and target status columns if necessary.
+    Data Flow Contract
+    -------------------
+    In:  status — Kanban column; order — its tasks in the wanted order
+         (default: the current order).
+    Out: number of rows whose todo_position changed.
+    Side Effects: spreads the column to TODO_GAP, 2*TODO_GAP, ... with one
+         bulk_update of the changed rows. Call inside a transaction that has
+         the column locked if moves may run concurrently.
     """
-    import logging
-    log = logging.getLogger(__name__)
+    if order is None:
+        order = list(rolling_column(status).select_for_update().only('id', 'todo_position', 'todo_status'))
+    changed = _spread_column(order, status, timezone.now())
+    Task.objects.bulk_update(changed, TODO_MOVE_FIELDS, batch_size=500)
+    return len(changed)
 
+
+def _spread_column(order: list[Task], status: str, now) -> list[Task]:
+    """Give `order` positions TODO_GAP apart in `status` (in memory); return the tasks that changed."""
+    changed = []
+    for i, task in enumerate(order, start=1):
+        if task.todo_position != i * TODO_GAP or task.todo_status != status:
+            task.todo_position = i * TODO_GAP
+            task.todo_status = status
+            task.updated_at = now
+            changed.append(task)
+    return changed
+
+
+def crowded_todo_columns(min_gap: int = TODO_MIN_GAP) -> list[str]:
+    """Kanban columns whose tightest pair of neighbours is closer than `min_gap`, or that run near the column max."""
+    crowded = []
+    for status, _ in Task.TODO_STATUS_CHOICES:
+        positions = list(rolling_column(status).values_list('todo_position', flat=True))
+        gaps = [b - a for a, b in zip(positions, positions[1:])]
+        if (gaps and min(gaps) < min_gap) or (positions and positions[-1] > TODO_POSITION_MAX - TODO_GAP * len(positions)):
+            crowded.append(status)
+    return crowded
+
+
+def move_todo_task(task_id: int, new_status: str, new_index: int) -> None:
+    """
+    Data Flow Contract
+    -------------------
+    In:  task_id — rolling task (str from JSON is accepted); new_status —
+         target column; new_index — its 0-based slot in that column as shown,
+         not counting the task itself (clamped to the column).
+    Out: None.
+    Side Effects: normally one UPDATE of the moved row (none if it already
+         sits in that slot). Only when the neighbours leave no free position
+         is the target column renumbered (rebalance_todo_column). The source
+         column is never touched: removing a card leaves order intact.
+    """
     with transaction.atomic():
-        task_id = int(task_id)  # JSON sends strings
-        task = Task.objects.select_for_update().get(id=task_id)
+        task = Task.objects.select_for_update().get(id=int(task_id))
         old_status = task.todo_status
-        log.info(f'move_todo_task: task={task_id} old={old_status} -> new={new_status} index={new_index}')
-        print(f'[DEBUG move_todo_task] task={task_id} old={old_status} -> new={new_status} index={new_index}')
-
-        # Same-column reorder (or no-op if the position didn't change).
-        # SortableJS fires onEnd for in-column drags too, so a task can move
-        # to a new position while keeping its status.
-        if old_status == new_status:
-            if task.todo_position == new_index:
-                log.info(f'move_todo_task: no change, skipping')
-                print(f'[DEBUG move_todo_task] no change, skipping')
-                return
-
-            column_tasks = list(Task.objects.filter(
-                is_rolling=True,
-                todo_status=new_status
-            ).exclude(id=task_id).order_by('todo_position'))
-
-            column_tasks.insert(new_index, task)
-            print(f'[DEBUG move_todo_task] same-column reorder: {len(column_tasks)} tasks after insert')
-
-            for i, t in enumerate(column_tasks):
-                if t.id == task_id:
-                    updated = Task.objects.filter(id=t.id).update(todo_position=i)
-                    print(f'[DEBUG move_todo_task] UPDATED task {t.id}: pos={i} rows={updated}')
-                    log.info(f'move_todo_task: reordered task {t.id} to pos={i} (same status)')
-                elif t.todo_position != i:
-                    updated = Task.objects.filter(id=t.id).update(todo_position=i)
-                    print(f'[DEBUG move_todo_task] reindex task {t.id}: pos {t.todo_position} -> {i} rows={updated}')
+        column = rolling_column(new_status).exclude(id=task.id)
+        new_index = max(int(new_index), 0)
+
+        neighbours = list(column.values_list('todo_position', flat=True)[max(new_index - 1, 0):new_index + 1])
+        if new_index == 0:
+            before, after = None, (neighbours[0] if neighbours else None)
+        else:
+            before = neighbours[0] if neighbours else None
+            after = neighbours[1] if len(neighbours) > 1 else None
+            if before is None:
+                # Index past the end: append after the last card.
+                before = column.reverse().values_list('todo_position', flat=True).first()
+
+        if (old_status == new_status
+                and (before is None or before < task.todo_position)
+                and (after is None or task.todo_position < after)):
             return
 
-        # Re-index target column (includes the task being moved)
-        target_tasks = list(Task.objects.filter(
-            is_rolling=True,
-            todo_status=new_status
-        ).exclude(id=task_id).order_by('todo_position'))
-
-        target_tasks.insert(new_index, task)
-        print(f'[DEBUG move_todo_task] target column has {len(target_tasks)} tasks after insert')
-
-        for i, t in enumerate(target_tasks):
-            if t.id == task_id:
-                updated = Task.objects.filter(id=t.id).update(todo_status=new_status, todo_position=i)
-                print(f'[DEBUG move_todo_task] UPDATED task {t.id}: status={new_status} pos={i} rows={updated}')
-                log.info(f'move_todo_task: updated task {t.id} to status={new_status} pos={i}')
-            elif t.todo_position != i:
-                updated = Task.objects.filter(id=t.id).update(todo_position=i)
-                print(f'[DEBUG move_todo_task] reindex task {t.id}: pos {t.todo_position} -> {i} rows={updated}')
-
-        # Re-index source column
-        source_tasks = Task.objects.filter(
-            is_rolling=True,
-            todo_status=old_status
-        ).exclude(id=task_id).order_by('todo_position')
-
-        for i, t in enumerate(source_tasks):
-            if t.todo_position != i:
-                updated = Task.objects.filter(id=t.id).update(todo_position=i)
-                print(f'[DEBUG move_todo_task] source reindex task {t.id}: pos {t.todo_position} -> {i} rows={updated}')
-
-        # Verify the update actually landed
-        task.refresh_from_db()
-        print(f'[DEBUG move_todo_task] VERIFY: task {task.id} now has status={task.todo_status} pos={task.todo_position}')
-        log.info(f'move_todo_task: verified task {task.id} status={task.todo_status}')
+        position = _position_between(before, after)
+        if position is None:
+            order = list(column.select_for_update().only('id', 'todo_position', 'todo_status'))
+            order.insert(min(new_index, len(order)), task)
+            rebalanced = rebalance_todo_column(new_status, order)
+            logger.info('move_todo_task: rebalanced %s column (%d rows) for task %s', new_status, rebalanced, task.id)
+            return
+
+        # .update() skips auto_now; column version tokens rely on updated_at.
+        Task.objects.filter(id=task.id).update(todo_status=new_status, todo_position=position, updated_at=timezone.now())
+
+
+class TodoVersionConflict(Exception):
+    """A batch of Kanban moves was based on a stale column; carries the current versions."""
+
+    def __init__(self, versions: dict[str, str]):
+        super().__init__('The board changed since it was loaded.')
+        self.versions = versions
+
+
+def todo_column_version(count: int, last_updated) -> str:
+    """Opaque version token for a Kanban column from its card count and max(updated_at)."""
+    stamp = last_updated.isoformat() if last_updated else '-'
+    return hashlib.sha1(f'{count}|{stamp}'.encode()).hexdigest()[:16]
+
+
+def todo_column_versions(tasks: Optional[Iterable[Task]] = None) -> dict[str, str]:
+    """
+    Data Flow Contract
+    -------------------
+    In:  tasks — every rolling task, already loaded (no query); None to
+         aggregate in the database (one query).
+    Out: {status: version token} for every Kanban column, empty ones included.
+    Side Effects: none. Every move path sets updated_at, so any add, edit,
+         move in or move out changes the token of the columns involved.
+    """
+    if tasks is None:
+        summary = {
+            row['todo_status']: (row['count'], row['last_updated'])
+            for row in Task.objects.filter(is_rolling=True).values('todo_status')
+            .annotate(count=Count('id'), last_updated=Max('updated_at')).order_by()
+        }
+    else:
+        summary = {}
+        for task in tasks:
+            count, last = summary.get(task.todo_status, (0, None))
+            summary[task.todo_status] = (count + 1, task.updated_at if last is None else max(last, task.updated_at))
+    return {status: todo_column_version(*summary.get(status, (0, None))) for status, _ in Task.TODO_STATUS_CHOICES}
+
+
+def apply_todo_moves(moves: list[dict], versions: dict[str, str]) -> dict:
+    """
+    Data Flow Contract
+    -------------------
+    In:  moves — [{task_id, status, index}, ...] in the order they happened,
+         each index as in move_todo_task; versions — {status: token} the
+         client's board was rendered from, for every column the moves touch.
+    Out: {'tasks': [{id, status, position}] for every row written,
+          'versions': the new {status: token}}.
+    Side Effects: one transaction: a locking read of the board, one
+         bulk_update of the changed rows (TODO_MOVE_FIELDS). Positions are
+         placed as in move_todo_task; a column with no gap left is spread.
+    Fails: ValueError for an unknown status, a non-rolling task, a bad index,
+           or a missing version; TodoVersionConflict (nothing written) when a
+           touched column's token no longer matches.
+    """
+    statuses = {status for status, _ in Task.TODO_STATUS_CHOICES}
+    try:
+        moves = [(int(m['task_id']), m['status'], int(m['index'])) for m in moves]
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('Each move needs task_id, status and an integer index.')
+    for _, status, _ in moves:
+        if status not in statuses:
+            raise ValueError(f'Invalid status: {status}')
+
+    with transaction.atomic():
+        board = list(
+            Task.objects.filter(is_rolling=True).select_for_update()
+            .only('id', 'todo_status', 'todo_position', 'updated_at').order_by('todo_position', 'id')
+        )
+        by_id = {task.id: task for task in board}
+        unknown = [task_id for task_id, _, _ in moves if task_id not in by_id]
+        if unknown:
+            raise ValueError(f'Not a rolling task: {unknown[0]}')
+
+        current = todo_column_versions(board)
+        touched = {status for _, status, _ in moves} | {by_id[task_id].todo_status for task_id, _, _ in moves}
+        missing = touched - versions.keys()
+        if missing:
+            raise ValueError(f'Missing version for column: {sorted(missing)[0]}')
+        if any(versions[status] != current[status] for status in touched):
+            raise TodoVersionConflict(current)
+
+        columns = {status: [t for t in board if t.todo_status == status] for status in statuses}
+        now = timezone.now()
+        changed = {}
+        for task_id, status, index in moves:
+            task = by_id[task_id]
+            columns[task.todo_status].remove(task)
+            column = columns[status]
+            index = min(max(index, 0), len(column))
+            before = column[index - 1].todo_position if index > 0 else None
+            after = column[index].todo_position if index < len(column) else None
+            column.insert(index, task)
+            if (task.todo_status == status
+                    and (before is None or before < task.todo_position)
+                    and (after is None or task.todo_position < after)):
+                continue
+            position = _position_between(before, after)
+            if position is None:
+                changed.update((t.id, t) for t in _spread_column(column, status, now))
+                continue
+            task.todo_status, task.todo_position, task.updated_at = status, position, now
+            changed[task.id] = task
+
+        Task.objects.bulk_update(list(changed.values()), TODO_MOVE_FIELDS, batch_size=500)
+
+    return {
+        'tasks': [{'id': t.id, 'status': t.todo_status, 'position': t.todo_position} for t in changed.values()],
+        'versions': todo_column_versions(board),
+    }
 
 
 def search_planner_tasks(q: str) -> list[dict]:
@@ -181,7 +397,8 @@ def search_planner_tasks(q: str) -> list[dict]:
          (80 chars), date (ISO str or None), section_name, task_type_name,
          task_type_code.
     Side Effects: none (pure read).
-    Fails: never raises on ordinary input; icontains escapes wildcards.
+    Fails: never raises on ordinary input; every word of q must prefix-match
+           the task's search document (see services.search).
            Blank/whitespace q returns [].
     """
     q = (q or '').strip()
@@ -190,12 +407,7 @@ def search_planner_tasks(q: str) -> list[dict]:
 
     tasks = (
         Task.objects.filter(is_rolling=False)
-        .filter(
-            Q(instructions__icontains=q)
-            | Q(section__name__icontains=q)
-            | Q(template__name__icontains=q)
-            | Q(template__task_type__name__icontains=q)
-        )
+        .filter(pk__in=matching_ids(KIND_TASK, q))
         .select_related('section', 'template__task_type')
         .order_by('-date', '-id')[:8]
     )
@@ -2,9 +2,11 @@
 from datetime import datetime
 from typing import Optional
 
-from django.db.models import F, Q, QuerySet, Sum
+from django.db.models import QuerySet, Sum
 
 from ..models import VisitLog
+from .keyset_pagination import SortKey, keyset_ordering
+from .search import KIND_VISIT_LOG, matching_ids
 
 
 def base_visit_log_queryset(params: dict) -> QuerySet:
@@ -13,6 +15,7 @@ def base_visit_log_queryset(params: dict) -> QuerySet:
     Data Flow Contract:
       in:  params — request.GET-like mapping with optional keys
            q, section, start_date, end_date, activity_type
+           (q goes through the full-text index; see services.search)
       out: QuerySet[VisitLog] with select_related('section','task') and
            prefetch_related('metrics','photos')
       side effects: none
@@ -21,11 +24,7 @@ def base_visit_log_queryset(params: dict) -> QuerySet:
 
     search_query = params.get('q')
     if search_query:
-        queryset = queryset.filter(
-            Q(notes__icontains=search_query)
-            | Q(section__name__icontains=search_query)
-            | Q(task__template__name__icontains=search_query)
-        )
+        queryset = queryset.filter(pk__in=matching_ids(KIND_VISIT_LOG, search_query))
 
     section_id = params.get('section')
     if section_id:
@@ -85,17 +84,22 @@ def build_visit_log_queryset(params: dict) -> QuerySet:
     if metric in _METRIC_TYPES or metric == 'participants' or species:
         queryset = queryset.distinct()
 
-    sort = params.get('sort', '-date')
-    if sort == 'date':
-        queryset = queryset.order_by('date', '-created_at')
-    elif sort == 'section':
-        queryset = queryset.order_by(F('section__name').asc(nulls_last=True), '-date')
-    elif sort == '-participant_count':
-        queryset = queryset.order_by('-participant_count', '-date')
-    else:
-        queryset = queryset.order_by('-date', '-created_at')
+    return queryset.order_by(*keyset_ordering(VisitLog, visit_log_sort_keys(params.get('sort'))))
 
-    return queryset
+
+# Total sort keys behind the list's sort options. Each ends in (created_at, id)
+# so ties are broken deterministically, which keyset pagination relies on.
+VISIT_LOG_SORT_KEYS = {
+    '-date': (('date', True), ('created_at', True), ('id', True)),
+    'date': (('date', False), ('created_at', True), ('id', True)),
+    'section': (('section__name', False), ('date', True), ('created_at', True), ('id', True)),
+    '-participant_count': (('participant_count', True), ('date', True), ('created_at', True), ('id', True)),
+}
+
+
+def visit_log_sort_keys(sort: Optional[str]) -> SortKey:
+    """Return the sort key for a `sort` param value (unknown values → newest first)."""
+    return VISIT_LOG_SORT_KEYS.get(sort or '-date', VISIT_LOG_SORT_KEYS['-date'])
 
 
 METRIC_DISPLAY = {
@@ -0,0 +1,113 @@
+"""Flat, streamed Master Activity Log exports (CSV and NDJSON).
+
+The reporting pipeline only needs flat rows, so these formats skip openpyxl
+entirely. One query feeds the whole export: the filtered visits joined to
+their metrics, grouped per (visit, metric type, label) with SUM(value) and
+ordered like the list view. Rows for one visit therefore arrive together,
+and pivot_visit_rows() folds them into one flat row per visit.
+
+The query is read with iterator(chunk_size=...), which uses a server-side
+cursor on PostgreSQL. Memory stays flat and the first rows go out before the
+whole result exists. The CSV header is yielded before the query even runs.
+"""
+import csv
+import json
+from itertools import groupby
+from typing import Iterable, Iterator, Mapping
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Sum
+
+from ..models import VisitLog
+from .excel_export import EXPORT_CHUNK_SIZE
+from .keyset_pagination import keyset_ordering
+from .visit_log_services import build_visit_log_queryset, visit_log_sort_keys
+
+# Keys of every row from visit_log_rows(), in CSV column order.
+VISIT_LOG_COLUMNS = (
+    'id', 'date', 'section', 'task', 'task_type', 'participants',
+    'general_bags', 'recyclable_bags', 'plants', 'weeds', 'notes',
+)
+
+_VISIT_FIELDS = (
+    'id', 'date', 'section__name', 'task__template__name',
+    'task__template__task_type__name', 'participant_count', 'notes',
+)
+
+
+def visit_log_rows(params: Mapping, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Data Flow Contract
+    -------------------
+    In:  params — request.GET-like filters (see build_visit_log_queryset).
+    Out: one dict per visit (keys VISIT_LOG_COLUMNS). `plants` and `weeds`
+         map label -> summed value.
+    Side Effects: one query, streamed in `chunk_size` rows.
+    """
+    # Re-select by pk so the metric join below is not narrowed by a
+    # metric/species filter on the same relation.
+    matching = build_visit_log_queryset(params).values('pk')
+    ordering = keyset_ordering(VisitLog, visit_log_sort_keys(params.get('sort')))
+    rows = (
+        VisitLog.objects.filter(pk__in=matching)
+        .values_list(*_VISIT_FIELDS, 'metrics__metric_type', 'metrics__label')
+        .annotate(total=Sum('metrics__value'))
+        .order_by(*ordering, 'metrics__metric_type', 'metrics__label')
+    )
+    return pivot_visit_rows(rows.iterator(chunk_size=chunk_size))
+
+
+def pivot_visit_rows(rows: Iterable[tuple]) -> Iterator[dict]:
+    """Fold consecutive (visit fields..., metric_type, label, total) rows into one dict per visit."""
+    for _, group in groupby(rows, key=lambda row: row[0]):
+        group = list(group)
+        pk, day, section, template, task_type, participants, notes = group[0][:7]
+        totals = {'litter_general': 0, 'litter_recyclable': 0}
+        plants, weeds = {}, {}
+        for *_, metric_type, label, total in group:
+            if metric_type in totals:
+                totals[metric_type] += total
+            elif metric_type == 'plant':
+                plants[label or 'Unlabeled'] = plants.get(label or 'Unlabeled', 0) + total
+            elif metric_type == 'weed':
+                weeds[label or 'Unlabeled'] = weeds.get(label or 'Unlabeled', 0) + total
+        yield {
+            'id': pk,
+            'date': day,
+            'section': section or 'General',
+            'task': template or 'Unplanned',
+            'task_type': task_type or '',
+            'participants': participants,
+            'general_bags': totals['litter_general'],
+            'recyclable_bags': totals['litter_recyclable'],
+            'plants': plants,
+            'weeds': weeds,
+            'notes': notes,
+        }
+
+
+class _Echo:
+    """File-like sink for csv.writer: write() hands the line back instead of storing it."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _joined(counts: dict) -> str:
+    return '; '.join(f'{label}: {value}' for label, value in counts.items())
+
+
+def csv_lines(rows: Iterable[dict]) -> Iterator[str]:
+    """Header, then one CSV line per row; plant/weed counts as "Label: n; ..."."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(VISIT_LOG_COLUMNS)
+    for row in rows:
+        yield writer.writerow([
+            _joined(row[col]) if col in ('plants', 'weeds') else row[col] for col in VISIT_LOG_COLUMNS
+        ])
+
+
+def ndjson_lines(rows: Iterable[dict]) -> Iterator[str]:
+    """One JSON object per line (dates as ISO strings)."""
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
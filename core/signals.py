@@ -0,0 +1,224 @@
+"""Model signal handlers for derived data (metric rollups, cache versions, search index)."""
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Metric, Photo, Section, Task, TaskTemplate, TaskType, VisitLog
+from .services.dashboard_cache import bump_data_version
+from .services.metric_rollups import queue_rollup_refresh, week_start
+from .services.photo_blobs import add_blob_reference, release_blob, store_blob
+from .services.photo_derivatives import derivatives_stale
+from .services.photo_processing import queue_photo
+from .services.reference_data import bump_reference_version
+from .services.search import (
+    KIND_TASK, KIND_VISIT_LOG, delete_documents, index_documents, reindex_for, reindex_tasks,
+)
+
+
+def _visit_metric_keys(visit_id, placements):
+    """Rollup keys for every metric on a visit at each (section_id, day) placement."""
+    pairs = set(Metric.objects.filter(visit_id=visit_id).values_list('metric_type', 'label'))
+    return {
+        (section_id, metric_type, label, week_start(day))
+        for section_id, day in placements
+        for metric_type, label in pairs
+    }
+
+
+def _deleted_directly(origin, model):
+    """True when `origin` is an instance/queryset of `model` (not a cascade)."""
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+
+@receiver(post_save, sender=Metric)
+def metric_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    visit = instance.visit
+    keys = {(visit.section_id, instance.metric_type, instance.label, week_start(visit.date))}
+    # TrackedFieldsMixin: the snapshot still holds the row as it was before
+    # this save, i.e. the bucket a moved metric is leaving.
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded:
+        old = (loaded.get('visit_id'), loaded.get('metric_type'), loaded.get('label'))
+        if old != (instance.visit_id, instance.metric_type, instance.label):
+            old_visit = visit if old[0] == instance.visit_id else VisitLog.objects.get(pk=old[0])
+            keys.add((old_visit.section_id, old[1], old[2], week_start(old_visit.date)))
+    queue_rollup_refresh(keys)
+
+
+@receiver(post_delete, sender=Metric)
+def metric_deleted(sender, instance, origin=None, **kwargs):
+    # Cascades from VisitLog/Task/Section are refreshed by visit_log_deleted
+    # in one go rather than one bucket per metric.
+    if origin is not None and not _deleted_directly(origin, Metric):
+        return
+    visit = instance.visit
+    queue_rollup_refresh({(visit.section_id, instance.metric_type, instance.label, week_start(visit.date))})
+
+
+@receiver(post_save, sender=VisitLog)
+def visit_log_saved(sender, instance, created=False, raw=False, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None)
+    if raw or created or not loaded or 'date' not in loaded or 'section_id' not in loaded:
+        return
+    old = (loaded['section_id'], loaded['date'])
+    new = (instance.section_id, instance.date)
+    if old != new:
+        queue_rollup_refresh(_visit_metric_keys(instance.pk, {old, new}))
+
+
+@receiver(pre_delete, sender=VisitLog)
+def visit_log_deleting(sender, instance, **kwargs):
+    instance._rollup_keys = _visit_metric_keys(instance.pk, {(instance.section_id, instance.date)})
+
+
+@receiver(post_delete, sender=VisitLog)
+def visit_log_deleted(sender, instance, **kwargs):
+    queue_rollup_refresh(getattr(instance, '_rollup_keys', ()))
+
+
+@receiver(post_save, sender=VisitLog, dispatch_uid='data_version_visitlog_save')
+@receiver(post_delete, sender=VisitLog, dispatch_uid='data_version_visitlog_delete')
+@receiver(post_save, sender=Metric, dispatch_uid='data_version_metric_save')
+@receiver(post_delete, sender=Metric, dispatch_uid='data_version_metric_delete')
+@receiver(post_save, sender=Task, dispatch_uid='data_version_task_save')
+@receiver(post_delete, sender=Task, dispatch_uid='data_version_task_delete')
+@receiver(post_save, sender=Section, dispatch_uid='data_version_section_save')
+@receiver(post_delete, sender=Section, dispatch_uid='data_version_section_delete')
+@receiver(post_save, sender=TaskTemplate, dispatch_uid='data_version_template_save')
+@receiver(post_delete, sender=TaskTemplate, dispatch_uid='data_version_template_delete')
+@receiver(post_save, sender=TaskType, dispatch_uid='data_version_tasktype_save')
+@receiver(post_delete, sender=TaskType, dispatch_uid='data_version_tasktype_delete')
+def data_changed(sender, **kwargs):
+    # Bump after commit: bumping earlier would let another worker rebuild a
+    # block from pre-commit data and cache it under the new version.
+    transaction.on_commit(bump_data_version)
+
+
+@receiver(post_save, sender=Section, dispatch_uid='reference_version_section_save')
+@receiver(post_delete, sender=Section, dispatch_uid='reference_version_section_delete')
+@receiver(post_save, sender=TaskTemplate, dispatch_uid='reference_version_template_save')
+@receiver(post_delete, sender=TaskTemplate, dispatch_uid='reference_version_template_delete')
+@receiver(post_save, sender=TaskType, dispatch_uid='reference_version_tasktype_save')
+@receiver(post_delete, sender=TaskType, dispatch_uid='reference_version_tasktype_delete')
+def reference_data_changed(sender, **kwargs):
+    # Same on_commit reasoning as data_changed, for the planner modal caches.
+    transaction.on_commit(bump_reference_version)
+
+
+@receiver(post_save, sender=VisitLog, dispatch_uid='search_visitlog_save')
+def visit_log_indexed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_documents(KIND_VISIT_LOG, [instance.pk])
+
+
+def _saved_fields(instance, update_fields) -> set:
+    """Field names (and attnames) this save wrote: update_fields, else the loaded-snapshot diff."""
+    if update_fields is None:
+        names = instance.changed_fields()
+    else:
+        names = set(update_fields)
+    return names | {instance._meta.get_field(name).attname for name in names}
+
+
+@receiver(post_save, sender=Task, dispatch_uid='search_task_save')
+def task_indexed(sender, instance, raw=False, created=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        index_documents(KIND_TASK, [instance.pk])
+        return
+    # Completing, moving or rescheduling a task changes no indexed text.
+    saved = _saved_fields(instance, update_fields)
+    if 'template' in saved:
+        # Visit logs carry the task's template name, so refresh them too.
+        reindex_tasks([instance.pk])
+    elif saved & {'instructions', 'section'}:
+        index_documents(KIND_TASK, [instance.pk])
+
+
+@receiver(post_delete, sender=VisitLog, dispatch_uid='search_visitlog_delete')
+def visit_log_unindexed(sender, instance, **kwargs):
+    delete_documents(KIND_VISIT_LOG, [instance.pk])
+
+
+@receiver(post_delete, sender=Task, dispatch_uid='search_task_delete')
+def task_unindexed(sender, instance, **kwargs):
+    delete_documents(KIND_TASK, [instance.pk])
+
+
+@receiver(post_save, sender=Section, dispatch_uid='search_section_save')
+def section_indexed(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    # Only a rename reaches documents; stage or position edits skip this.
+    if not (raw or created) and 'name' in _saved_fields(instance, update_fields):
+        reindex_for(section_id=instance.pk)
+
+
+@receiver(post_save, sender=TaskTemplate, dispatch_uid='search_template_save')
+def template_indexed(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    # Only the name and task type reach documents; an is_active toggle does not.
+    if not (raw or created) and _saved_fields(instance, update_fields) & {'name', 'task_type'}:
+        reindex_for(template_id=instance.pk)
+
+
+@receiver(post_save, sender=TaskType, dispatch_uid='search_tasktype_save')
+def task_type_indexed(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if not (raw or created) and 'name' in _saved_fields(instance, update_fields):
+        reindex_for(task_type_id=instance.pk)
+
+
+@receiver(pre_delete, sender=TaskTemplate, dispatch_uid='search_template_deleting')
+@receiver(pre_delete, sender=TaskType, dispatch_uid='search_tasktype_deleting')
+def reference_deleting(sender, instance, **kwargs):
+    # Tasks lose the name through SET_NULL, which sends no signals; remember
+    # them so post_delete can reindex. (Section deletes cascade, and the
+    # cascaded Task/VisitLog deletes drop their own documents.)
+    lookup = 'template' if sender is TaskTemplate else 'template__task_type'
+    instance._search_task_ids = list(Task.objects.filter(**{lookup: instance}).values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=TaskTemplate, dispatch_uid='search_template_delete')
+@receiver(post_delete, sender=TaskType, dispatch_uid='search_tasktype_delete')
+def reference_deleted(sender, instance, **kwargs):
+    reindex_tasks(getattr(instance, '_search_task_ids', ()))
+
+
+@receiver(pre_save, sender=Photo, dispatch_uid='photo_blob_save')
+def photo_blob_assigned(sender, instance, raw=False, **kwargs):
+    # A newly assigned file is stored once per content: point the row at the
+    # shared blob instead of writing another copy under photos/%Y/%m/%d/.
+    if raw or not instance.file or instance.file._committed:
+        return
+    previous = instance.blob_id
+    blob = store_blob(instance.file.file)
+    instance.blob = blob
+    instance.file = blob.file.name
+    # Counted once the row is written (photo_blob_referenced).
+    instance._blob_change = (previous, blob.pk)
+
+
+@receiver(post_save, sender=Photo, dispatch_uid='photo_blob_saved')
+def photo_blob_referenced(sender, instance, raw=False, **kwargs):
+    # Same transaction as the INSERT/UPDATE: a save that fails never gets here
+    # (or is rolled back with it), so it cannot leak a reference.
+    previous, current = instance.__dict__.pop('_blob_change', (None, None))
+    if previous != current:
+        add_blob_reference(current)
+        release_blob(previous)
+
+
+@receiver(post_delete, sender=Photo, dispatch_uid='photo_blob_delete')
+def photo_blob_released(sender, instance, **kwargs):
+    release_blob(instance.blob_id)
+
+
+@receiver(post_save, sender=Photo, dispatch_uid='photo_derivatives_save')
+def photo_saved(sender, instance, raw=False, created=False, **kwargs):
+    # New photos start out pending; a replaced original goes back on the
+    # queue for the process_photos worker. No image work in the request.
+    if not (raw or created) and derivatives_stale(instance):
+        queue_photo(instance)
@@ -0,0 +1,31 @@
+"""Private file storage: files that must only be served through a view."""
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ExportJobStorage(FileSystemStorage):
+    """
+    Finished export jobs, under EXPORT_JOB_DIR (outside MEDIA_ROOT: nginx
+    serves /media/ without authentication). No URL; export_job_download
+    streams the file after its permission check. The directory is read on
+    each access so tests can override the setting.
+    """
+
+    @property
+    def base_location(self):
+        return settings.EXPORT_JOB_DIR
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    @property
+    def base_url(self):
+        return None
+
+
+export_job_storage = ExportJobStorage()
@@ -18,7 +18,9 @@ from .known_issues import effective_cap
 # Measured 2026-08-16 (after N+1 fixes in views/forms). Raise only with
 # justification documented in product/refinement/performance-testing-backlog.md.
 BUDGETS = {
-    'Dashboard': 17,
+    # 17 → 11: metric totals, species counts and top-5 lists now come from
+    # services.metric_stats (two queries for any number of metric types).
+    'Dashboard': 11,
     'Weekly Planner': 9,
     'Monthly Planner': 9,
     'Daily Agenda': 5,
@@ -26,11 +28,25 @@ BUDGETS = {
     'Section Detail': 14,
     'Visit Log List': 6,
     'Visit Log Create (GET)': 8,
-    'Visit Log Create (POST)': 9,
+    # 9 → 13: MetricRollup bucket refresh after the metric formset save
+    # (one aggregate + delete/insert inside a savepoint).
+    # 13 → 14: post_save reads and upserts the visit log's search document
+    # (measured 12 → 14).
+    'Visit Log Create (POST)': 14,
+    # A photo upload adds its INSERT only (measured 15 for 64 px and 4000 px
+    # alike): decoding and derivatives run in the process_photos worker.
+    # Content dedup (services.photo_blobs) adds the blob's UPDATE, or for new
+    # content UPDATE + SAVEPOINT/INSERT/RELEASE: measured 19.
+    'Visit Log Create (POST, photo)': 20,
     'Task Create': 9,
     'Task Templates': 5,
     'Task Types': 5,
-    'Data Export': 45,
+    # 45 → 12: section sheets stream logs, metrics and tasks as one query each
+    # instead of two per section (services.excel_export; measured 10).
+    'Data Export': 12,
+    # One locking read plus one CASE bulk_update for any number of sections
+    # (was one UPDATE per section; measured 6 with 61 sections).
+    'Section Reorder': 7,
 }
 
 
@@ -9,10 +9,16 @@ update BUDGETS and document why in
 product/refinement/performance-testing-backlog.md.
 """
 
+import json
+import shutil
+import tempfile
+
+from django.test import override_settings
 from django.urls import reverse
 
-from core.models import Section
+from core.models import Photo, Section
 
+from ..test_photo_derivatives import jpeg_upload
 from .base import PerformanceTestCase
 
 
@@ -57,9 +63,8 @@ class BudgetTests(PerformanceTestCase):
     def test_visit_log_create_get_budget(self):
         self._assert_get('Visit Log Create (GET)', reverse('visit_log_create'))
 
-    def test_visit_log_create_post_budget(self):
-        url = reverse('visit_log_create')
-        post_data = {
+    def _visit_log_post_data(self, **extra):
+        return {
             'date': '2026-08-16',
             'section': self.section.pk,
             'notes': 'budget test',
@@ -78,9 +83,13 @@ class BudgetTests(PerformanceTestCase):
             'photos-INITIAL_FORMS': '0',
             'photos-MIN_NUM_FORMS': '0',
             'photos-MAX_NUM_FORMS': '1000',
+            **extra,
         }
+
+    def test_visit_log_create_post_budget(self):
+        url = reverse('visit_log_create')
         with self.count_queries() as counter:
-            response = self.perf_client.post(url, post_data)
+            response = self.perf_client.post(url, self._visit_log_post_data())
             self.assertIn(
                 response.status_code,
                 [200, 302],
@@ -88,6 +97,25 @@ class BudgetTests(PerformanceTestCase):
             )
         self.assert_endpoint_budget(counter['count'], 'Visit Log Create (POST)')
 
+    def test_visit_log_create_post_with_photo_budget(self):
+        """Same budget for a thumbnail-sized and a phone-sized upload: processing is queued."""
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        counts = []
+        with override_settings(MEDIA_ROOT=media):
+            for size in [(64, 64), (4000, 3000)]:
+                data = self._visit_log_post_data(**{
+                    'photos-0-file': jpeg_upload(size=size),
+                    'photos-0-description': f'Budget photo {size[0]}px',
+                })
+                with self.count_queries() as counter:
+                    response = self.perf_client.post(reverse('visit_log_create'), data)
+                    self.assertEqual(response.status_code, 302, f"Visit Log Create (POST, photo) returned {response.status_code}")
+                self.assert_endpoint_budget(counter['count'], 'Visit Log Create (POST, photo)')
+                counts.append(counter['count'])
+        self.assertEqual(counts[0], counts[1])
+        self.assertFalse(Photo.objects.exclude(processing_status=Photo.STATUS_PENDING).exists())
+
     def test_task_create_budget(self):
         self._assert_get('Task Create', reverse('task_create'))
 
@@ -99,3 +127,14 @@ class BudgetTests(PerformanceTestCase):
 
     def test_data_export_budget(self):
         self._assert_get('Data Export', reverse('data_export'))
+
+    def test_section_reorder_budget(self):
+        Section.objects.bulk_create([Section(name=f'Reorder Section {i}', position=i + 1) for i in range(60)])
+        order = list(Section.objects.order_by('-position', '-id').values_list('id', flat=True))
+        with self.count_queries() as counter:
+            response = self.perf_client.post(
+                reverse('section_reorder'), json.dumps({'order': order}), content_type='application/json',
+            )
+            self.assertEqual(response.status_code, 200, f"Section Reorder returned {response.status_code}")
+        self.assertEqual(list(Section.objects.order_by('position').values_list('id', flat=True)), order)
+        self.assert_endpoint_budget(counter['count'], 'Section Reorder')
@@ -0,0 +1,64 @@
+"""
+Memory scaling for the streaming Excel export.
+
+DataExportView builds a write-only workbook (services.excel_export), so its
+peak Python heap should stay roughly flat as history grows. These tests
+shrink EXPORT_CHUNK_SIZE so a few thousand rows already span many chunks,
+then compare peak traced allocations at two sizes.
+
+For a full-size run on real hardware:
+    python manage.py benchmark_export --logs 50000
+"""
+
+import tracemalloc
+from datetime import date, timedelta
+from unittest import mock
+
+from django.urls import reverse
+
+from core.models import Metric, Section, VisitLog
+
+from .base import PerformanceTestCase
+
+
+class DataExportMemoryTests(PerformanceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.section = Section.objects.create(name='Export Memory Section', position=0)
+
+    def _seed(self, count):
+        start = date(2020, 1, 1)
+        visits = VisitLog.objects.bulk_create([
+            VisitLog(section=self.section, date=start + timedelta(days=i % 2000),
+                     notes=f'Memory benchmark visit {i} ' + 'x' * 80)
+            for i in range(count)
+        ])
+        Metric.objects.bulk_create([
+            Metric(visit=v, metric_type='litter_general', value=2) for v in visits
+        ])
+
+    def _peak_bytes(self):
+        tracemalloc.start()
+        try:
+            response = self.perf_client.get(reverse('data_export'))
+            for _ in response.streaming_content:
+                pass
+            response.close()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    @mock.patch('core.services.excel_export.EXPORT_CHUNK_SIZE', 100)
+    def test_peak_memory_stays_flat(self):
+        self._seed(600)
+        self._peak_bytes()  # warm imports, templates and caches
+        small = self._peak_bytes()
+
+        self._seed(3000)  # 6x the rows
+        large = self._peak_bytes()
+
+        self.assertLess(
+            large, small * 1.5,
+            f'Peak export memory grew from {small / 1e6:.1f} MB to {large / 1e6:.1f} MB for 6x the rows; '
+            'something is materialising the whole dataset.',
+        )
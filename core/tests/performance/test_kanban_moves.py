@@ -0,0 +1,43 @@
+"""
+Rolling Kanban moves must cost the same on a 1,000-card board as on a small one.
+
+move_todo_task drops a card between its neighbours' sparse positions, so a
+move reads two neighbours and writes one row regardless of column size.
+"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Task
+from core.services.task_services import TODO_GAP, move_todo_task, rolling_column
+
+from .base import PerformanceTestCase
+
+
+class KanbanMoveCostTests(PerformanceTestCase):
+    def seed(self, count):
+        Task.objects.bulk_create([
+            Task(instructions=f'Card {i}', is_rolling=True, todo_status=('todo', 'doing', 'done')[i % 3],
+                 todo_position=(i // 3 + 1) * TODO_GAP)
+            for i in range(count)
+        ], batch_size=500)
+
+    def measure_move(self, status, index):
+        task = rolling_column('done').last()
+        with CaptureQueriesContext(connection) as ctx:
+            move_todo_task(task.id, status, index)
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+        return len(ctx.captured_queries), updates
+
+    def test_move_cost_is_flat_from_ten_to_a_thousand_tasks(self):
+        self.seed(10)
+        small_queries, small_updates = self.measure_move('todo', 2)
+        Task.objects.filter(is_rolling=True).delete()
+
+        self.seed(1000)
+        large_queries, large_updates = self.measure_move('todo', 200)
+
+        self.assert_no_query_growth('Kanban move', small_queries, large_queries)
+        self.assertEqual(len(small_updates), 1)
+        self.assertEqual(len(large_updates), 1)
+        self.assertNotIn('CASE', large_updates[0])
@@ -11,12 +11,13 @@ If a test fails, the view has an N+1 query. Fix the view's get_queryset()
 """
 
 import calendar
+import time
 from datetime import date, timedelta
 
 from django.urls import reverse
 from django.utils import timezone
 
-from core.models import Section, Task, TaskTemplate, TaskType, VisitLog
+from core.models import Metric, Section, Task, TaskTemplate, TaskType, VisitLog
 
 from .base import PerformanceTestCase
 
@@ -65,6 +66,25 @@ class NPlusOneGrowthTests(PerformanceTestCase):
         after = self._get_count(url)
         self.assert_no_query_growth('Weekly Planner', before, after)
 
+    def _completed_with_log(self, day, instructions):
+        task = Task.objects.create(
+            date=day, section=self.section, assignee_type='team',
+            instructions=instructions, template=self.template, is_completed=True,
+        )
+        VisitLog.objects.create(task=task, section=self.section, date=day, notes=f'{instructions} log')
+        return task
+
+    def test_weekly_planner_completed_tasks_no_n1_growth(self):
+        url = reverse('weekly_planner')
+        self._completed_with_log(self.monday, 'baseline completed')
+        before = self._get_count(url)
+
+        for i in range(20):
+            self._completed_with_log(self.monday + timedelta(days=i % 7), f'growth completed {i}')
+
+        after = self._get_count(url)
+        self.assert_no_query_growth('Weekly Planner', before, after)
+
     def test_monthly_planner_no_n1_growth(self):
         url = reverse('monthly_planner')
         Task.objects.bulk_create([
@@ -110,6 +130,17 @@ class NPlusOneGrowthTests(PerformanceTestCase):
         after = self._get_count(url)
         self.assert_no_query_growth('Daily Agenda', before, after)
 
+    def test_section_detail_completed_tasks_no_n1_growth(self):
+        url = reverse('section_detail', args=[self.section.pk])
+        self._completed_with_log(self.today, 'baseline completed')
+        before = self._get_count(url)
+
+        for i in range(20):
+            self._completed_with_log(self.today, f'growth completed {i}')
+
+        after = self._get_count(url)
+        self.assert_no_query_growth('Section Detail', before, after)
+
     def test_section_list_no_n1_growth(self):
         url = reverse('section_list')
         before = self._get_count(url)
@@ -153,3 +184,100 @@ class NPlusOneGrowthTests(PerformanceTestCase):
 
         after = self._get_count(url)
         self.assert_no_query_growth('Dashboard', before, after)
+
+    def test_data_export_no_n1_growth_with_sections(self):
+        url = reverse('data_export')
+        VisitLog.objects.bulk_create([VisitLog(section=self.section, date=self.today, notes='Baseline export')])
+        Task.objects.bulk_create([self._task(self.today, 'baseline export')])
+        before = self._get_count(url)
+
+        sections = Section.objects.bulk_create([
+            Section(name=f'Export Growth Section {i}', position=i + 1) for i in range(10)
+        ])
+        visits = VisitLog.objects.bulk_create([
+            VisitLog(section=section, date=self.today - timedelta(days=d), notes=f'Export growth {d}')
+            for section in sections for d in range(3)
+        ])
+        Metric.objects.bulk_create([Metric(visit=v, metric_type='plant', value=1, label='Spekboom') for v in visits])
+        Task.objects.bulk_create([
+            Task(date=self.today, section=section, assignee_type='team', instructions='growth', template=self.template)
+            for section in sections
+        ])
+
+        after = self._get_count(url)
+        self.assert_no_query_growth('Data Export', before, after)
+
+    def test_planner_export_no_n1_growth_with_sections(self):
+        url = reverse('planner_export') + f'?week={self.monday.isoformat()}'
+        Task.objects.bulk_create([self._task(self.monday, 'baseline planner export')])
+        before = self._get_count(url)
+
+        sections = Section.objects.bulk_create([
+            Section(name=f'Planner Export Section {i}', position=i + 1) for i in range(10)
+        ])
+        Task.objects.bulk_create([
+            Task(date=self.monday + timedelta(days=d), section=section, assignee_type='team',
+                 instructions='growth', template=self.template)
+            for section in sections for d in range(3)
+        ])
+
+        after = self._get_count(url)
+        self.assert_no_query_growth('Planner Export', before, after)
+
+
+class WeeklyPlannerRenderScalingTests(PerformanceTestCase):
+    """Weekly planner render time must grow roughly linearly with task count.
+
+    Companion to the query-count guard above: the grid is bucketed once in the
+    view, so each task is rendered once rather than scanned once per cell.
+    Timings are best-of-N to damp noise, and the bound is deliberately loose
+    (2x the linear expectation) so only a super-linear regression trips it.
+    """
+
+    SMALL = 100
+    LARGE = 800
+    RUNS = 3
+
+    def setUp(self):
+        super().setUp()
+        today = timezone.now().date()
+        self.monday = today - timedelta(days=today.weekday())
+        self.section = Section.objects.create(name='Scaling Section', position=0)
+        self.url = reverse('weekly_planner')
+
+    def _seed(self, count):
+        assignees = ['team', 'manager', 'chairperson']
+        Task.objects.bulk_create([
+            Task(
+                date=self.monday + timedelta(days=i % 7),
+                section=self.section,
+                assignee_type=assignees[i % 3],
+                instructions=f'Scaling task {i}',
+            )
+            for i in range(count)
+        ])
+
+    def _render_time(self):
+        best = None
+        for _ in range(self.RUNS):
+            started = time.perf_counter()
+            response = self.perf_client.get(self.url)
+            elapsed = time.perf_counter() - started
+            self.assertEqual(response.status_code, 200)
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def test_render_time_grows_linearly(self):
+        self._seed(self.SMALL)
+        small = self._render_time()
+        self._seed(self.LARGE - self.SMALL)
+        large = self._render_time()
+
+        linear = small * (self.LARGE / self.SMALL)
+        self.assertLessEqual(
+            large,
+            linear * 2,
+            f"\nWeekly Planner: {self.LARGE} tasks rendered in {large:.3f}s vs {small:.3f}s "
+            f"for {self.SMALL} (linear expectation {linear:.3f}s). The template is "
+            f"probably rescanning the task list per cell again — use planner_rows."
+        )
@@ -63,6 +63,31 @@ class ChairpersonRoleTests(TestCase):
         self.assertEqual(len(response.context['chairperson_task_templates']), 1)
         self.assertEqual(response.context['chairperson_task_templates'][0].name, 'Chairperson Task')
 
+    def test_weekly_planner_grid_places_tasks_by_day_and_assignee(self):
+        """planner_rows buckets each task into exactly one (day, assignee) cell."""
+        today = timezone.now().date()
+        monday = today - timedelta(days=today.weekday())
+        chair = Task.objects.create(date=monday + timedelta(days=2), assignee_type='chairperson',
+                                    section=self.section, instructions='Chair Wednesday')
+        team = Task.objects.create(date=monday, assignee_type='team',
+                                   section=self.section, instructions='Team Monday')
+
+        response = self.client.get('/core/planner/weekly/')
+        rows = response.context['planner_rows']
+
+        self.assertEqual([day for day, _ in rows['team']], response.context['week_days'])
+        placed = {
+            (day, assignee): [t.pk for t in day_tasks]
+            for assignee, cells in rows.items()
+            for day, day_tasks in cells
+            if day_tasks
+        }
+        self.assertEqual(placed, {
+            (monday, 'team'): [team.pk],
+            (monday + timedelta(days=2), 'chairperson'): [chair.pk],
+        })
+        self.assertContains(response, 'Chair Wednesday', count=1)
+
     def test_monthly_planner_chairperson_context(self):
         """Verify that MonthlyPlannerView includes chairperson templates in context."""
         TaskTemplate.objects.create(
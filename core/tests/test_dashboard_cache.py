@@ -0,0 +1,129 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Section, VisitLog, Metric
+from core.services import dashboard_cache
+from core.services.dashboard_cache import (
+    bump_data_version, cached_block, cached_blocks, dashboard_cache_stats, data_version, reset_dashboard_cache_stats,
+)
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'dashboard-cache-tests'}}
+# The production default (CACHE_URL=dbcache://river_cache).
+DBCACHE = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'river_cache'}}
+
+
+@override_settings(CACHES=LOCMEM, DASHBOARD_CACHE_STATS_SAMPLE=1.0)
+class CachedBlockTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_second_lookup_is_a_hit(self):
+        calls = []
+        build = lambda: calls.append(1) or {'value': len(calls)}
+        self.assertEqual(cached_block('demo', build), {'value': 1})
+        self.assertEqual(cached_block('demo', build), {'value': 1})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(dashboard_cache_stats(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_bump_invalidates(self):
+        version = data_version()
+        cached_block('demo', lambda: 'old')
+        bump_data_version()
+        self.assertGreater(data_version(), version)
+        self.assertEqual(cached_block('demo', lambda: 'new'), 'new')
+
+    def test_bump_without_version_seeds_one(self):
+        bump_data_version()
+        self.assertIsNotNone(cache.get('river:data_version'))
+
+    def test_blocks_share_one_version_read_and_one_fetch(self):
+        cached_blocks({'a': lambda: 1, 'b': lambda: 2})
+        with mock.patch.object(dashboard_cache, 'data_version', wraps=data_version) as version, \
+                mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many:
+            self.assertEqual(cached_blocks({'a': lambda: 0, 'b': lambda: 0, 'c': lambda: 3}),
+                             {'a': 1, 'b': 2, 'c': 3})
+        self.assertEqual(version.call_count, 1)
+        self.assertEqual(get_many.call_count, 1)
+        self.assertEqual(dashboard_cache_stats(), {'hits': 2, 'misses': 3, 'hit_rate': 0.4})
+
+    def test_unsampled_lookups_write_no_counters(self):
+        with override_settings(DASHBOARD_CACHE_STATS_SAMPLE=0.0):
+            cached_block('demo', lambda: 1)
+            cached_block('demo', lambda: 1)
+        self.assertIsNone(cache.get('river:dashboard:hits'))
+        self.assertIsNone(cache.get('river:dashboard:misses'))
+
+    def test_reset_stats(self):
+        cached_block('demo', lambda: 1)
+        reset_dashboard_cache_stats()
+        self.assertEqual(dashboard_cache_stats()['misses'], 0)
+
+    def test_stats_command(self):
+        cached_block('demo', lambda: 1)
+        cached_block('demo', lambda: 1)
+        out = StringIO()
+        call_command('dashboard_cache_stats', '--reset', stdout=out)
+        self.assertIn('50.0%', out.getvalue())
+        self.assertEqual(dashboard_cache_stats()['hits'], 0)
+
+
+@override_settings(CACHES=DBCACHE)
+class SharedCacheTests(TestCase):
+    def setUp(self):
+        call_command('createcachetable', verbosity=0)
+
+    def test_bump_in_one_worker_is_seen_by_another(self):
+        # Each gunicorn worker has its own cache instance; only the backend is shared.
+        other_worker = caches.create_connection('default')
+        cached_block('demo', lambda: 'old')
+
+        with mock.patch.object(dashboard_cache, 'cache', other_worker):
+            self.assertEqual(cached_block('demo', lambda: 'other'), 'old')
+            bump_data_version()
+
+        self.assertEqual(cached_block('demo', lambda: 'new'), 'new')
+
+
+@override_settings(CACHES=LOCMEM, DASHBOARD_CACHE_STATS_SAMPLE=1.0)
+class DashboardCacheInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_superuser(username='cachedash', password='pw', email='c@example.com')
+        self.client = Client()
+        self.client.login(username='cachedash', password='pw')
+        self.section = Section.objects.create(name='Cache Section', position=0)
+
+    def test_repeat_visit_hits_cache(self):
+        self.client.get(reverse('dashboard'))
+        reset_dashboard_cache_stats()
+        with self.assertNumQueries(3):  # session, user, recent visits
+            self.client.get(reverse('dashboard'))
+        self.assertEqual(dashboard_cache_stats()['misses'], 0)
+
+    def test_new_metric_invalidates_totals(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_plants'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            visit = VisitLog.objects.create(section=self.section, date=timezone.now().date())
+            Metric.objects.create(visit=visit, metric_type='plant', label='Restio', value=9)
+
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_plants'], 9)
+        self.assertEqual(response.context['active_sections'][0], self.section)
+
+    def test_section_stage_change_invalidates_distribution(self):
+        self.client.get(reverse('dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.section.current_stage = 'planting'
+            self.section.save()
+        response = self.client.get(reverse('dashboard'))
+        planting = next(s for s in response.context['stage_distribution'] if s['code'] == 'planting')
+        self.assertEqual(planting['count'], Section.objects.filter(current_stage='planting').count())
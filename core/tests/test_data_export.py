@@ -0,0 +1,121 @@
+import io
+from datetime import date
+
+import openpyxl
+from django.contrib.auth.models import User
+from django.http import FileResponse
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from core.models import Metric, Section, Task, TaskTemplate, VisitLog
+from core.services.excel_export import HEADER, WRAP, MergeStream, sheet_title
+
+
+class DataExportTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(username='export', password='pw')
+        self.client = Client()
+        self.client.login(username='export', password='pw')
+        self.section = Section.objects.create(name='Export: Reach [A]', position=0)
+        template = TaskTemplate.objects.create(name='Export Template', assignee_type='team', default_instructions='x')
+        visit = VisitLog.objects.create(section=self.section, date=date(2026, 3, 2), notes='Export visit')
+        Metric.objects.create(visit=visit, metric_type='plant', value=4, label='Milkwood')
+        Metric.objects.create(visit=visit, metric_type='litter_general', value=2)
+        Task.objects.create(section=self.section, template=template, date=date(2026, 3, 3),
+                            instructions='Export task', assignee_type='manager', is_completed=True)
+
+    def download(self):
+        response = self.client.get(reverse('data_export'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, FileResponse)
+        self.assertIn('attachment; filename="Liesbeek_River_Report_', response['Content-Disposition'])
+        return openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_section_sheet_contents(self):
+        wb = self.download()
+        self.assertEqual(wb.sheetnames[0], 'Project Overview')
+        ws = wb[sheet_title(self.section.name)]
+        rows = [[c.value for c in row] for row in ws.iter_rows()]
+
+        log_row = rows[[r[:4] for r in rows].index(['Date', 'Notes', 'Metrics Summary', 'Photos Count']) + 1]
+        self.assertEqual(log_row[1:4], ['Export visit', 'Litter (General): 2 (); Plant: 4 (Milkwood)', 0])
+        task_headers = ['Date', 'Assignee', 'Task Type', 'Task Template', 'Instructions', 'Completed?']
+        task_row = rows[[r[:6] for r in rows].index(task_headers) + 1]
+        self.assertEqual(task_row[1:6], ['Manager', 'Custom', 'Export Template', 'Export task', 'Yes'])
+
+    def test_named_styles_are_applied(self):
+        wb = self.download()
+        ws = wb[sheet_title(self.section.name)]
+        header = next(row for row in ws.iter_rows() if row[0].value == 'Date')
+        self.assertEqual(header[0].style, HEADER)
+        notes = ws.cell(row=header[0].row + 1, column=2)
+        self.assertEqual(notes.style, WRAP)
+
+    def test_sheet_titles_are_valid_and_unique(self):
+        taken = set()
+        self.assertEqual(sheet_title('A/B: C?', taken), 'A-B- C-')
+        self.assertEqual(sheet_title('a/b: c?', taken), 'a-b- c- (2)')
+        self.assertEqual(len(sheet_title('x' * 40, taken)), 30)
+
+    def test_rows_land_on_their_own_section_sheet(self):
+        upstream = Section.objects.create(name='Export Upstream', position=0)
+        empty = Section.objects.create(name='Export Empty', position=0)
+        downstream = Section.objects.create(name='Export Downstream', position=99)
+        for section, day in ((downstream, 5), (upstream, 6), (upstream, 4), (downstream, 7)):
+            visit = VisitLog.objects.create(section=section, date=date(2026, 3, day), notes=f'{section.name} {day}')
+            Metric.objects.create(visit=visit, metric_type='weed', value=day, label=section.name)
+        VisitLog.objects.create(section=None, date=date(2026, 3, 8), notes='General log')
+
+        wb = self.download()
+
+        def logs(section):
+            rows = [[c.value for c in row][:3] for row in wb[sheet_title(section.name)].iter_rows()]
+            start = rows.index(['Date', 'Notes', 'Metrics Summary']) + 1
+            return [r[1:] for r in rows[start:rows.index([None, None, None], start)]]
+
+        self.assertEqual(logs(upstream), [
+            ['Export Upstream 6', 'Weeding / Removal: 6 (Export Upstream)'],
+            ['Export Upstream 4', 'Weeding / Removal: 4 (Export Upstream)'],
+        ])
+        self.assertEqual(logs(downstream), [
+            ['Export Downstream 7', 'Weeding / Removal: 7 (Export Downstream)'],
+            ['Export Downstream 5', 'Weeding / Removal: 5 (Export Downstream)'],
+        ])
+        self.assertEqual(logs(empty), [])
+
+    def test_merge_stream_skips_rows_that_do_not_line_up(self):
+        stream = MergeStream(iter([(0, 'a'), (1, 'stale'), (2, 'b'), (2, 'c'), (4, 'd')]), key=lambda r: r[0])
+        self.assertEqual([r[1] for r in stream.take(0)], ['a'])
+        self.assertEqual(list(stream.take(2)), [(2, 'b'), (2, 'c')])
+        self.assertEqual(list(stream.take(3)), [])
+        self.assertEqual(list(stream.take(4)), [(4, 'd')])
+        self.assertEqual(list(stream.take(5)), [])
+
+
+class PlannerExportTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(username='planner', password='pw')
+        self.client = Client()
+        self.client.login(username='planner', password='pw')
+
+    def test_by_section_sheet_groups_tasks_in_section_order(self):
+        upper = Section.objects.create(name='Upper', position=1)
+        lower = Section.objects.create(name='Lower', position=2)
+        Task.objects.create(section=lower, date=date(2026, 3, 2), instructions='Lower Monday')
+        Task.objects.create(section=upper, date=date(2026, 3, 3), instructions='Upper Tuesday')
+        Task.objects.create(section=lower, date=date(2026, 3, 4), instructions='Lower Wednesday')
+        Task.objects.create(section=None, date=date(2026, 3, 4), instructions='No section')
+        Task.objects.create(section=upper, date=date(2026, 3, 10), instructions='Next week')
+
+        response = self.client.get(reverse('planner_export'), {'week': '2026-03-04'})
+        wb = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+
+        overview = [row for row in wb['Planner Export'].values]
+        self.assertEqual(overview[2][0], 'Tasks: 4')
+        rows = [row for row in wb['By Section'].values if any(row)]
+        self.assertEqual(
+            [(row[0], row[1]) for row in rows if row[1] and str(row[1]).endswith('tasks')],
+            [('Upper', '1 tasks'), ('Lower', '2 tasks')],
+        )
+        instructions = [row[4] for row in rows if isinstance(row[4], str) and row[4] != 'Instructions']
+        self.assertEqual(instructions, ['Upper Tuesday', 'Lower Monday', 'Lower Wednesday'])
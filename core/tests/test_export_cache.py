@@ -0,0 +1,155 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import date
+from unittest import mock
+
+import openpyxl
+from django.contrib.auth.models import User
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from core.models import Metric, Section, Task, TaskTemplate, VisitLog
+from core.services import export_cache
+from core.services.excel_export import build_planner_workbook, build_visit_log_workbook
+
+
+def download_rows(response):
+    wb = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+    return list(wb.active.values)
+
+
+class ExportCacheTestCase(TestCase):
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        cached = override_settings(EXPORT_CACHE_DIR=cache_dir, EXPORT_CACHE_MAX_BYTES=10 * 1024 * 1024)
+        cached.enable()
+        self.addCleanup(cached.disable)
+        self.cache_dir = cache_dir
+
+        User.objects.create_user(username='cache', password='pw')
+        self.client = Client()
+        self.client.login(username='cache', password='pw')
+        self.section = Section.objects.create(name='Cache Section', position=0)
+        self.visit = VisitLog.objects.create(section=self.section, date=date(2026, 3, 2), notes='cached visit')
+        Metric.objects.create(visit=self.visit, metric_type='litter_general', value=2)
+
+    def cached_files(self):
+        return sorted(
+            os.path.join(root, name) for root, _, names in os.walk(self.cache_dir) for name in names
+        )
+
+    def export(self, **headers):
+        return self.client.get(reverse('visit_log_export'), {'q': 'cached', 'section': ''}, **headers)
+
+
+class VisitLogExportCacheTests(ExportCacheTestCase):
+    def test_repeat_download_is_served_from_disk(self):
+        with mock.patch('core.views.build_visit_log_workbook', wraps=build_visit_log_workbook) as builder:
+            first = self.export()
+            first_rows = download_rows(first)
+            second = self.export()
+            second_rows = download_rows(second)
+
+        self.assertEqual(builder.call_count, 1)
+        self.assertEqual(first_rows, second_rows)
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertIn('private', second['Cache-Control'])
+        self.assertIn('attachment; filename="visit_logs_', second['Content-Disposition'])
+        self.assertEqual(len(self.cached_files()), 1)
+
+    def test_parameter_order_and_empty_values_share_an_entry(self):
+        first = self.export()
+        b''.join(first.streaming_content)
+        second = self.client.get(reverse('visit_log_export') + '?sort=&q=cached')
+        self.assertEqual(first['ETag'], second['ETag'])
+        b''.join(second.streaming_content)
+
+    def test_matching_etag_gets_304(self):
+        etag = self.export()['ETag']
+        with mock.patch('core.views.build_visit_log_workbook') as builder:
+            response = self.export(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        builder.assert_not_called()
+
+    def test_data_changes_miss_the_cache(self):
+        etags = {self.export()['ETag']}
+
+        self.visit.notes = 'cached visit, edited'
+        self.visit.save()
+        response = self.export()
+        etags.add(response['ETag'])
+        self.assertEqual(download_rows(response)[1][-1], 'cached visit, edited')
+
+        Metric.objects.create(visit=self.visit, metric_type='litter_recyclable', value=1)
+        etags.add(self.export()['ETag'])
+
+        template = TaskTemplate.objects.first()
+        template.name = f'{template.name} renamed'
+        template.save()
+        etags.add(self.export()['ETag'])
+
+        Metric.objects.filter(visit=self.visit, metric_type='litter_recyclable').delete()
+        etags.add(self.export()['ETag'])
+
+        self.assertEqual(len(etags), 5)
+
+    def test_cache_disabled_builds_every_time(self):
+        with override_settings(EXPORT_CACHE_MAX_BYTES=0), \
+                mock.patch('core.views.build_visit_log_workbook', wraps=build_visit_log_workbook) as builder:
+            self.assertNotIn('ETag', self.export())
+            self.export()
+        self.assertEqual(builder.call_count, 2)
+        self.assertEqual(self.cached_files(), [])
+
+
+class PlannerExportCacheTests(ExportCacheTestCase):
+    def test_planner_week_is_cached_until_a_task_changes(self):
+        task = Task.objects.create(date=date(2026, 3, 4), section=self.section, instructions='Plan it')
+        url = reverse('planner_export')
+        with mock.patch('core.views.build_planner_workbook', wraps=build_planner_workbook) as builder:
+            first = self.client.get(url, {'week': '2026-03-04'})
+            second = self.client.get(url, {'week': '2026-03-04'})
+            self.assertEqual(builder.call_count, 1)
+            self.assertEqual(first['ETag'], second['ETag'])
+
+            task.instructions = 'Plan it again'
+            task.save()
+            third = self.client.get(url, {'week': '2026-03-04'})
+            self.assertEqual(builder.call_count, 2)
+        self.assertNotEqual(third['ETag'], first['ETag'])
+        self.assertIn('Plan it again', [row[6] for row in download_rows(third)])
+
+
+class ExportCacheEvictionTests(ExportCacheTestCase):
+    def store(self, key, mtime):
+        wb = openpyxl.Workbook()
+        wb.active.append([key])
+        path = export_cache.store(key, wb, f'{key}.xlsx')
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_least_recently_used_files_go_first(self):
+        now = time.time()
+        oldest = self.store('a' * 64, now - 300)
+        touched = self.store('b' * 64, now - 200)
+        newest = self.store('c' * 64, now - 100)
+        handle, _ = export_cache.open_cached('b' * 64)  # a hit refreshes its LRU position
+        handle.close()
+
+        size = os.path.getsize(newest)
+        self.assertEqual(export_cache.evict(max_bytes=2 * size + size // 2), 1)
+        self.assertFalse(os.path.exists(oldest))
+        self.assertFalse(os.path.exists(os.path.dirname(oldest)))
+        self.assertTrue(os.path.exists(touched))
+        self.assertTrue(os.path.exists(newest))
+
+    def test_store_keeps_the_file_it_just_wrote(self):
+        self.store('a' * 64, time.time() - 100)
+        with override_settings(EXPORT_CACHE_MAX_BYTES=1):
+            path = self.store('b' * 64, time.time())
+        self.assertEqual(self.cached_files(), [str(path)])
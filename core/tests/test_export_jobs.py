@@ -0,0 +1,139 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
+
+import openpyxl
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import ExportJob, Section, VisitLog
+from core.services import export_jobs
+from core.services.export_jobs import (
+    cancel_job, claim_next_job, enqueue_export, purge_finished_jobs, requeue_stale_jobs, run_job,
+)
+
+
+class ExportJobTestCase(TestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        dirs = override_settings(MEDIA_ROOT=f'{tmp}/media', EXPORT_JOB_DIR=f'{tmp}/jobs')
+        dirs.enable()
+        self.addCleanup(dirs.disable)
+        self.media_root, self.job_dir = f'{tmp}/media', f'{tmp}/jobs'
+
+        self.user = User.objects.create_user(username='exporter', password='pw')
+        self.client = Client()
+        self.client.login(username='exporter', password='pw')
+        section = Section.objects.create(name='Job Section', position=0)
+        VisitLog.objects.create(section=section, date=date(2026, 3, 2), notes='job needle')
+        VisitLog.objects.create(section=section, date=date(2026, 3, 3), notes='other log')
+
+    def run_worker(self):
+        call_command('run_export_worker', '--once', stdout=io.StringIO())
+
+
+class ExportJobFlowTests(ExportJobTestCase):
+    def test_queue_poll_and_download(self):
+        response = self.client.post(reverse('export_job_create'), {'kind': 'visit_logs', 'params': 'q=needle'})
+        self.assertEqual(response.status_code, 202)
+        payload = response.json()
+        self.assertEqual(payload['status'], 'queued')
+        self.assertIsNone(payload['download_url'])
+
+        self.run_worker()
+
+        status = self.client.get(payload['status_url']).json()
+        self.assertEqual(status['status'], 'done')
+        job = ExportJob.objects.get(pk=payload['id'])
+        self.assertTrue(job.artifact.name.startswith(f'{job.pk}/visit_logs_'))
+        self.assertTrue(os.path.exists(os.path.join(self.job_dir, job.artifact.name)))
+        self.assertFalse(os.path.exists(self.media_root))  # never under /media/
+
+        download = self.client.get(status['download_url'])
+        self.assertIn(f'filename="{job.filename}"', download['Content-Disposition'])
+        rows = list(openpyxl.load_workbook(io.BytesIO(b''.join(download.streaming_content))).active.values)
+        self.assertEqual([row[-1] for row in rows[1:]], ['job needle'])
+
+    def test_unknown_kind_is_rejected(self):
+        response = self.client.post(reverse('export_job_create'), {'kind': 'nope'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ExportJob.objects.exists())
+
+    def test_jobs_are_private_to_their_requester(self):
+        job = enqueue_export('data', {}, User.objects.create_user(username='someone', password='pw'))
+        self.assertEqual(self.client.get(reverse('export_job_status', args=[job.pk])).status_code, 404)
+
+        User.objects.create_user(username='boss', password='pw', is_staff=True)
+        self.client.login(username='boss', password='pw')
+        self.assertEqual(self.client.get(reverse('export_job_status', args=[job.pk])).status_code, 200)
+
+    def test_cancelled_jobs_are_dropped(self):
+        queued = self.client.post(reverse('export_job_create'), {'kind': 'data', 'params': ''}).json()
+        response = self.client.post(queued['cancel_url'])
+        self.assertEqual(response.json(), {'cancelled': True})
+        self.assertFalse(ExportJob.objects.exists())
+
+        enqueue_export('data', {}, self.user)
+        job = claim_next_job()
+        self.assertTrue(cancel_job(job))
+        run_job(job)  # the worker finishes after the browser gave up
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (ExportJob.STATUS_FAILED, 'Cancelled by the requester.'))
+        self.assertFalse(job.artifact)
+        self.assertEqual(os.listdir(self.job_dir), [str(job.pk)])
+        self.assertEqual(os.listdir(os.path.join(self.job_dir, str(job.pk))), [])
+
+    def test_download_waits_for_the_worker(self):
+        job = enqueue_export('planner', {}, self.user)
+        self.assertEqual(self.client.get(reverse('export_job_download', args=[job.pk])).status_code, 404)
+
+
+class ExportWorkerTests(ExportJobTestCase):
+    def test_claims_oldest_job_once(self):
+        first = enqueue_export('data', {}, self.user)
+        second = enqueue_export('planner', {}, self.user)
+
+        self.assertEqual(claim_next_job().pk, first.pk)
+        self.assertEqual(claim_next_job().pk, second.pk)
+        self.assertIsNone(claim_next_job())
+        self.assertEqual(ExportJob.objects.filter(status='running').count(), 2)
+
+    def test_failing_builder_fails_only_its_job(self):
+        broken = enqueue_export('planner', {}, self.user)
+        healthy = enqueue_export('data', {}, self.user)
+        builders = dict(export_jobs.EXPORT_BUILDERS, planner=mock.Mock(side_effect=RuntimeError('boom')))
+
+        with mock.patch.object(export_jobs, 'EXPORT_BUILDERS', builders), self.assertLogs('core.services.export_jobs'):
+            self.run_worker()
+
+        broken.refresh_from_db()
+        healthy.refresh_from_db()
+        self.assertEqual((broken.status, broken.error), ('failed', 'RuntimeError: boom'))
+        self.assertEqual(healthy.status, 'done')
+
+    def test_stale_jobs_are_requeued(self):
+        job = enqueue_export('data', {}, self.user)
+        claim_next_job()
+        ExportJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(claim_next_job().pk, job.pk)
+
+    def test_purge_removes_old_artifacts(self):
+        enqueue_export('data', {}, self.user)
+        job = run_job(claim_next_job())
+        path = os.path.join(self.job_dir, job.artifact.name)
+        self.assertTrue(os.path.exists(path))
+
+        self.assertEqual(purge_finished_jobs(), 0)
+        ExportJob.objects.filter(pk=job.pk).update(finished_at=timezone.now() - timedelta(days=8))
+        self.assertEqual(purge_finished_jobs(), 1)
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(ExportJob.objects.exists())
@@ -0,0 +1,136 @@
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Section, VisitLog
+from core.services.keyset_pagination import capped_count, decode_cursor, encode_cursor, keyset_page
+from core.services.visit_log_services import VISIT_LOG_SORT_KEYS, build_visit_log_queryset, visit_log_sort_keys
+
+
+class KeysetPaginationServiceTests(TestCase):
+    def setUp(self):
+        alpha = Section.objects.create(name='Keyset Alpha', position=0)
+        beta = Section.objects.create(name='Keyset Beta', position=1)
+        sections = [alpha, beta, None]
+        VisitLog.objects.bulk_create([
+            VisitLog(section=sections[i % 3], date=date(2026, 3, 1 + i % 4), participant_count=i % 5,
+                     notes=f'keyset {i}')
+            for i in range(23)
+        ])
+        # Identical timestamps force the id tiebreaker to do its job.
+        VisitLog.objects.update(created_at=datetime(2026, 3, 10, 8, 0, tzinfo=dt_timezone.utc))
+
+    def walk_forward(self, queryset, keys, size):
+        pages, after = [], None
+        while True:
+            page = keyset_page(queryset, keys, size, after=after)
+            pages.append([v.pk for v in page.items])
+            if not page.has_next:
+                return pages
+            after = page.next_cursor
+
+    def test_pages_match_full_ordering_for_every_sort(self):
+        for sort in VISIT_LOG_SORT_KEYS:
+            with self.subTest(sort=sort):
+                queryset = build_visit_log_queryset({'sort': sort})
+                expected = [v.pk for v in queryset]
+                pages = self.walk_forward(queryset, visit_log_sort_keys(sort), 5)
+                self.assertEqual([pk for page in pages for pk in page], expected)
+                self.assertEqual([len(p) for p in pages], [5, 5, 5, 5, 3])
+
+    def test_walking_back_returns_the_same_pages(self):
+        for sort in VISIT_LOG_SORT_KEYS:
+            with self.subTest(sort=sort):
+                queryset = build_visit_log_queryset({'sort': sort})
+                keys = visit_log_sort_keys(sort)
+                forward = self.walk_forward(queryset, keys, 5)
+
+                page = keyset_page(queryset, keys, 5)
+                while page.has_next:
+                    page = keyset_page(queryset, keys, 5, after=page.next_cursor)
+                backward = [[v.pk for v in page.items]]
+                while page.has_previous:
+                    page = keyset_page(queryset, keys, 5, before=page.previous_cursor)
+                    backward.insert(0, [v.pk for v in page.items])
+
+                self.assertEqual(backward, forward)
+
+    def test_first_page_has_no_previous(self):
+        page = keyset_page(build_visit_log_queryset({}), visit_log_sort_keys('-date'), 5)
+        self.assertFalse(page.has_previous)
+        self.assertTrue(page.has_next)
+
+    def test_cursor_is_bound_to_its_sort(self):
+        keys = visit_log_sort_keys('-date')
+        token = encode_cursor([date(2026, 3, 1), datetime(2026, 3, 10, 8, 0, tzinfo=dt_timezone.utc), 5], keys)
+        self.assertEqual(decode_cursor(token, VisitLog, keys)[0], date(2026, 3, 1))
+        with self.assertRaises(ValueError):
+            decode_cursor(token, VisitLog, visit_log_sort_keys('date'))
+        with self.assertRaises(ValueError):
+            decode_cursor('not-a-cursor', VisitLog, keys)
+
+    def test_capped_count(self):
+        queryset = build_visit_log_queryset({})
+        self.assertEqual(capped_count(queryset, cap=100), (23, True))
+        self.assertEqual(capped_count(queryset, cap=10), (10, False))
+
+
+class VisitLogListCursorModeTests(TestCase):
+    def setUp(self):
+        User.objects.create_superuser(username='keyset', password='pw', email='k@example.com')
+        self.client = Client()
+        self.client.login(username='keyset', password='pw')
+        section = Section.objects.create(name='Keyset View Section', position=0)
+        VisitLog.objects.bulk_create([
+            VisitLog(section=section, date=date(2026, 1, 1 + i % 28), notes=f'cursor view {i}')
+            for i in range(80)
+        ])
+        self.url = reverse('visit_log_list')
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'paging': 'cursor', **params})
+        self.assertEqual(response.status_code, 200)
+        return response, ctx.captured_queries
+
+    def test_deep_page_costs_the_same_as_first(self):
+        first, first_queries = self.get()
+        response = first
+        for _ in range(2):
+            response, deep_queries = self.get(after=response.context['cursor_page'].next_cursor)
+
+        self.assertEqual(len(deep_queries), len(first_queries))
+        self.assertFalse(any('COUNT(' in q['sql'].upper() for q in deep_queries))
+        self.assertNotIn('OFFSET', ' '.join(q['sql'] for q in deep_queries).upper())
+        seen = {v.pk for v in first.context['visit_logs']}
+        self.assertFalse(seen & {v.pk for v in response.context['visit_logs']})
+
+    def test_links_keep_filters_and_drop_old_cursor(self):
+        first, _ = self.get(sort='date')
+        second, _ = self.get(sort='date', after=first.context['cursor_page'].next_cursor)
+        self.assertNotIn('after=', second.context['query_params'])
+        self.assertIn('sort=date', second.context['query_params'])
+        self.assertContains(second, 'before=')
+
+    def test_foreign_cursor_restarts_from_first_page(self):
+        first, _ = self.get()
+        response, _ = self.get(sort='date', after=first.context['cursor_page'].next_cursor)
+        self.assertFalse(response.context['cursor_page'].has_previous)
+        self.assertEqual(response.context['visit_logs'][0].date, date(2026, 1, 1))
+
+    def test_approximate_total_is_opt_in(self):
+        response, _ = self.get()
+        self.assertNotIn('approx_total', response.context)
+
+        response, _ = self.get(total='approx')
+        self.assertEqual(response.context['approx_total'], 80)
+        self.assertTrue(response.context['approx_total_exact'])
+
+    def test_offset_mode_is_still_the_default(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.context['is_paginated'])
+        self.assertEqual(response.context['paginator'].count, VisitLog.objects.count())
@@ -0,0 +1,149 @@
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from core.models import Section, VisitLog, Metric, MetricRollup, Task
+from core.services.metric_rollups import deferred_rollup_refresh, find_rollup_drift, rebuild_rollups
+
+
+class MetricRollupSignalTests(TestCase):
+    def setUp(self):
+        self.section = Section.objects.create(name='Rollup Section', position=0)
+        self.other = Section.objects.create(name='Rollup Other', position=1)
+        # Wednesday 2026-03-04 -> week starting Monday 2026-03-02
+        self.visit = VisitLog.objects.create(section=self.section, date=date(2026, 3, 4))
+
+    def rollup(self, **kw):
+        return MetricRollup.objects.get(**kw)
+
+    def test_create_adds_to_weekly_bucket(self):
+        Metric.objects.create(visit=self.visit, metric_type='plant', label='Restio', value=10)
+        Metric.objects.create(visit=self.visit, metric_type='plant', label='Restio', value=5)
+
+        row = self.rollup(section=self.section, metric_type='plant', label='Restio')
+        self.assertEqual(row.week_start, date(2026, 3, 2))
+        self.assertEqual(row.total, 15)
+        self.assertEqual(row.entry_count, 2)
+        self.assertEqual(find_rollup_drift(), [])
+
+    def test_edit_label_moves_between_buckets(self):
+        metric = Metric.objects.create(visit=self.visit, metric_type='weed', label='Wattle', value=7)
+        metric = Metric.objects.get(pk=metric.pk)
+        metric.label = 'Kikuyu'
+        metric.value = 3
+        metric.save()
+
+        self.assertFalse(MetricRollup.objects.filter(label='Wattle').exists())
+        self.assertEqual(self.rollup(label='Kikuyu').total, 3)
+        self.assertEqual(find_rollup_drift(), [])
+
+    def test_repeated_edits_of_one_instance_track_the_stored_row(self):
+        # Never re-read: the snapshot taken on create and after each save
+        # names the bucket the metric is leaving.
+        metric = Metric.objects.create(visit=self.visit, metric_type='weed', label='Wattle', value=7)
+        for label in ('Kikuyu', 'Bramble'):
+            metric.label = label
+            metric.save()
+
+        self.assertEqual(list(MetricRollup.objects.values_list('label', flat=True)), ['Bramble'])
+        self.assertEqual(find_rollup_drift(), [])
+
+    def test_delete_metric_removes_bucket(self):
+        metric = Metric.objects.create(visit=self.visit, metric_type='litter_general', value=4)
+        metric.delete()
+        self.assertFalse(MetricRollup.objects.exists())
+
+    def test_visit_date_and_section_change_moves_metrics(self):
+        Metric.objects.create(visit=self.visit, metric_type='plant', label='Restio', value=10)
+        visit = VisitLog.objects.get(pk=self.visit.pk)
+        visit.date = date(2026, 3, 12)
+        visit.section = self.other
+        visit.save()
+
+        row = self.rollup(metric_type='plant')
+        self.assertEqual(row.section, self.other)
+        self.assertEqual(row.week_start, date(2026, 3, 9))
+        self.assertEqual(find_rollup_drift(), [])
+
+    def test_cascade_delete_from_task(self):
+        task = Task.objects.create(date=date(2026, 3, 4), section=self.section, instructions='t')
+        visit = VisitLog.objects.create(task=task, section=self.section, date=date(2026, 3, 4))
+        Metric.objects.create(visit=visit, metric_type='plant', label='Restio', value=10)
+        Metric.objects.create(visit=self.visit, metric_type='plant', label='Restio', value=1)
+
+        task.delete()
+
+        self.assertEqual(self.rollup(metric_type='plant').total, 1)
+        self.assertEqual(find_rollup_drift(), [])
+
+    def test_deferred_block_refreshes_once_at_exit(self):
+        with deferred_rollup_refresh():
+            Metric.objects.create(visit=self.visit, metric_type='plant', label='Restio', value=2)
+            Metric.objects.create(visit=self.visit, metric_type='plant', label='Restio', value=3)
+            self.assertFalse(MetricRollup.objects.exists())
+        self.assertEqual(self.rollup(metric_type='plant').total, 5)
+
+
+class RebuildRollupsCommandTests(TestCase):
+    def setUp(self):
+        section = Section.objects.create(name='Rebuild Section', position=0)
+        visit = VisitLog.objects.create(section=section, date=date(2026, 3, 4))
+        # bulk_create bypasses signals, leaving the rollups stale.
+        Metric.objects.bulk_create([
+            Metric(visit=visit, metric_type='plant', label='Restio', value=10),
+            Metric(visit=visit, metric_type='weed', label='Wattle', value=3),
+        ])
+
+    def test_check_reports_drift(self):
+        self.assertEqual(len(find_rollup_drift()), 2)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', '--check', stdout=StringIO())
+
+    def test_rebuild_fixes_drift(self):
+        out = StringIO()
+        call_command('rebuild_rollups', stdout=out)
+        self.assertIn('Rebuilt 2 metric rollup rows', out.getvalue())
+        self.assertEqual(find_rollup_drift(), [])
+        call_command('rebuild_rollups', '--check', stdout=out)
+        self.assertIn('consistent', out.getvalue())
+
+    def test_rebuild_is_idempotent(self):
+        self.assertEqual(rebuild_rollups(), 2)
+        self.assertEqual(rebuild_rollups(), 2)
+        self.assertEqual(MetricRollup.objects.count(), 2)
+
+
+class VisitLogFormRollupTests(TestCase):
+    def setUp(self):
+        User.objects.create_superuser(username='rollup', password='pw', email='r@example.com')
+        self.client = Client()
+        self.client.login(username='rollup', password='pw')
+        self.section = Section.objects.create(name='Form Rollup Section', position=0)
+
+    def test_create_view_updates_dashboard_totals(self):
+        self.client.post(reverse('visit_log_create'), {
+            'date': '2026-03-04',
+            'section': self.section.pk,
+            'notes': 'planting',
+            'participant_count': '3',
+            'metrics-TOTAL_FORMS': '1',
+            'metrics-INITIAL_FORMS': '0',
+            'metrics-MIN_NUM_FORMS': '0',
+            'metrics-MAX_NUM_FORMS': '1000',
+            'metrics-0-metric_type': 'plant',
+            'metrics-0-label': 'Restio',
+            'metrics-0-value': '12',
+            'photos-TOTAL_FORMS': '0',
+            'photos-INITIAL_FORMS': '0',
+            'photos-MIN_NUM_FORMS': '0',
+            'photos-MAX_NUM_FORMS': '1000',
+        })
+
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_plants'], 12)
+        self.assertEqual(find_rollup_drift(), [])
@@ -0,0 +1,66 @@
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Section, VisitLog, Metric
+from core.services.metric_stats import metric_stats
+
+
+class MetricStatsTests(TestCase):
+    def setUp(self):
+        self.section = Section.objects.create(name='Stats Section', position=0)
+        self.other = Section.objects.create(name='Stats Other', position=1)
+        visit = VisitLog.objects.create(section=self.section, date=date(2026, 3, 4))
+        later = VisitLog.objects.create(section=self.section, date=date(2026, 4, 8))
+        other_visit = VisitLog.objects.create(section=self.other, date=date(2026, 3, 4))
+        Metric.objects.create(visit=visit, metric_type='litter_general', label='General Litter', value=5)
+        Metric.objects.create(visit=visit, metric_type='litter_recyclable', label='Recyclable Litter', value=2)
+        Metric.objects.create(visit=visit, metric_type='plant', label='Restio', value=10)
+        Metric.objects.create(visit=later, metric_type='plant', label='Restio', value=6)
+        Metric.objects.create(visit=visit, metric_type='plant', label='', value=30)
+        Metric.objects.create(visit=other_visit, metric_type='plant', label='Erica', value=12)
+        Metric.objects.create(visit=other_visit, metric_type='weed', label='Wattle', value=7)
+
+    def test_project_wide_totals_and_counts(self):
+        stats = metric_stats()
+        self.assertEqual(stats['totals'], {
+            'litter_general': 5, 'litter_recyclable': 2, 'plant': 58, 'weed': 7,
+        })
+        self.assertEqual(stats['species_counts']['plant'], 2)
+        self.assertEqual(stats['species_counts']['weed'], 1)
+
+    def test_top_species_sums_across_weeks_and_skips_blank(self):
+        stats = metric_stats(top_n=5)
+        self.assertEqual(stats['top_species']['plant'], [
+            {'label': 'Restio', 'total': 16},
+            {'label': 'Erica', 'total': 12},
+        ])
+
+    def test_top_species_with_unlabeled_and_limit(self):
+        stats = metric_stats(top_n=2, include_unlabeled=True)
+        self.assertEqual(stats['top_species']['plant'], [
+            {'label': '', 'total': 30},
+            {'label': 'Restio', 'total': 16},
+        ])
+
+    def test_section_scope(self):
+        stats = metric_stats(self.other, metric_types=('plant', 'weed'))
+        self.assertEqual(stats['totals'], {'plant': 12, 'weed': 7})
+        self.assertEqual(stats['top_species']['weed'], [{'label': 'Wattle', 'total': 7}])
+
+    def test_empty_scope_returns_zeroes(self):
+        empty = Section.objects.create(name='Stats Empty', position=2)
+        stats = metric_stats(empty)
+        self.assertEqual(stats['totals']['plant'], 0)
+        self.assertEqual(stats['species_counts']['weed'], 0)
+        self.assertEqual(stats['top_species']['plant'], [])
+
+    def test_query_count_independent_of_metric_types(self):
+        with CaptureQueriesContext(connection) as one_type:
+            metric_stats(metric_types=('plant',))
+        with CaptureQueriesContext(connection) as all_types:
+            metric_stats()
+        self.assertEqual(len(one_type.captured_queries), 2)
+        self.assertEqual(len(all_types.captured_queries), 2)
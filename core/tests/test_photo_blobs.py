@@ -0,0 +1,201 @@
+import hashlib
+import io
+from contextlib import suppress
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import StopFutureHandlers
+from django.core.management import call_command
+from django.db.models.signals import pre_save
+from django.utils import timezone
+
+from core.models import Photo, PhotoBlob
+from core.services import photo_processing
+from core.services.photo_blobs import BLOB_GRACE, blob_file_names, collect_blobs, store_blob
+from core.services.photo_processing import claim_next_photo, lease_blob, process_photo
+from core.upload_handlers import HashingMemoryFileUploadHandler, HashingTemporaryFileUploadHandler
+
+from .test_photo_derivatives import PhotoDerivativeTestCase, jpeg_upload
+
+
+class PhotoBlobTests(PhotoDerivativeTestCase):
+    def add_photo(self, **kwargs):
+        return Photo.objects.create(section=self.section, visit=self.visit, file=jpeg_upload(**kwargs))
+
+    def settle_blobs(self):
+        """Age every blob past the grace period, as if its last upload were long done."""
+        PhotoBlob.objects.update(referenced_at=timezone.now() - BLOB_GRACE - timedelta(minutes=1))
+
+    def test_same_content_is_stored_once(self):
+        first = self.add_photo(name='IMG_0001.jpg')
+        second = self.add_photo(name='IMG_0001 copy.jpg')
+
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertTrue(first.file.name.startswith(f'photos/blobs/{first.blob_id[:2]}/{first.blob_id}'))
+        self.assertEqual(PhotoBlob.objects.get().ref_count, 2)
+        self.assertEqual(default_storage.listdir(f'photos/blobs/{first.blob_id[:2]}')[1], [first.file.name.rsplit('/', 1)[1]])
+
+        other = self.add_photo(size=(600, 400))
+        self.assertNotEqual(other.blob_id, first.blob_id)
+
+    def test_second_photo_reuses_the_processed_copies(self):
+        first = self.add_photo()
+        self.process()
+        first.refresh_from_db()
+        normalised = first.file.read()
+
+        second = self.add_photo()
+        self.process()
+        second.refresh_from_db()
+        self.assertEqual(second.processing_status, Photo.STATUS_DONE)
+        self.assertEqual((second.thumbnail.name, second.medium.name), (first.thumbnail.name, first.medium.name))
+        self.assertEqual(second.file.read(), normalised)
+
+    def test_shared_blob_is_normalised_once(self):
+        first, second = self.add_photo(), self.add_photo()
+        uploaded = first.file.name
+
+        with mock.patch.object(photo_processing, 'reencode_original',
+                               wraps=photo_processing.reencode_original) as reencode:
+            self.process()
+        self.assertEqual(reencode.call_count, 1)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual({first.processing_status, second.processing_status}, {Photo.STATUS_DONE})
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(first.file.name, PhotoBlob.objects.get().file.name)
+        self.assertEqual((second.thumbnail.name, second.medium.name), (first.thumbnail.name, first.medium.name))
+        self.assertFalse(default_storage.exists(uploaded))
+
+    def test_photos_wait_while_another_worker_normalises_their_blob(self):
+        first = self.add_photo()
+        self.assertTrue(lease_blob(first.blob_id))  # another worker's lease
+
+        self.assertIsNone(claim_next_photo())
+        Photo.objects.filter(pk=first.pk).update(processing_status=Photo.STATUS_PROCESSING)
+        first.refresh_from_db()
+        self.assertEqual(process_photo(first).processing_status, Photo.STATUS_PENDING)
+
+        PhotoBlob.objects.update(processing_started_at=timezone.now() - timedelta(hours=1))  # that worker died
+        self.assertEqual(claim_next_photo().pk, first.pk)
+
+    def test_upload_handlers_hash_the_stream(self):
+        data = jpeg_upload(size=(300, 200)).read()
+        for handler_class in (HashingMemoryFileUploadHandler, HashingTemporaryFileUploadHandler):
+            handler = handler_class()
+            handler.activated = True
+            with suppress(StopFutureHandlers):  # the memory handler claims the file this way
+                handler.new_file('file', 'IMG_0001.jpg', 'image/jpeg', len(data))
+            for start in range(0, len(data), 1000):
+                handler.receive_data_chunk(data[start:start + 1000], start)
+            uploaded = handler.file_complete(len(data))
+            self.assertEqual(uploaded.sha256, hashlib.sha256(data).hexdigest(), handler_class.__name__)
+
+    def test_deleting_and_replacing_release_references(self):
+        first = self.add_photo()
+        second = self.add_photo()
+        blob = first.blob
+
+        second.file = jpeg_upload(size=(600, 400))
+        second.save()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+
+        first.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+        self.assertTrue(default_storage.exists(blob.file.name))  # kept until collected
+
+    def test_unused_blobs_are_collected_with_their_files(self):
+        photo = self.add_photo()
+        self.process()
+        blob = PhotoBlob.objects.get()
+        names = blob_file_names(blob)
+        self.assertTrue(all(default_storage.exists(name) for name in names))
+
+        photo.delete()
+        self.settle_blobs()
+        out = io.StringIO()
+        call_command('cleanup_photos', stdout=out)
+
+        self.assertIn('Deleted 1 unused photo blob(s).', out.getvalue())
+        self.assertFalse(PhotoBlob.objects.exists())
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+
+    def test_drifted_count_never_deletes_a_used_blob(self):
+        photo = self.add_photo()
+        PhotoBlob.objects.update(ref_count=0)  # e.g. lost in a crash
+        self.settle_blobs()
+
+        self.assertEqual(collect_blobs(), [])
+        self.assertEqual(PhotoBlob.objects.get().ref_count, 1)
+        self.assertTrue(default_storage.exists(photo.file.name))
+
+    def test_collection_during_an_upload_keeps_its_blob(self):
+        self.add_photo().delete()
+        self.settle_blobs()  # an unused blob, due for collection
+
+        def collect_mid_save(sender, instance, **kwargs):
+            # cleanup_photos runs after the upload picked the blob, before its row exists.
+            self.assertEqual(collect_blobs(), [])
+
+        pre_save.connect(collect_mid_save, sender=Photo, dispatch_uid='test_collect_mid_save')
+        self.addCleanup(pre_save.disconnect, sender=Photo, dispatch_uid='test_collect_mid_save')
+        photo = self.add_photo()
+
+        blob = PhotoBlob.objects.get()
+        self.assertEqual((photo.blob_id, blob.ref_count), (blob.pk, 1))
+        self.assertTrue(default_storage.exists(photo.file.name))
+
+    def test_picked_blob_is_not_recounted_or_collected(self):
+        blob = store_blob(jpeg_upload())  # the pre_save half of an upload
+
+        self.assertEqual(collect_blobs(), [])
+        self.settle_blobs()
+        self.assertEqual([b.pk for b in collect_blobs()], [blob.pk])
+
+    def test_failed_save_leaks_no_reference(self):
+        def fail(sender, instance, **kwargs):
+            raise RuntimeError('database went away')
+
+        pre_save.connect(fail, sender=Photo, dispatch_uid='test_fail_save')
+        self.addCleanup(pre_save.disconnect, sender=Photo, dispatch_uid='test_fail_save')
+        with self.assertRaises(RuntimeError):
+            self.add_photo()
+
+        self.assertEqual(PhotoBlob.objects.get().ref_count, 0)
+        self.settle_blobs()
+        self.assertEqual(len(collect_blobs()), 1)
+
+
+class DedupePhotosCommandTests(PhotoDerivativeTestCase):
+    def legacy_photo(self, name):
+        # Stored the pre-dedup way: bulk_create skips the save handlers.
+        stored = default_storage.save(f'photos/2026/03/02/{name}', jpeg_upload(size=(800, 600)))
+        return Photo.objects.bulk_create([Photo(section=self.section, visit=self.visit, file=stored)])[0]
+
+    def test_legacy_duplicates_are_merged(self):
+        first, second = self.legacy_photo('a.jpg'), self.legacy_photo('b.jpg')
+        out = io.StringIO()
+        call_command('dedupe_photos', '--dry-run', stdout=out)
+        self.assertIn('2 legacy photo(s) hold 1 distinct image(s)', out.getvalue())
+        self.assertFalse(PhotoBlob.objects.exists())
+
+        call_command('dedupe_photos', stdout=io.StringIO())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        blob = PhotoBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual((first.blob_id, second.blob_id), (blob.pk, blob.pk))
+        self.assertEqual(first.file.name, blob.file.name)
+        self.assertEqual(default_storage.listdir('photos/2026/03/02')[1], [])
+        self.assertFalse(blob.normalised)  # legacy rows were still pending
+
+        self.process()
+        self.process()
+        first.refresh_from_db()
+        self.assertEqual(first.processing_status, Photo.STATUS_DONE)
+        self.assertTrue(default_storage.exists(first.thumbnail.name))
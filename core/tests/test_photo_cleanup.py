@@ -0,0 +1,105 @@
+import io
+import os
+import time
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.utils import timezone
+
+from core.models import Photo, PhotoBlob
+from core.services import photo_cleanup
+from core.services.photo_blobs import BLOB_GRACE
+from core.services.photo_cleanup import scan_photos
+
+from .test_photo_derivatives import PhotoDerivativeTestCase, jpeg_upload
+
+
+class CleanupPhotosTests(PhotoDerivativeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.kept = Photo.objects.create(section=self.section, visit=self.visit, file=jpeg_upload())
+        self.process()
+        self.kept.refresh_from_db()
+        # A record whose file was lost, and two files nobody references.
+        self.lost = Photo.objects.bulk_create([Photo(section=self.section, file='photos/2026/03/02/lost.jpg')])[0]
+        self.stray = self.media_file('photos/2026/03/01/stray.jpg', age_hours=3)
+        self.fresh = self.media_file('photos/2026/03/01/uploading.jpg', age_hours=0)
+
+    def media_file(self, name, age_hours):
+        name = default_storage.save(name, ContentFile(b'x' * 2048))
+        then = time.time() - age_hours * 3600
+        os.utime(default_storage.path(name), (then, then))
+        return name
+
+    def cleanup(self, *args):
+        out = io.StringIO()
+        call_command('cleanup_photos', *args, stdout=out)
+        return out.getvalue()
+
+    def test_scan_diffs_rows_and_files_both_ways(self):
+        with self.assertNumQueries(2):  # one streamed pass over photos, one over blobs
+            scan = scan_photos()
+
+        self.assertEqual(scan['missing_rows'], [self.lost.pk])
+        self.assertEqual(scan['orphan_files'], [self.stray])
+        self.assertEqual(scan_photos(workers=4), scan)
+
+    def test_dry_run_changes_nothing(self):
+        output = self.cleanup('--dry-run', '-v', '2')
+
+        self.assertIn('would delete 1 orphaned photo record(s), 0 unused photo blob(s) '
+                      'and 1 unreferenced file(s)', output)
+        self.assertIn(f'Unreferenced file: {self.stray}', output)
+        self.assertTrue(Photo.objects.filter(pk=self.lost.pk).exists())
+        self.assertTrue(default_storage.exists(self.stray))
+
+    def test_orphans_are_deleted_and_referenced_files_kept(self):
+        self.kept.delete()
+        PhotoBlob.objects.update(referenced_at=timezone.now() - BLOB_GRACE * 2)
+        blob_file = PhotoBlob.objects.get().file.name
+        survivor = Photo.objects.create(section=self.section, file=jpeg_upload(size=(600, 400)))
+
+        output = self.cleanup()
+
+        self.assertIn('Successfully deleted 1 orphaned photo records.', output)
+        self.assertIn('Deleted 1 unused photo blob(s).', output)
+        self.assertIn('Deleted 1 unreferenced file(s).', output)
+        self.assertEqual(list(Photo.objects.all()), [survivor])
+        self.assertFalse(default_storage.exists(self.stray))
+        self.assertFalse(default_storage.exists(blob_file))
+        self.assertTrue(default_storage.exists(self.fresh))  # may belong to an upload in flight
+        self.assertTrue(default_storage.exists(survivor.file.name))
+
+    def during_listing(self, change):
+        """Run cleanup_photos with `change()` happening right after the media tree was listed."""
+        def list_then_change(*args, **kwargs):
+            files = list_media_files(*args, **kwargs)
+            change()
+            return files
+
+        list_media_files = photo_cleanup.list_media_files
+        with mock.patch.object(photo_cleanup, 'list_media_files', side_effect=list_then_change):
+            return self.cleanup()
+
+    def test_photo_uploaded_during_the_scan_keeps_its_row(self):
+        late = []
+        self.during_listing(lambda: late.append(
+            Photo.objects.create(section=self.section, file=jpeg_upload(size=(500, 300)))
+        ))
+
+        self.assertTrue(Photo.objects.filter(pk=late[0].pk).exists())
+        self.assertTrue(default_storage.exists(late[0].file.name))
+        self.assertFalse(Photo.objects.filter(pk=self.lost.pk).exists())
+
+    def test_original_replaced_during_the_scan_keeps_its_row(self):
+        def replace():
+            self.kept.file = jpeg_upload(size=(500, 300))
+            self.kept.save()
+
+        output = self.during_listing(replace)
+
+        self.assertIn('Successfully deleted 1 orphaned photo records.', output)  # only self.lost
+        self.assertTrue(Photo.objects.filter(pk=self.kept.pk).exists())
+        self.assertTrue(default_storage.exists(self.kept.file.name))
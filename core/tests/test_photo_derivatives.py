@@ -0,0 +1,134 @@
+import io
+import shutil
+import tempfile
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.models import Photo, Section, VisitLog
+from core.services.photo_derivatives import build_derivatives, derivative_name, derivatives_stale
+
+
+def jpeg_upload(name='IMG_0001.jpg', size=(3000, 2000), orientation=None):
+    buffer = io.BytesIO()
+    image = Image.new('RGB', size, (40, 120, 60))
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    image.save(buffer, 'JPEG', quality=95, exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class PhotoDerivativeTestCase(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.section = Section.objects.create(name='Photo Reach', position=0)
+        self.visit = VisitLog.objects.create(section=self.section, date=date(2026, 3, 2))
+
+    def process(self):
+        call_command('process_photos', '--once', stdout=io.StringIO())
+
+    def upload(self, **kwargs):
+        photo = Photo.objects.create(section=self.section, visit=self.visit, file=jpeg_upload(**kwargs))
+        self.process()
+        photo.refresh_from_db()
+        return photo
+
+
+class PhotoDerivativeTests(PhotoDerivativeTestCase):
+    def test_upload_builds_small_copies_next_to_the_original(self):
+        photo = self.upload()
+        stem = photo.file.name.rsplit('.', 1)[0]
+
+        self.assertEqual(photo.thumbnail.name, f'{stem}_thumb.jpg')
+        self.assertEqual(photo.medium.name, f'{stem}_medium.jpg')
+        self.assertEqual((photo.thumbnail.width, photo.thumbnail.height), (160, 107))
+        self.assertEqual((photo.medium.width, photo.medium.height), (1280, 853))
+        self.assertLess(photo.thumbnail.size, photo.file.size / 10)
+        self.assertEqual(photo.thumbnail_url, photo.thumbnail.url)
+        self.assertEqual(photo.medium_url, photo.medium.url)
+
+    def test_exif_orientation_is_applied(self):
+        photo = self.upload(size=(400, 200), orientation=6)  # rotated 90° on the phone
+        self.assertEqual((photo.thumbnail.width, photo.thumbnail.height), (80, 160))
+        self.assertEqual((photo.medium.width, photo.medium.height), (200, 400))  # never upscaled
+
+    def test_accessors_fall_back_to_the_original(self):
+        photo = Photo.objects.create(section=self.section, file=jpeg_upload())
+        self.assertEqual(photo.thumbnail_url, photo.file.url)
+        self.assertEqual(photo.medium_url, photo.file.url)
+
+    def test_unreadable_original_is_skipped(self):
+        bogus = SimpleUploadedFile('broken.jpg', b'not an image', content_type='image/jpeg')
+        photo = Photo.objects.create(section=self.section, file=bogus)
+        with self.assertLogs('core.services.photo_processing', 'WARNING'):
+            self.process()
+        photo.refresh_from_db()
+        self.assertEqual(photo.processing_status, Photo.STATUS_FAILED)
+        self.assertFalse(photo.thumbnail)
+        self.assertEqual(photo.thumbnail_url, photo.file.url)
+
+    def test_replacing_the_original_rebuilds(self):
+        photo = self.upload()
+        first = photo.file.name
+        photo.file = jpeg_upload(name='IMG_0002.jpg', size=(800, 800))
+        photo.save()
+        photo.refresh_from_db()
+        self.assertEqual(photo.processing_status, Photo.STATUS_PENDING)
+        self.process()
+        photo.refresh_from_db()
+        self.assertNotEqual(photo.file.name, first)
+        self.assertEqual(photo.thumbnail.name, derivative_name(photo.file.name, 'thumb'))
+        self.assertEqual((photo.thumbnail.width, photo.thumbnail.height), (160, 160))
+
+    def test_list_pages_serve_the_thumbnail(self):
+        User.objects.create_user(username='viewer', password='pw')
+        self.client.login(username='viewer', password='pw')
+        photo = self.upload()
+
+        response = self.client.get(reverse('visit_log_list'))
+        self.assertContains(response, photo.thumbnail.url)
+        self.assertNotContains(response, f'src="{photo.file.url}"')
+
+
+class BackfillPhotoDerivativesTests(PhotoDerivativeTestCase):
+    def test_backfill_builds_missing_copies_without_rewriting_originals(self):
+        photos = [self.upload(size=(300 + i, 200)) for i in range(3)]
+        Photo.objects.filter(pk=photos[0].pk).update(thumbnail='')
+        original = photos[0].file.read()
+
+        out = io.StringIO()
+        call_command('backfill_photo_derivatives', '--check', stdout=out)
+        self.assertIn('1 photo(s) need derivatives', out.getvalue())
+
+        call_command('backfill_photo_derivatives', stdout=io.StringIO())
+        self.assertFalse(Photo.objects.exclude(processing_status=Photo.STATUS_DONE).exists())
+        for photo in Photo.objects.all():
+            self.assertFalse(derivatives_stale(photo))
+        photos[0].refresh_from_db()
+        self.assertEqual(photos[0].file.read(), original)
+
+    def test_reencoding_is_opt_in(self):
+        photos = [self.upload(size=(300 + i, 200)) for i in range(2)]
+        Photo.objects.filter(pk=photos[0].pk).update(thumbnail='')
+
+        call_command('backfill_photo_derivatives', '--reencode', stdout=io.StringIO())
+        self.assertEqual(
+            list(Photo.objects.filter(processing_status=Photo.STATUS_PENDING).values_list('pk', flat=True)),
+            [photos[0].pk],
+        )
+
+    def test_build_is_a_no_op_when_current(self):
+        photo = self.upload()
+        self.assertFalse(build_derivatives(photo))
+        self.assertTrue(build_derivatives(photo, force=True))
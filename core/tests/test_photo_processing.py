@@ -0,0 +1,154 @@
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from core.models import Photo
+from core.services import photo_processing
+from core.services.photo_processing import claim_next_photo, process_photo, queue_photo, requeue_stale_photos
+
+from .test_photo_derivatives import PhotoDerivativeTestCase, jpeg_upload
+
+GPS_IFD = 0x8825
+ORIENTATION = 0x0112
+
+
+def stored_image(field):
+    with field.storage.open(field.name, 'rb') as handle:
+        image = Image.open(handle)
+        image.load()
+    return image
+
+
+class PhotoQueueTests(PhotoDerivativeTestCase):
+    def test_uploads_start_pending_and_are_claimed_once(self):
+        photo = Photo.objects.create(section=self.section, file=jpeg_upload())
+        self.assertEqual(photo.processing_status, Photo.STATUS_PENDING)
+
+        claimed = claim_next_photo()
+        self.assertEqual(claimed.pk, photo.pk)
+        self.assertEqual(claimed.processing_status, Photo.STATUS_PROCESSING)
+        self.assertIsNone(claim_next_photo())
+
+    def test_worker_normalises_the_original(self):
+        buffer = io.BytesIO()
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        exif[GPS_IFD] = {1: 'S', 2: (33.0, 57.0, 0.0)}
+        Image.new('RGB', (400, 200), 'white').save(buffer, 'JPEG', exif=exif)
+        photo = Photo.objects.create(
+            section=self.section, file=SimpleUploadedFile('gps.jpg', buffer.getvalue(), content_type='image/jpeg'),
+        )
+        name = photo.file.name
+
+        self.process()
+        photo.refresh_from_db()
+
+        original = stored_image(photo.file)
+        self.assertEqual(photo.processing_status, Photo.STATUS_DONE)
+        self.assertNotEqual(photo.file.name, name)  # written beside it, then swapped in
+        self.assertFalse(photo.file.storage.exists(name))  # the GPS-tagged upload is gone
+        self.assertEqual(photo.blob.file.name, photo.file.name)
+        self.assertTrue(photo.blob.normalised)
+        self.assertEqual(original.format, 'JPEG')
+        self.assertEqual(original.size, (200, 400))
+        self.assertNotIn(GPS_IFD, original.getexif())
+        self.assertNotIn(ORIENTATION, original.getexif())
+        self.assertTrue(photo.thumbnail and photo.medium)
+
+    def test_png_stays_png(self):
+        buffer = io.BytesIO()
+        Image.new('RGBA', (300, 300), (0, 0, 0, 0)).save(buffer, 'PNG')
+        photo = Photo.objects.create(
+            section=self.section, file=SimpleUploadedFile('map.png', buffer.getvalue(), content_type='image/png'),
+        )
+        self.process()
+        photo.refresh_from_db()
+        self.assertEqual(stored_image(photo.file).format, 'PNG')
+        self.assertEqual(stored_image(photo.thumbnail).format, 'JPEG')
+
+    def test_replaced_while_processing_is_processed_again(self):
+        Photo.objects.create(section=self.section, file=jpeg_upload())
+        claimed = claim_next_photo()
+        queue_photo(claimed)  # the original is replaced mid-run
+
+        process_photo(claimed)
+        self.assertEqual(Photo.objects.get(pk=claimed.pk).processing_status, Photo.STATUS_PENDING)
+
+    def test_legacy_photo_replaced_while_normalising_keeps_the_replacement(self):
+        # Stored before content blobs: bulk_create skips the save handlers.
+        legacy = default_storage.save('photos/2026/03/02/legacy.jpg', jpeg_upload(size=(800, 600)))
+        Photo.objects.bulk_create([Photo(section=self.section, file=legacy)])
+        claimed = claim_next_photo()
+        written = []
+
+        def normalise_then_replace(photo):
+            written.append(real_normalise(photo))
+            replaced = Photo.objects.get(pk=photo.pk)
+            replaced.file = jpeg_upload(size=(500, 300))
+            replaced.save()  # the user uploads a new original mid-run
+            return written[-1]
+
+        real_normalise = photo_processing.normalise
+        with mock.patch.object(photo_processing, 'normalise', side_effect=normalise_then_replace):
+            process_photo(claimed)
+
+        photo = Photo.objects.get(pk=claimed.pk)
+        self.assertEqual(photo.file.name, photo.blob.file.name)
+        self.assertTrue(default_storage.exists(photo.file.name))
+        self.assertEqual(photo.processing_status, Photo.STATUS_PENDING)  # processed again later
+        self.assertFalse(default_storage.exists(written[0]))
+        self.assertFalse(photo.thumbnail or photo.medium)
+
+    def test_stale_claims_are_requeued(self):
+        photo = Photo.objects.create(section=self.section, file=jpeg_upload())
+        claim_next_photo()
+        Photo.objects.filter(pk=photo.pk).update(processing_started_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_photos(), 1)
+        self.assertEqual(Photo.objects.get(pk=photo.pk).processing_status, Photo.STATUS_PENDING)
+
+    def test_retry_failed(self):
+        photo = Photo.objects.create(
+            section=self.section, file=SimpleUploadedFile('bad.jpg', b'nope', content_type='image/jpeg'),
+        )
+        with self.assertLogs('core.services.photo_processing', 'WARNING'):
+            self.process()
+        self.assertEqual(Photo.objects.get(pk=photo.pk).processing_status, Photo.STATUS_FAILED)
+
+        out = io.StringIO()
+        with self.assertLogs('core.services.photo_processing', 'WARNING'):
+            call_command('process_photos', '--once', '--retry-failed', stdout=out)
+        self.assertIn('Retrying 1 failed photo(s).', out.getvalue())
+
+
+class VisitLogUploadTests(PhotoDerivativeTestCase):
+    def test_upload_returns_before_any_image_processing(self):
+        User.objects.create_user(username='field', password='pw')
+        self.client.login(username='field', password='pw')
+        data = {
+            'date': '2026-03-02', 'section': self.section.pk, 'notes': 'upload', 'participant_count': '1',
+            'metrics-TOTAL_FORMS': '0', 'metrics-INITIAL_FORMS': '0',
+            'metrics-MIN_NUM_FORMS': '0', 'metrics-MAX_NUM_FORMS': '1000',
+            'photos-TOTAL_FORMS': '1', 'photos-INITIAL_FORMS': '0',
+            'photos-MIN_NUM_FORMS': '0', 'photos-MAX_NUM_FORMS': '1000',
+            'photos-0-file': jpeg_upload(size=(4000, 3000)),
+            'photos-0-description': 'Reed bed after clearing',
+        }
+        with mock.patch('core.services.photo_processing.process_photo') as processed, \
+                mock.patch('core.services.photo_derivatives.write_derivatives') as derived:
+            response = self.client.post(reverse('visit_log_create'), data)
+
+        self.assertEqual(response.status_code, 302)
+        processed.assert_not_called()
+        derived.assert_not_called()
+        photo = Photo.objects.get(description='Reed bed after clearing')
+        self.assertEqual(photo.processing_status, Photo.STATUS_PENDING)
+        self.assertEqual(photo.thumbnail_url, photo.file.url)
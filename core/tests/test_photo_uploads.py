@@ -0,0 +1,172 @@
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Photo, PhotoUpload, Section, VisitLog
+from core.services.photo_uploads import PartFile, part_path, purge_stale_uploads
+
+from .test_photo_derivatives import jpeg_upload
+
+
+class PhotoUploadTestCase(TestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=f'{tmp}/media', PHOTO_UPLOAD_DIR=f'{tmp}/uploads')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = User.objects.create_user(username='field', password='pw')
+        self.client.login(username='field', password='pw')
+        self.section = Section.objects.create(name='Upload Reach', position=0)
+        self.photo_bytes = jpeg_upload(size=(1200, 900)).read()
+
+    def start(self, filename='reeds.jpg', size=None):
+        return self.client.post(
+            reverse('photo_upload_start'),
+            json.dumps({'filename': filename, 'size': len(self.photo_bytes) if size is None else size,
+                        'content_type': 'image/jpeg'}),
+            content_type='application/json',
+        )
+
+    def put(self, url, offset, data):
+        return self.client.put(url, data, content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset))
+
+    def upload_all(self, chunk=4096):
+        session = self.start().json()
+        for offset in range(0, len(self.photo_bytes), chunk):
+            response = self.put(session['url'], offset, self.photo_bytes[offset:offset + chunk])
+            self.assertEqual(response.status_code, 200)
+        return session
+
+
+class ChunkedUploadTests(PhotoUploadTestCase):
+    def test_chunks_are_assembled_in_order(self):
+        session = self.upload_all()
+        status = self.client.get(session['url']).json()
+
+        self.assertTrue(status['complete'])
+        self.assertEqual(status['offset'], len(self.photo_bytes))
+        upload = PhotoUpload.objects.get(pk=session['id'])
+        self.assertEqual(part_path(upload).read_bytes(), self.photo_bytes)
+
+    def test_wrong_offset_answers_where_to_resume(self):
+        session = self.start().json()
+        self.put(session['url'], 0, self.photo_bytes[:1000])
+
+        skipped = self.put(session['url'], 2000, self.photo_bytes[2000:3000])
+        self.assertEqual(skipped.status_code, 409)
+        self.assertEqual(skipped.json()['offset'], 1000)
+        self.assertEqual(self.client.get(session['url']).json()['offset'], 1000)
+
+    def test_repeated_chunk_is_acknowledged_once(self):
+        session = self.start().json()
+        self.put(session['url'], 0, self.photo_bytes[:1000])
+        # The response was lost on the way back; the client sends it again.
+        again = self.put(session['url'], 0, self.photo_bytes[:1000])
+
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.json()['offset'], 1000)
+        upload = PhotoUpload.objects.get(pk=session['id'])
+        self.assertEqual(part_path(upload).read_bytes(), self.photo_bytes[:1000])
+
+    def test_bad_requests_are_refused(self):
+        self.assertEqual(self.start(filename='notes.txt').status_code, 400)
+        self.assertEqual(self.start(size=0).status_code, 400)
+        with override_settings(PHOTO_UPLOAD_MAX_BYTES=100):
+            self.assertEqual(self.start().status_code, 400)
+
+        session = self.start(size=10).json()
+        self.assertEqual(self.put(session['url'], 0, b'x' * 11).status_code, 400)
+
+    def test_sessions_are_private(self):
+        session = self.start().json()
+        User.objects.create_user(username='other', password='pw')
+        self.client.login(username='other', password='pw')
+        self.assertEqual(self.client.get(session['url']).status_code, 404)
+        self.assertEqual(self.put(session['url'], 0, b'x').status_code, 404)
+
+    def test_abandoned_sessions_are_purged(self):
+        session = self.start().json()
+        upload = PhotoUpload.objects.get(pk=session['id'])
+        PhotoUpload.objects.filter(pk=upload.pk).update(updated_at=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(purge_stale_uploads(), 1)
+        self.assertFalse(PhotoUpload.objects.exists())
+        self.assertFalse(part_path(upload).exists())
+
+
+class VisitLogFormUploadTests(PhotoUploadTestCase):
+    def post_visit(self, upload_id):
+        return self.client.post(reverse('visit_log_create'), {
+            'date': '2026-03-02', 'section': self.section.pk, 'notes': 'chunked', 'participant_count': '1',
+            'metrics-TOTAL_FORMS': '0', 'metrics-INITIAL_FORMS': '0',
+            'metrics-MIN_NUM_FORMS': '0', 'metrics-MAX_NUM_FORMS': '1000',
+            'photos-TOTAL_FORMS': '1', 'photos-INITIAL_FORMS': '0',
+            'photos-MIN_NUM_FORMS': '0', 'photos-MAX_NUM_FORMS': '1000',
+            'photos-0-upload': upload_id,
+            'photos-0-description': 'Reeds cut back to the bank',
+        })
+
+    def test_finished_upload_becomes_the_photo(self):
+        session = self.upload_all()
+        response = self.post_visit(session['id'])
+
+        self.assertEqual(response.status_code, 302)
+        photo = Photo.objects.get()
+        self.assertEqual(photo.visit, VisitLog.objects.get(notes='chunked'))
+        self.assertEqual(photo.section, self.section)
+        self.assertTrue(photo.file.name.endswith('.jpg'))
+        with photo.file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.photo_bytes)
+        self.assertFalse(PhotoUpload.objects.exists())
+        self.assertEqual(list(part_path(PhotoUpload(pk=session['id'])).parent.iterdir()), [])
+
+    def test_unfinished_upload_is_a_form_error(self):
+        session = self.start().json()
+        self.put(session['url'], 0, self.photo_bytes[:1000])
+
+        response = self.post_visit(session['id'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'The photo upload has not finished.')
+        self.assertFalse(VisitLog.objects.filter(notes='chunked').exists())
+        self.assertFalse(Photo.objects.exists())
+
+    def test_someone_elses_upload_is_refused(self):
+        session = self.upload_all()
+        User.objects.create_user(username='other', password='pw')
+        self.client.login(username='other', password='pw')
+
+        response = self.post_visit(session['id'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'The photo upload has not finished.')
+        self.assertFalse(Photo.objects.exists())
+        self.assertTrue(PhotoUpload.objects.filter(pk=session['id']).exists())
+
+    def test_invalid_form_leaves_the_part_file_closed(self):
+        session = self.upload_all()
+        opened = []
+        real_open = PartFile.open
+
+        def track(part, *args, **kwargs):
+            opened.append(part)
+            return real_open(part, *args, **kwargs)
+
+        with mock.patch.object(PartFile, 'open', track):
+            response = self.client.post(reverse('visit_log_create'), {
+                'date': 'not a date', 'section': self.section.pk,
+                'metrics-TOTAL_FORMS': '0', 'metrics-INITIAL_FORMS': '0',
+                'photos-TOTAL_FORMS': '1', 'photos-INITIAL_FORMS': '0',
+                'photos-0-upload': session['id'], 'photos-0-description': 'Reeds cut back to the bank',
+            })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(opened)
+        self.assertTrue(all(part.closed for part in opened))
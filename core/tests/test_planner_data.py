@@ -0,0 +1,110 @@
+from datetime import date, timedelta
+import uuid
+
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from core.models import Section, Task, VisitLog
+from core.services.planner_data import PLANNER_FIELDS
+from core.services.task_services import update_task_series
+
+
+class PlannerDataEndpointTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(username='planner', password='pw')
+        self.client = Client()
+        self.client.login(username='planner', password='pw')
+        self.section = Section.objects.create(name='Data Section', position=0)
+        self.monday = date(2026, 3, 2)
+        self.task = Task.objects.create(
+            date=self.monday, section=self.section, assignee_type='team', instructions='Clear path',
+        )
+        self.url = reverse('planner_data') + '?start=2026-03-02&end=2026-03-08'
+
+    def test_returns_compact_tuples(self):
+        done = Task.objects.create(
+            date=self.monday + timedelta(days=1), section=self.section, assignee_type='manager',
+            instructions='Report', is_completed=True, group_id=uuid.uuid4(),
+        )
+        log = VisitLog.objects.create(task=done, section=self.section, date=done.date)
+        Task.objects.create(date=self.monday + timedelta(days=7), instructions='Next week')
+        Task.objects.create(is_rolling=True, instructions='Rolling')
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['fields'], list(PLANNER_FIELDS))
+        self.assertEqual(data['tasks'], [
+            [self.task.pk, '2026-03-02', 'team', self.section.pk, None, False, False, None, 'Clear path'],
+            [done.pk, '2026-03-03', 'manager', self.section.pk, None, True, True, log.pk, 'Report'],
+        ])
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_unchanged_range_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_edit_delete_and_series_update_change_etag(self):
+        etags = [self.client.get(self.url)['ETag']]
+
+        self.task.instructions = 'Clear both paths'
+        self.task.save()
+        etags.append(self.client.get(self.url)['ETag'])
+
+        update_task_series(None, {'instructions': 'Bulk edit'}, current_task_id=self.task.pk)
+        etags.append(self.client.get(self.url)['ETag'])
+
+        Task.objects.filter(pk=self.task.pk).delete()
+        etags.append(self.client.get(self.url)['ETag'])
+
+        self.assertEqual(len(set(etags)), 4)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etags[0]).status_code, 200)
+
+    def test_visit_log_changes_change_etag(self):
+        etags = [self.client.get(self.url)['ETag']]
+
+        log = VisitLog.objects.create(task=self.task, section=self.section, date=self.monday)
+        etags.append(self.client.get(self.url)['ETag'])
+
+        # Deleting a log leaves its task row untouched.
+        log.delete()
+        etags.append(self.client.get(self.url)['ETag'])
+
+        self.assertNotEqual(etags[1], etags[0])
+        self.assertNotEqual(etags[2], etags[1])
+
+    def test_weekly_page_embeds_matching_etag(self):
+        VisitLog.objects.create(task=self.task, section=self.section, date=self.monday)
+        page = self.client.get(reverse('weekly_planner') + '?week=2026-03-04')
+        etag = self.client.get(self.url)['ETag']
+
+        self.assertEqual(page.context['planner_etag'], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=page.context['planner_etag']).status_code, 304)
+
+    def test_monthly_page_embeds_matching_etag(self):
+        VisitLog.objects.create(task=self.task, section=self.section, date=self.monday)
+        page = self.client.get(reverse('monthly_planner') + '?year=2026&month=3')
+        # March 2026 grid runs Monday 23 Feb to Sunday 5 Apr.
+        url = reverse('planner_data') + '?start=2026-02-23&end=2026-04-05'
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=page.context['planner_etag']).status_code, 304)
+
+    def test_invalid_ranges_are_rejected(self):
+        base = reverse('planner_data')
+        for query in ('?start=nope', '?start=2026-03-08&end=2026-03-02', '?start=2026-01-01&end=2026-06-01'):
+            with self.subTest(query=query):
+                response = self.client.get(base + query)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
@@ -0,0 +1,104 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Section, Task, TaskTemplate, TaskType
+from core.services.reference_data import planner_reference_data, reference_version
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'reference-data-tests'}}
+
+
+@override_settings(CACHES=LOCMEM)
+class PlannerReferenceDataTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.section = Section.objects.create(name='Ref Section', position=0)
+        self.task_type = TaskType.objects.create(name='Ref Type', code='ref')
+        self.team = TaskTemplate.objects.create(
+            name='Ref Team', task_type=self.task_type, assignee_type='team', default_instructions='t',
+        )
+        TaskTemplate.objects.create(
+            name='Ref Chair', task_type=self.task_type, assignee_type='chairperson', default_instructions='c',
+        )
+        TaskTemplate.objects.create(
+            name='Ref Retired', assignee_type='team', default_instructions='r', is_active=False,
+        )
+
+    def test_groups_active_templates_by_assignee(self):
+        data = planner_reference_data()
+        self.assertEqual(list(data['sections']), list(Section.objects.all()))
+        for assignee in ('team', 'manager', 'chairperson'):
+            self.assertEqual(
+                data[f'{assignee}_task_templates'],
+                list(TaskTemplate.objects.filter(assignee_type=assignee, is_active=True)),
+            )
+        team_names = [t.name for t in data['team_task_templates']]
+        self.assertIn('Ref Team', team_names)
+        self.assertNotIn('Ref Retired', team_names)
+
+    def test_second_call_is_served_from_cache(self):
+        planner_reference_data()
+        with CaptureQueriesContext(connection) as ctx:
+            planner_reference_data()
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_reference_changes_bump_version(self):
+        for change in (
+            lambda: Section.objects.create(name='Ref New', position=1),
+            lambda: TaskTemplate.objects.filter(pk=self.team.pk).first().save(),
+            lambda: self.task_type.save(),
+        ):
+            version = reference_version()
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            self.assertGreater(reference_version(), version)
+
+    def test_task_changes_keep_version(self):
+        version = reference_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(section=self.section, date='2026-03-02', instructions='no bump')
+        self.assertEqual(reference_version(), version)
+
+
+@override_settings(CACHES=LOCMEM)
+class PlannerModalFragmentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='modal', password='pw')
+        self.client = Client()
+        self.client.login(username='modal', password='pw')
+        self.template = TaskTemplate.objects.create(
+            name='Modal Template', assignee_type='team', default_instructions='Do it',
+        )
+
+    def test_planners_reuse_reference_data(self):
+        for name in ('weekly_planner', 'monthly_planner', 'todo_kanban'):
+            with self.subTest(page=name):
+                self.client.get(reverse(name))
+                with CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get(reverse(name))
+                sql = ' '.join(q['sql'] for q in ctx.captured_queries)
+                self.assertNotIn('FROM "core_tasktemplate"', sql)
+                self.assertNotIn('FROM "core_section"', sql)
+                self.assertContains(response, 'Modal Template')
+
+    def test_template_rename_refreshes_modal(self):
+        self.client.get(reverse('weekly_planner'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.template.name = 'Renamed Template'
+            self.template.save()
+
+        response = self.client.get(reverse('weekly_planner'))
+
+        self.assertContains(response, 'Renamed Template')
+        self.assertNotContains(response, 'Modal Template')
+
+    def test_modal_keeps_per_request_fields(self):
+        first = self.client.get(reverse('weekly_planner') + '?week=2026-03-02')
+        second = self.client.get(reverse('weekly_planner') + '?week=2026-03-09')
+        self.assertContains(first, 'value="/core/planner/weekly/?week=2026-03-02"')
+        self.assertContains(second, 'value="/core/planner/weekly/?week=2026-03-09"')
+        self.assertContains(second, 'csrfmiddlewaretoken')
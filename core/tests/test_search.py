@@ -0,0 +1,140 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import SearchDocument, Section, Task, TaskTemplate, TaskType, VisitLog
+from core.services.search import (
+    KIND_TASK, KIND_VISIT_LOG, LikeSearchBackend, find_missing_documents, matching_ids, rebuild_search_index,
+    search_terms,
+)
+from core.services.task_services import create_task_series, update_task_series
+from core.services.visit_log_services import base_visit_log_queryset
+
+
+def matches(kind, q):
+    return set(matching_ids(kind, q).values_list('object_id', flat=True))
+
+
+class SearchIndexSyncTests(TestCase):
+    def setUp(self):
+        self.task_type = TaskType.objects.create(name='Search Sweep', code='search_sweep')
+        self.template = TaskTemplate.objects.create(
+            name='Oxbow Clearing', task_type=self.task_type, assignee_type='team', default_instructions='x',
+        )
+        self.section = Section.objects.create(name='Kingfisher Reach', position=0)
+        self.task = Task.objects.create(
+            section=self.section, template=self.template, date=date(2026, 3, 2), instructions='Bag the reeds',
+        )
+        self.visit = VisitLog.objects.create(
+            section=self.section, task=self.task, date=date(2026, 3, 2), notes='Heron nesting upstream',
+        )
+
+    def body(self, kind, pk):
+        return SearchDocument.objects.get(kind=kind, object_id=pk).body
+
+    def test_documents_follow_saves(self):
+        self.assertEqual(self.body(KIND_TASK, self.task.pk), 'Bag the reeds Kingfisher Reach Oxbow Clearing Search Sweep')
+        self.assertEqual(self.body(KIND_VISIT_LOG, self.visit.pk), 'Heron nesting upstream Kingfisher Reach Oxbow Clearing')
+
+        self.visit.notes = 'Otter tracks'
+        self.visit.save()
+        self.assertEqual(matches(KIND_VISIT_LOG, 'otter'), {self.visit.pk})
+        self.assertEqual(matches(KIND_VISIT_LOG, 'heron'), set())
+
+    def test_reference_renames_reindex_dependents(self):
+        self.section.name = 'Weir Pool'
+        self.section.save()
+        self.template.name = 'Culvert Check'
+        self.template.save()
+        self.task_type.name = 'Inspection'
+        self.task_type.save()
+
+        self.assertEqual(matches(KIND_TASK, 'weir culvert inspection'), {self.task.pk})
+        self.assertEqual(matches(KIND_VISIT_LOG, 'weir culvert'), {self.visit.pk})
+        self.assertEqual(matches(KIND_TASK, 'kingfisher'), set())
+
+    def test_edits_that_change_no_indexed_text_skip_reindexing(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.template.is_active = False
+            self.template.save()
+            self.task_type.color_code = '#336699'
+            self.task_type.save()
+            self.task.is_completed = True
+            self.task.save()
+            self.task.is_completed = False
+            self.task.save(update_fields=['is_completed'])
+            self.section.color_code = '#112233'
+            self.section.save()
+        self.assertEqual([q['sql'] for q in ctx.captured_queries if 'core_searchdocument' in q['sql']], [])
+
+        self.task.instructions = 'Count the eels'
+        self.task.save()
+        self.assertEqual(matches(KIND_TASK, 'eels'), {self.task.pk})
+
+    def test_set_null_deletes_reindex_tasks(self):
+        self.template.delete()
+        self.assertEqual(self.body(KIND_TASK, self.task.pk), 'Bag the reeds Kingfisher Reach')
+        self.assertEqual(matches(KIND_VISIT_LOG, 'oxbow'), set())
+
+    def test_deletes_drop_documents(self):
+        self.section.delete()
+        self.assertFalse(SearchDocument.objects.filter(object_id__in=[self.task.pk, self.visit.pk]).exists())
+
+    def test_series_paths_index_without_signals(self):
+        count = create_task_series(
+            {'section': self.section, 'instructions': 'Series sandbag run', 'assignee_type': 'team'},
+            date(2026, 3, 2), date(2026, 3, 6),
+        )
+        series = Task.objects.filter(instructions='Series sandbag run')
+        self.assertEqual(matches(KIND_TASK, 'sandbag'), set(series.values_list('id', flat=True)))
+        self.assertEqual(len(matches(KIND_TASK, 'sandbag')), count)
+
+        update_task_series(series.first().group_id, {'instructions': 'Series gabion run'}, update_all=True)
+        self.assertEqual(len(matches(KIND_TASK, 'gabion')), count)
+        self.assertEqual(matches(KIND_TASK, 'sandbag'), set())
+
+    def test_rebuild_and_check(self):
+        SearchDocument.objects.filter(kind=KIND_TASK, object_id=self.task.pk).delete()
+        self.assertEqual(find_missing_documents()[KIND_TASK], 1)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_search_index', '--check', stdout=StringIO())
+
+        rebuild_search_index(batch_size=2)
+        self.assertEqual(find_missing_documents(), {KIND_VISIT_LOG: 0, KIND_TASK: 0})
+        self.assertEqual(matches(KIND_TASK, 'reeds'), {self.task.pk})
+
+
+class SearchMatchingTests(TestCase):
+    def setUp(self):
+        section = Section.objects.create(name='Lower Black River', position=0)
+        self.first = VisitLog.objects.create(section=section, date=date(2026, 3, 2), notes='Cleared 100% of the weir')
+        self.second = VisitLog.objects.create(section=section, date=date(2026, 3, 3), notes='Weirdly quiet day')
+
+    def test_terms_are_and_ed_word_prefixes(self):
+        self.assertEqual(matches(KIND_VISIT_LOG, 'weir'), {self.first.pk, self.second.pk})
+        self.assertEqual(matches(KIND_VISIT_LOG, 'weir cleared'), {self.first.pk})
+        self.assertEqual(matches(KIND_VISIT_LOG, 'LOW riv'), {self.first.pk, self.second.pk})
+        self.assertEqual(matches(KIND_VISIT_LOG, 'eir'), set())
+
+    def test_punctuation_is_not_query_syntax(self):
+        self.assertEqual(search_terms('weir" OR "quiet*'), ['weir', 'or', 'quiet'])
+        self.assertEqual(matches(KIND_VISIT_LOG, 'weir" OR "x'), set())
+        self.assertEqual(matches(KIND_VISIT_LOG, '100%'), {self.first.pk})
+        self.assertEqual(matches(KIND_VISIT_LOG, '%'), {self.first.pk})
+
+    def test_like_backend_agrees(self):
+        documents = SearchDocument.objects.filter(kind=KIND_VISIT_LOG)
+        found = LikeSearchBackend().match(documents, ['weir', 'cleared']).values_list('object_id', flat=True)
+        self.assertEqual(set(found), {self.first.pk})
+
+    def test_activity_log_filter_uses_index(self):
+        with CaptureQueriesContext(connection) as ctx:
+            ids = [v.pk for v in base_visit_log_queryset({'q': 'quiet'})]
+        self.assertEqual(ids, [self.second.pk])
+        sql = ctx.captured_queries[0]['sql']
+        self.assertIn('core_searchdocument', sql)
+        self.assertNotIn('LIKE', sql.upper())
@@ -0,0 +1,38 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from core.models import Section
+
+
+class SectionReorderTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(username='reorder', password='pw')
+        self.client = Client()
+        self.client.login(username='reorder', password='pw')
+        Section.objects.bulk_create([Section(name=f'Reach {i}', position=100 + i) for i in range(3)])
+        self.order = list(Section.objects.order_by('position', 'id').values_list('id', flat=True))
+
+    def post(self, order):
+        return self.client.post(reverse('section_reorder'), json.dumps({'order': order}), content_type='application/json')
+
+    def positions(self):
+        return list(Section.objects.order_by('position', 'id').values_list('id', flat=True))
+
+    def test_reorder_applies_new_positions_and_skips_unchanged_rows(self):
+        new_order = list(reversed(self.order))
+        response = self.post([str(pk) for pk in new_order])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.positions(), new_order)
+
+        response = self.post(new_order)
+        self.assertEqual(response.json()['changed'], 0)
+
+    def test_invalid_orders_change_nothing(self):
+        before = list(Section.objects.order_by('id').values_list('id', 'position'))
+        for order in (self.order[:-1], self.order + [self.order[0]], self.order + [999999], ['x'], 'abc'):
+            with self.subTest(order=order):
+                self.assertEqual(self.post(order).status_code, 400)
+        self.assertEqual(list(Section.objects.order_by('id').values_list('id', 'position')), before)
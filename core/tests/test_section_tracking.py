@@ -0,0 +1,81 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.forms import SectionForm
+from core.models import Section, SectionStageHistory
+
+BOUNDARY = {'type': 'Polygon', 'coordinates': [[[18.47, -33.95], [18.48, -33.95], [18.48, -33.96], [18.47, -33.95]]]}
+
+
+class SectionChangeTrackingTests(TestCase):
+    def setUp(self):
+        Section.objects.create(name='Tracked Reach', position=0, current_stage='clearing', boundary_data=BOUNDARY)
+        self.section = Section.objects.get(name='Tracked Reach')
+
+    def save_and_capture(self, section, **kwargs):
+        with CaptureQueriesContext(connection) as ctx:
+            section.save(**kwargs)
+        return [q['sql'] for q in ctx.captured_queries]
+
+    def test_creation_records_the_initial_stage(self):
+        self.assertEqual(list(self.section.stage_history.values_list('stage', flat=True)), ['clearing'])
+
+    def test_description_edit_writes_only_changed_columns_without_reading(self):
+        self.section.description = 'Reed bed along the left bank'
+        queries = self.save_and_capture(self.section)
+
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0].startswith('UPDATE'))
+        self.assertIn('"description"', queries[0])
+        self.assertNotIn('"boundary_data"', queries[0])
+        self.assertEqual(self.section.stage_history.count(), 1)
+
+    def test_stage_change_is_recorded_without_a_select(self):
+        self.section.current_stage = 'planting'
+        queries = self.save_and_capture(self.section)
+
+        self.assertFalse(any(q.startswith('SELECT') for q in queries))
+        self.assertEqual(list(self.section.stage_history.values_list('stage', flat=True)), ['planting', 'clearing'])
+
+        self.save_and_capture(self.section)  # saving again is not another change
+        self.assertEqual(self.section.stage_history.count(), 2)
+
+    def test_explicit_update_fields_are_respected(self):
+        self.section.current_stage = 'planting'
+        self.section.description = 'not saved'
+        self.section.save(update_fields=['description'])
+        self.assertEqual(SectionStageHistory.objects.filter(section=self.section, stage='planting').count(), 0)
+
+        self.section.save(update_fields=['current_stage'])
+        self.assertEqual(SectionStageHistory.objects.filter(section=self.section, stage='planting').count(), 1)
+
+    def test_refresh_from_db_resets_the_snapshot(self):
+        Section.objects.filter(pk=self.section.pk).update(current_stage='follow_up')
+        self.section.refresh_from_db()
+        self.save_and_capture(self.section)
+        self.assertEqual(self.section.stage_history.count(), 1)
+
+    def test_unloaded_instance_falls_back_to_reading_the_stage(self):
+        detached = Section(pk=self.section.pk, name='Tracked Reach', position=0, current_stage='community',
+                           created_at=self.section.created_at)
+        detached._state.adding = False
+        detached.save()
+        self.assertEqual(self.section.stage_history.first().stage, 'community')
+
+    def test_form_edit_writes_only_what_the_user_changed(self):
+        data = {
+            'name': 'Tracked Reach', 'color_code': self.section.color_code, 'current_stage': 'clearing',
+            'status': '', 'description': 'Edited in the form', 'position': 0,
+            'boundary_data': '{"type": "Polygon", "coordinates": [[[18.47, -33.95], [18.48, -33.95], '
+                             '[18.48, -33.96], [18.47, -33.95]]]}',
+            'center_point': '{}',
+        }
+        form = SectionForm(data, instance=self.section)
+        self.assertTrue(form.is_valid(), form.errors)
+        with CaptureQueriesContext(connection) as ctx:
+            form.save()
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "core_section"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"description"', updates[0])
+        self.assertNotIn('"boundary_data"', updates[0])
@@ -0,0 +1,107 @@
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Section, Task, TaskTemplate, TaskType
+from core.services.task_services import create_task_series
+from core.validation import validation_scope
+
+
+def existence_checks(ctx, table):
+    """Foreign-key validation queries (ForeignKey.validate() runs an exists())."""
+    return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith(f'SELECT 1 AS "a" FROM "{table}"')]
+
+
+class TaskValidationTests(TestCase):
+    def setUp(self):
+        self.section = Section.objects.create(name='Validated Reach', position=0)
+        self.task_type = TaskType.objects.create(name='Validation Type', code='validation')
+        self.template = TaskTemplate.objects.create(
+            name='Validation Template', task_type=self.task_type, assignee_type='team',
+        )
+        Task.objects.create(
+            date=date(2026, 3, 2), section=self.section, template=self.template,
+            assignee_type='team', instructions='Clear the reeds',
+        )
+        # Loaded fresh, so neither related object is cached on the instance.
+        self.task = Task.objects.get(instructions='Clear the reeds')
+
+    def test_toggling_completion_checks_no_foreign_keys(self):
+        self.task.is_completed = True
+        with CaptureQueriesContext(connection) as ctx:
+            self.task.save()
+
+        self.assertEqual(existence_checks(ctx, 'core_section'), [])
+        self.assertEqual(existence_checks(ctx, 'core_tasktemplate'), [])
+        self.task.refresh_from_db()
+        self.assertTrue(self.task.is_completed)
+
+    def test_changed_section_is_still_checked(self):
+        self.task.section_id = 999999
+        with self.assertRaises(ValidationError) as raised:
+            self.task.save()
+        self.assertIn('section', raised.exception.message_dict)
+
+    def test_invalid_unchanged_field_is_not_revalidated(self):
+        Task.objects.filter(pk=self.task.pk).update(assignee_type='bogus')
+        task = Task.objects.get(pk=self.task.pk)
+        task.is_completed = True
+        task.save()
+
+        task.assignee_type = 'not-a-choice'
+        with self.assertRaises(ValidationError):
+            task.save()
+
+    def test_clean_still_runs_on_every_save(self):
+        self.task.is_rolling = False
+        self.task.date = None
+        with self.assertRaises(ValidationError) as raised:
+            self.task.save()
+        self.assertIn('date', raised.exception.message_dict)
+
+    def test_scope_checks_each_row_once(self):
+        with validation_scope(), CaptureQueriesContext(connection) as ctx:
+            for day in (2, 3, 4):
+                Task.objects.create(
+                    date=date(2026, 3, day), section_id=self.section.pk, template_id=self.template.pk,
+                    assignee_type='team', instructions=f'Day {day}',
+                )
+        self.assertEqual(len(existence_checks(ctx, 'core_section')), 1)
+        self.assertEqual(len(existence_checks(ctx, 'core_tasktemplate')), 1)
+
+    def test_loaded_related_objects_need_no_check(self):
+        with CaptureQueriesContext(connection) as ctx:
+            Task.objects.create(
+                date=date(2026, 3, 5), section=self.section, template=self.template,
+                assignee_type='team', instructions='Cached relations',
+            )
+        self.assertEqual(existence_checks(ctx, 'core_section'), [])
+        self.assertEqual(existence_checks(ctx, 'core_tasktemplate'), [])
+
+
+class TaskSeriesValidationTests(TestCase):
+    def setUp(self):
+        self.section = Section.objects.create(name='Series Reach', position=0)
+
+    def test_series_validates_once_then_bulk_inserts(self):
+        data = {'section_id': self.section.pk, 'assignee_type': 'team', 'instructions': 'Daily sweep'}
+        with CaptureQueriesContext(connection) as ctx:
+            count = create_task_series(data, date(2026, 3, 2), date(2026, 5, 29), exclude_weekends=True)
+
+        self.assertEqual(count, 65)
+        self.assertEqual(Task.objects.filter(instructions='Daily sweep').count(), 65)
+        self.assertEqual(len(existence_checks(ctx, 'core_section')), 1)
+
+    def test_invalid_series_writes_nothing(self):
+        data = {'section_id': 999999, 'assignee_type': 'team', 'instructions': 'Nowhere'}
+        with self.assertRaises(ValidationError):
+            create_task_series(data, date(2026, 3, 2), date(2026, 3, 6))
+
+        data = {'section': self.section, 'assignee_type': 'robot', 'instructions': 'Bad assignee'}
+        with self.assertRaises(ValidationError):
+            create_task_series(data, date(2026, 3, 2), date(2026, 3, 6))
+
+        self.assertFalse(Task.objects.exists())
@@ -1,9 +1,12 @@
+import io
+
 from django.test import TestCase, Client
+from django.core.management import call_command
 from django.urls import reverse
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from core.models import Task, Section, TaskTemplate, TaskType
-from core.services.task_services import move_todo_task
+from core.services.task_services import TODO_GAP, move_todo_task, rolling_column
 import json
 
 class TodoKanbanTests(TestCase):
@@ -54,34 +57,97 @@ class TodoKanbanTests(TestCase):
         self.assertEqual(len(response.context['doing_tasks']), 1)
         self.assertEqual(len(response.context['done_tasks']), 2)
 
+    def column(self, status):
+        return list(rolling_column(status).values_list('instructions', flat=True))
+
     def test_move_todo_task_service(self):
-        """Test the move_todo_task service logic for re-indexing."""
+        """move_todo_task reorders within and across columns."""
         t1 = Task.objects.create(instructions="Task 1", is_rolling=True, todo_status='todo', todo_position=0)
         t2 = Task.objects.create(instructions="Task 2", is_rolling=True, todo_status='todo', todo_position=1)
         t3 = Task.objects.create(instructions="Task 3", is_rolling=True, todo_status='todo', todo_position=2)
-        
+
         # Move Task 3 to position 0
         move_todo_task(t3.id, 'todo', 0)
-        
-        t1.refresh_from_db()
-        t2.refresh_from_db()
-        t3.refresh_from_db()
-        
-        self.assertEqual(t3.todo_position, 0)
-        self.assertEqual(t1.todo_position, 1)
-        self.assertEqual(t2.todo_position, 2)
-        
+        self.assertEqual(self.column('todo'), ['Task 3', 'Task 1', 'Task 2'])
+
         # Move Task 1 to 'doing'
         move_todo_task(t1.id, 'doing', 0)
         t1.refresh_from_db()
         self.assertEqual(t1.todo_status, 'doing')
-        self.assertEqual(t1.todo_position, 0)
-        
-        # Check remaining tasks in 'todo'
-        t3.refresh_from_db()
-        t2.refresh_from_db()
-        self.assertEqual(t3.todo_position, 0)
-        self.assertEqual(t2.todo_position, 1)
+        self.assertEqual(self.column('doing'), ['Task 1'])
+        self.assertEqual(self.column('todo'), ['Task 3', 'Task 2'])
+
+    def test_move_writes_only_the_moved_row_when_there_is_a_gap(self):
+        for i in range(5):
+            Task.objects.create(instructions=f"Task {i}", is_rolling=True, todo_status='todo', todo_position=(i + 1) * TODO_GAP)
+        moved = Task.objects.get(instructions="Task 4")
+        before = dict(Task.objects.values_list('id', 'todo_position'))
+
+        move_todo_task(moved.id, 'todo', 1)
+
+        after = dict(Task.objects.values_list('id', 'todo_position'))
+        self.assertEqual([pk for pk in after if after[pk] != before[pk]], [moved.id])
+        self.assertEqual(self.column('todo'), ['Task 0', 'Task 4', 'Task 1', 'Task 2', 'Task 3'])
+
+    def test_exhausted_gap_rebalances_the_target_column(self):
+        for i in range(3):
+            Task.objects.create(instructions=f"Task {i}", is_rolling=True, todo_status='todo', todo_position=i)
+        newcomer = Task.objects.create(instructions="New", is_rolling=True, todo_status='doing')
+
+        move_todo_task(newcomer.id, 'todo', 2)
+
+        self.assertEqual(self.column('todo'), ['Task 0', 'Task 1', 'New', 'Task 2'])
+        positions = list(rolling_column('todo').values_list('todo_position', flat=True))
+        self.assertEqual(positions, [TODO_GAP, 2 * TODO_GAP, 3 * TODO_GAP, 4 * TODO_GAP])
+
+    def test_drop_in_place_and_past_the_end(self):
+        t1 = Task.objects.create(instructions="Task 1", is_rolling=True, todo_status='todo', todo_position=TODO_GAP)
+        Task.objects.create(instructions="Task 2", is_rolling=True, todo_status='todo', todo_position=2 * TODO_GAP)
+
+        with self.assertNumQueries(4):  # savepoint pair, lock, neighbours; no UPDATE
+            move_todo_task(t1.id, 'todo', 0)
+        move_todo_task(t1.id, 'todo', 99)
+        self.assertEqual(self.column('todo'), ['Task 2', 'Task 1'])
+        t1.refresh_from_db()
+        self.assertEqual(t1.todo_position, 3 * TODO_GAP)
+
+    def test_new_rolling_tasks_leave_a_gap_below_the_last_card(self):
+        for name in ('First', 'Second'):
+            self.client.post(reverse('task_create'), {
+                'instructions': name, 'assignee_type': 'team', 'is_rolling': 'on', 'todo_status': 'todo',
+            })
+        self.assertEqual(list(rolling_column('todo').values_list('instructions', 'todo_position')),
+                         [('First', TODO_GAP), ('Second', 2 * TODO_GAP)])
+
+        first = Task.objects.get(instructions='First')
+        self.client.post(reverse('task_edit', args=[first.pk]), {
+            'instructions': 'First', 'assignee_type': 'team', 'is_rolling': 'on', 'todo_status': 'doing',
+        })
+        first.refresh_from_db()
+        self.assertEqual((first.todo_status, first.todo_position), ('doing', TODO_GAP))
+
+        # Dropping between the two cards now writes one row, no rebalance.
+        second = Task.objects.get(instructions='Second')
+        move_todo_task(first.id, 'todo', 0)
+        move_todo_task(Task.objects.create(instructions='Third', is_rolling=True, todo_position=3 * TODO_GAP).id, 'todo', 1)
+        self.assertEqual(self.column('todo'), ['First', 'Third', 'Second'])
+        second.refresh_from_db()
+        self.assertEqual(second.todo_position, 2 * TODO_GAP)
+
+    def test_migration_spreads_dense_positions(self):
+        from importlib import import_module
+        from django.apps import apps
+        spread = import_module('core.migrations.0044_spread_todo_positions').spread_todo_columns
+
+        for i, name in enumerate(['A', 'B', 'C']):
+            Task.objects.create(instructions=name, is_rolling=True, todo_status='todo', todo_position=i)
+        Task.objects.create(instructions='D', is_rolling=True, todo_status='done', todo_position=0)
+        spread(apps, None)
+
+        self.assertEqual(list(rolling_column('todo').values_list('todo_position', flat=True)),
+                         [TODO_GAP, 2 * TODO_GAP, 3 * TODO_GAP])
+        self.assertEqual(self.column('todo'), ['A', 'B', 'C'])
+        self.assertEqual(Task.objects.get(instructions='D').todo_position, TODO_GAP)
 
     def test_todo_update_api(self):
         """Test the AJAX API endpoint for Kanban updates."""
@@ -119,3 +185,98 @@ class TodoKanbanTests(TestCase):
         response = self.client.get(reverse('daily_agenda'))
         self.assertEqual(len(response.context['tasks']), 1)
         self.assertEqual(response.context['tasks'][0].instructions, "Scheduled")
+
+
+class RebalanceTodoPositionsCommandTests(TestCase):
+    def test_crowded_columns_are_spread_out(self):
+        for i in range(3):
+            Task.objects.create(instructions=f"Todo {i}", is_rolling=True, todo_status='todo', todo_position=i)
+        Task.objects.create(instructions="Doing", is_rolling=True, todo_status='doing', todo_position=5)
+
+        out = io.StringIO()
+        call_command('rebalance_todo_positions', '--check', stdout=out)
+        self.assertIn('Crowded columns: todo', out.getvalue())
+
+        call_command('rebalance_todo_positions', stdout=io.StringIO())
+        self.assertEqual(
+            list(rolling_column('todo').values_list('todo_position', flat=True)),
+            [TODO_GAP, 2 * TODO_GAP, 3 * TODO_GAP],
+        )
+        self.assertEqual(Task.objects.get(instructions="Doing").todo_position, 5)
+
+
+class TodoMoveBatchTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+        User.objects.create_user(username='batcher', password='password')
+        self.client = Client()
+        self.client.login(username='batcher', password='password')
+        self.todo = [
+            Task.objects.create(instructions=f"Todo {i}", is_rolling=True, todo_status='todo', todo_position=(i + 1) * TODO_GAP)
+            for i in range(4)
+        ]
+        self.doing = Task.objects.create(instructions="Doing 0", is_rolling=True, todo_status='doing', todo_position=TODO_GAP)
+
+    def versions(self):
+        return self.client.get(reverse('todo_kanban')).context['column_versions']
+
+    def post(self, moves, versions):
+        return self.client.post(reverse('todo_moves'), json.dumps({'moves': moves, 'versions': versions}),
+                                content_type='application/json')
+
+    def column(self, status):
+        return list(rolling_column(status).values_list('instructions', flat=True))
+
+    def test_batch_applies_moves_in_order_with_one_update(self):
+        versions = self.versions()
+        moves = [
+            {'task_id': self.todo[3].id, 'status': 'todo', 'index': 0},
+            {'task_id': self.todo[0].id, 'status': 'doing', 'index': 1},
+            {'task_id': str(self.doing.id), 'status': 'done', 'index': 0},
+        ]
+        with self.assertNumQueries(6):  # session, user, savepoint pair, board lock, one bulk UPDATE
+            response = self.post(moves, versions)
+
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(self.column('todo'), ['Todo 3', 'Todo 1', 'Todo 2'])
+        self.assertEqual(self.column('doing'), ['Todo 0'])
+        self.assertEqual(self.column('done'), ['Doing 0'])
+        self.assertEqual(
+            {(t['id'], t['status']) for t in payload['tasks']},
+            {(self.todo[3].id, 'todo'), (self.todo[0].id, 'doing'), (self.doing.id, 'done')},
+        )
+        self.assertEqual(payload['versions'], self.versions())
+        self.assertNotEqual(payload['versions']['todo'], versions['todo'])
+
+    def test_stale_column_gets_409_and_nothing_is_written(self):
+        versions = self.versions()
+        move_todo_task(self.todo[1].id, 'todo', 0)
+        before = list(Task.objects.order_by('id').values_list('todo_status', 'todo_position'))
+
+        response = self.post([{'task_id': self.todo[2].id, 'status': 'doing', 'index': 0}], versions)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['versions'], self.versions())
+        self.assertEqual(list(Task.objects.order_by('id').values_list('todo_status', 'todo_position')), before)
+
+    def test_untouched_columns_may_be_stale(self):
+        versions = self.versions()
+        Task.objects.create(instructions="Done elsewhere", is_rolling=True, todo_status='done')
+        response = self.post([{'task_id': self.todo[0].id, 'status': 'doing', 'index': 0}], versions)
+        self.assertEqual(response.status_code, 200)
+
+    def test_full_column_is_spread_within_the_batch(self):
+        Task.objects.filter(todo_status='todo').update(todo_position=0)
+        response = self.post([{'task_id': self.doing.id, 'status': 'todo', 'index': 2}], self.versions())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.column('todo'), ['Todo 0', 'Todo 1', 'Doing 0', 'Todo 2', 'Todo 3'])
+        self.assertEqual(len(response.json()['tasks']), 5)
+
+    def test_bad_requests_are_rejected(self):
+        versions = self.versions()
+        self.assertEqual(self.post([{'task_id': self.todo[0].id, 'status': 'later', 'index': 0}], versions).status_code, 400)
+        self.assertEqual(self.post([{'task_id': self.todo[0].id, 'status': 'doing', 'index': 0}], {}).status_code, 400)
+        planned = Task.objects.create(instructions="Planned", date=timezone.now().date())
+        self.assertEqual(self.post([{'task_id': planned.id, 'status': 'todo', 'index': 0}], versions).status_code, 400)
+        self.assertEqual(self.client.get(reverse('todo_moves')).status_code, 405)
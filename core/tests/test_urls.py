@@ -11,12 +11,17 @@ How it works:
 - GET each one as an authenticated superuser and require HTTP < 400.
 """
 
-from django.test import TestCase, Client
+import shutil
+import tempfile
+
+from django.test import TestCase, Client, override_settings
 from django.urls import get_resolver, reverse, URLPattern, URLResolver, NoReverseMatch
 from django.contrib.auth.models import User
 from django.utils import timezone
 
 from core.models import Section, Task, TaskTemplate, TaskType, VisitLog
+from core.services.export_jobs import claim_next_job, enqueue_export, run_job
+from core.services.photo_uploads import start_upload
 
 
 class UrlSmokeTests(TestCase):
@@ -27,6 +32,10 @@ class UrlSmokeTests(TestCase):
         'task_complete',
         'task_reopen',
         'todo_update',
+        'todo_moves',
+        'export_job_create',
+        'export_job_cancel',
+        'photo_upload_start',
     }
 
     # Names deliberately excluded because they are not part of the app's own
@@ -61,6 +70,17 @@ class UrlSmokeTests(TestCase):
             notes='Smoke visit',
         )
 
+        # A finished export job so its status and download URLs have a file.
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root, PHOTO_UPLOAD_DIR=media_root,
+                                  EXPORT_JOB_DIR=f'{media_root}/jobs')
+        media.enable()
+        self.addCleanup(media.disable)
+        enqueue_export('planner', {}, self.user)
+        self.export_job = run_job(claim_next_job())
+        self.photo_upload = start_upload(self.user, 'smoke.jpg', 10)
+
         # Map of URL name -> kwargs for every named URL that takes path args.
         # Adding a new parameterised URL means adding an entry here.
         self.kwargs_by_name = {
@@ -74,6 +94,9 @@ class UrlSmokeTests(TestCase):
             'task_template_delete': {'pk': self.template.pk},
             'task_type_edit': {'pk': self.task_type.pk},
             'task_type_delete': {'pk': self.task_type.pk},
+            'export_job_status': {'pk': self.export_job.pk},
+            'export_job_download': {'pk': self.export_job.pk},
+            'photo_upload': {'pk': self.photo_upload.pk},
         }
 
     def _iter_url_names(self, urlpatterns=None, prefix=''):
@@ -1,4 +1,6 @@
+import csv
 import io
+import json
 from datetime import date
 
 import openpyxl
@@ -13,6 +15,7 @@ from core.services.visit_log_services import (
     visit_log_total,
     metric_total_display,
 )
+from core.services.visit_log_stream import visit_log_rows
 
 
 class VisitLogServiceTests(TestCase):
@@ -148,7 +151,7 @@ class VisitLogExportViewTests(TestCase):
         resp = self.client.get(reverse('visit_log_export'), {'metric': 'litter'})
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        wb = openpyxl.load_workbook(io.BytesIO(resp.content))
+        wb = openpyxl.load_workbook(io.BytesIO(b''.join(resp.streaming_content)))
         ws = wb.active
         rows = list(ws.iter_rows(values_only=True))
         self.assertEqual(rows[0][0], 'Date')
@@ -156,3 +159,35 @@ class VisitLogExportViewTests(TestCase):
         self.assertEqual(len(rows) - 1, 1)  # only the litter log
         self.assertEqual(rows[1][5], 5)     # general bags
         self.assertEqual(rows[1][6], 3)     # recyclable bags
+
+    def test_csv_streams_one_row_per_visit(self):
+        resp = self.client.get(reverse('visit_log_export'), {'format': 'csv', 'sort': 'date'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('.csv"', resp['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(resp.streaming_content).decode())))
+        self.assertEqual([r['notes'] for r in rows], ['export litter', 'export plant'])
+        self.assertEqual((rows[0]['general_bags'], rows[0]['recyclable_bags']), ('5', '3'))
+        self.assertEqual((rows[0]['task'], rows[0]['section']), ('Unplanned', 'Delta'))
+        self.assertEqual(rows[1]['plants'], 'Restio: 10')
+
+    def test_ndjson_keeps_every_metric_under_a_species_filter(self):
+        Metric.objects.create(visit=VisitLog.objects.get(notes='export plant'), metric_type='weed', label='Kikuyu', value=2)
+        resp = self.client.get(reverse('visit_log_export'), {'format': 'ndjson', 'species': 'Restio'})
+        self.assertEqual(resp['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        lines = b''.join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual(row['date'], '2026-08-02')
+        self.assertEqual((row['plants'], row['weeds']), ({'Restio': 10}, {'Kikuyu': 2}))
+
+    def test_rows_come_from_one_query(self):
+        for day in range(3, 13):
+            visit = VisitLog.objects.create(section=self.section, date=date(2026, 8, day), notes='more')
+            Metric.objects.create(visit=visit, metric_type='plant', label='Restio', value=day)
+            Metric.objects.create(visit=visit, metric_type='plant', label='Restio', value=1)
+        with self.assertNumQueries(1):
+            rows = list(visit_log_rows({}, chunk_size=4))
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(rows[0]['plants'], {'Restio': 13})  # newest first, labels summed
@@ -0,0 +1,37 @@
+"""Upload handlers that hash each file while the request body streams in.
+
+Drop-in replacements for Django's two default handlers (FILE_UPLOAD_HANDLERS
+in settings). The handler that stores a chunk also feeds it to SHA-256, so
+the finished UploadedFile carries `sha256` without a second read of the
+file. services.photo_blobs uses it to deduplicate photos.
+"""
+import hashlib
+
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+
+class Sha256Mixin:
+    def new_file(self, *args, **kwargs):
+        self._sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        passed_on = super().receive_data_chunk(raw_data, start)
+        if passed_on is None:
+            # This handler kept the chunk, so it is part of its file.
+            self._sha256.update(raw_data)
+        return passed_on
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self._sha256.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(Sha256Mixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(Sha256Mixin, TemporaryFileUploadHandler):
+    pass
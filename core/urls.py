@@ -17,6 +17,7 @@ urlpatterns = [
     path('planner/', views.WeeklyPlannerView.as_view(), name='weekly_planner'),
     path('planner/weekly/', views.WeeklyPlannerView.as_view(), name='weekly_planner'),
     path('planner/monthly/', views.MonthlyPlannerView.as_view(), name='monthly_planner'),
+    path('planner/data/', views.planner_data_view, name='planner_data'),
     path('tasks/create/', views.TaskCreateView.as_view(), name='task_create'),
     path('tasks/<int:pk>/edit/', views.TaskUpdateView.as_view(), name='task_edit'),
     path('tasks/<int:pk>/delete/', views.TaskDeleteView.as_view(), name='task_delete'),
@@ -30,6 +31,7 @@ urlpatterns = [
     # Kanban Board URLs
     path('todo/', views.TodoKanbanView.as_view(), name='todo_kanban'),
     path('todo/update/', views.TodoUpdateAPI.as_view(), name='todo_update'),
+    path('todo/moves/', views.todo_moves, name='todo_moves'),
     
     # Visit Log URLs
     path('visit-logs/', views.VisitLogListView.as_view(), name='visit_log_list'),
@@ -40,6 +42,14 @@ urlpatterns = [
     path('export/', views.DataExportView.as_view(), name='data_export'),
     path('export/planner/', views.PlannerExportView.as_view(), name='planner_export'),
     path('export/visit-logs/', views.VisitLogExportView.as_view(), name='visit_log_export'),
+    path('export/jobs/', views.export_job_create, name='export_job_create'),
+    path('export/jobs/<int:pk>/', views.export_job_status, name='export_job_status'),
+    path('export/jobs/<int:pk>/download/', views.export_job_download, name='export_job_download'),
+    path('export/jobs/<int:pk>/cancel/', views.export_job_cancel, name='export_job_cancel'),
+
+    # Chunked photo uploads (visit-log photo formset)
+    path('photos/uploads/', views.photo_upload_start, name='photo_upload_start'),
+    path('photos/uploads/<uuid:pk>/', views.photo_upload, name='photo_upload'),
 
     # Insights page (temporary, for Sarah review)
     path('insights/', views.planner_insights_view, name='planner_insights'),
@@ -0,0 +1,72 @@
+"""Cached foreign-key existence checks for model validation.
+
+Model.full_clean() validates a ForeignKey by querying the related table,
+every time. Task.clean_fields() routes its foreign keys through
+validate_foreign_key() instead, which skips the query when the row is
+already known to exist:
+
+  * the related instance is cached on the object and was loaded from the
+    database (a ModelForm's ModelChoiceField has just fetched it), or
+  * the same (model, pk) already passed inside the current validation_scope().
+
+ValidationScopeMiddleware opens one scope per request, so a request that
+validates the same section or template many times queries it once. Outside a
+scope (shell, management commands) only the first rule applies. The database
+foreign-key constraint still guards against a row deleted meanwhile.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+_known_rows: ContextVar[Optional[set]] = ContextVar('known_rows', default=None)
+
+
+@contextmanager
+def validation_scope():
+    """Remember validated foreign keys until the block exits (nested scopes share the outer one)."""
+    if _known_rows.get() is not None:
+        yield
+        return
+    token = _known_rows.set(set())
+    try:
+        yield
+    finally:
+        _known_rows.reset(token)
+
+
+def validate_foreign_key(instance, field) -> None:
+    """
+    Data Flow Contract
+    -------------------
+    In:  instance — model object; field — one of its ForeignKey fields.
+    Out: None; the field's attribute is normalised as Field.clean() would.
+    Side Effects: at most one existence query, none when the row is known.
+    Fails: ValidationError exactly as Field.clean() raises it.
+    """
+    raw = getattr(instance, field.attname)
+    if field.blank and raw in field.empty_values:
+        return
+    value = field.to_python(raw)
+    key = (field.related_model._meta.label_lower, value)
+    known = _known_rows.get()
+
+    related = field.get_cached_value(instance, None) if field.is_cached(instance) else None
+    if (known is not None and key in known) or (
+        related is not None and related.pk == value and not related._state.adding
+    ):
+        setattr(instance, field.attname, value)
+    else:
+        setattr(instance, field.attname, field.clean(raw, instance))
+    if known is not None:
+        known.add(key)
+
+
+class ValidationScopeMiddleware:
+    """Run each request inside validation_scope()."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with validation_scope():
+            return self.get_response(request)
@@ -7,47 +7,56 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponse
-from datetime import datetime, timedelta, date
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, QueryDict, StreamingHttpResponse
+from datetime import datetime, timedelta
 import calendar
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 import json
-import io
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from collections import defaultdict
-from .models import Section, Task, TaskTemplate, TaskType, VisitLog, Metric, Photo, SectionStageHistory, TaskCompletionHistory
+from .models import ExportJob, Section, Task, TaskTemplate, TaskType, VisitLog, Photo, PhotoUpload, SectionStageHistory, TaskCompletionHistory
 from .forms import SectionForm, TaskForm, TaskTemplateForm, TaskTypeForm, VisitLogForm, MetricFormSet, PhotoFormSet
-from .services.task_services import create_task_series, update_task_series, delete_task_series, move_todo_task, resolve_task_type, mark_task_completed, search_planner_tasks
-from .services.visit_log_services import base_visit_log_queryset, build_visit_log_queryset, visit_log_total, metric_total_display
-
+from .services.section_services import reorder_sections
+from .services.task_services import create_task_series, update_task_series, delete_task_series, move_todo_task, apply_todo_moves, todo_column_versions, TodoVersionConflict, resolve_task_type, mark_task_completed, search_planner_tasks, build_planner_grid, with_visit_log_id
+from .services.visit_log_services import base_visit_log_queryset, build_visit_log_queryset, visit_log_sort_keys, visit_log_total, metric_total_display
+from .services.visit_log_stream import csv_lines, ndjson_lines, visit_log_rows
+from .services.keyset_pagination import capped_count, keyset_page
+from .services.metric_rollups import deferred_rollup_refresh
+from .services.metric_stats import metric_stats
+from .services.dashboard_cache import cached_blocks
+from .services.reference_data import planner_reference_data
+from .services.excel_export import (
+    XLSX_CONTENT_TYPE, build_planner_workbook, build_project_workbook, build_visit_log_workbook, workbook_response,
+)
+from .services.export_cache import cached_export_response
+from .services.export_jobs import cancel_job, enqueue_export, job_status
+from .services.photo_uploads import UPLOAD_CHUNK_SIZE, UploadError, UploadOffsetMismatch, append_chunk, start_upload
+from .services.planner_data import PLANNER_FIELDS, parse_planner_range, planner_etag_for_range, planner_etag_for_tasks, planner_rows
+
+from django.core.exceptions import ValidationError
 from django.db.models import Sum, Q, Count
 from django.utils import timezone
 from django.contrib import messages
 from django.http import HttpResponseRedirect, JsonResponse, HttpResponseForbidden
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
 
 
 @login_required
 def section_reorder_view(request):
-    """AJAX endpoint to reorder sections by updating their position field."""
+    """AJAX endpoint to reorder sections: POST {"order": [every section id, upstream first]}."""
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
-            section_order = data.get('order', [])
-            
-            # Update each section's position
-            for index, section_id in enumerate(section_order):
-                Section.objects.filter(id=section_id).update(position=index)
-            
-            return JsonResponse({'success': True, 'message': 'Order updated successfully'})
-        except Exception as e:
+            changed = reorder_sections(data.get('order', []))
+        except (ValueError, AttributeError) as e:
             return JsonResponse({'success': False, 'error': str(e)}, status=400)
-    
+        return JsonResponse({'success': True, 'message': 'Order updated successfully', 'changed': changed})
+
     return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
 
 class TodoKanbanView(LoginRequiredMixin, ListView):
@@ -56,7 +65,7 @@ class TodoKanbanView(LoginRequiredMixin, ListView):
     context_object_name = 'tasks'
 
     def get_queryset(self):
-        return Task.objects.filter(is_rolling=True).select_related('section', 'template', 'template__task_type').order_by('todo_position')
+        return Task.objects.filter(is_rolling=True).select_related('section', 'template', 'template__task_type').order_by('todo_position', 'id')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -66,12 +75,11 @@ class TodoKanbanView(LoginRequiredMixin, ListView):
         context['todo_tasks'] = [t for t in tasks if t.todo_status == 'todo']
         context['doing_tasks'] = [t for t in tasks if t.todo_status == 'doing']
         context['done_tasks'] = [t for t in tasks if t.todo_status == 'done']
+        # Sent back with batched moves (todo_moves) to detect a stale board.
+        context['column_versions'] = todo_column_versions(tasks)
         
-        # For task creation modal
-        context['sections'] = Section.objects.all()
-        context['team_task_templates'] = TaskTemplate.objects.filter(assignee_type='team', is_active=True)
-        context['manager_task_templates'] = TaskTemplate.objects.filter(assignee_type='manager', is_active=True)
-        context['chairperson_task_templates'] = TaskTemplate.objects.filter(assignee_type='chairperson', is_active=True)
+        # For task creation modal (cached until a Section/TaskTemplate/TaskType changes)
+        context.update(planner_reference_data())
         context['task_form'] = TaskForm(initial={'is_rolling': True})
         
         return context
@@ -106,6 +114,30 @@ class TodoUpdateAPI(LoginRequiredMixin, View):
             logger.exception(f'Kanban move failed: task={task_id if "task_id" in dir() else "?"}')
             return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
+@login_required
+@require_POST
+def todo_moves(request):
+    """Apply a batch of Kanban drags in one transaction.
+
+    JSON body: {"moves": [{"task_id", "status", "index"}, ...],
+    "versions": {status: token}} with the tokens the board was rendered (or
+    last updated) with. Answers {"success", "tasks": [{id, status,
+    position}], "versions"}; 409 with the current versions if a column the
+    moves touch changed meanwhile, so the client can reload it.
+    """
+    try:
+        data = json.loads(request.body)
+        moves, versions = data['moves'], data['versions']
+        if not isinstance(moves, list) or not isinstance(versions, dict):
+            raise ValueError('moves must be a list and versions an object.')
+        result = apply_todo_moves(moves, versions)
+    except TodoVersionConflict as exc:
+        return JsonResponse({'success': False, 'error': str(exc), 'versions': exc.versions}, status=409)
+    except (ValueError, KeyError, TypeError) as exc:
+        return JsonResponse({'success': False, 'error': str(exc)}, status=400)
+    return JsonResponse({'success': True, **result})
+
+
 class GlobalDashboardView(LoginRequiredMixin, ListView):
     model = VisitLog
     template_name = 'core/dashboard.html'
@@ -116,19 +148,53 @@ class GlobalDashboardView(LoginRequiredMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
-        # Aggregated Stats
-        metrics = Metric.objects.all()
-        total_bags_general = metrics.filter(metric_type='litter_general').aggregate(total=Sum('value'))['total'] or 0
-        total_bags_recyclable = metrics.filter(metric_type='litter_recyclable').aggregate(total=Sum('value'))['total'] or 0
-        total_plants = metrics.filter(metric_type='plant').aggregate(total=Sum('value'))['total'] or 0
-        total_weeds = metrics.filter(metric_type='weed').aggregate(total=Sum('value'))['total'] or 0
+        today = timezone.now().date()
+
+        # Each block is cached under the global data version (bumped by
+        # core.signals on any VisitLog/Metric/Task/Section change). Blocks that
+        # depend on "today" carry the date in their name.
+        blocks = cached_blocks({
+            'impact_stats': self._impact_stats,
+            'stage_distribution': self._stage_distribution,
+            f'active_sections:{today}': lambda: self._active_sections(today),
+            f'weekly_activity:{today}': lambda: self._weekly_activity(today),
+        })
+        for block in blocks.values():
+            context.update(block)
+
+        context['task_type_tags'] = {
+            'litter_run': {'label': 'Litter', 'classes': 'bg-red-50 text-red-600 border-red-100'},
+            'weeding': {'label': 'Weed', 'classes': 'bg-amber-50 text-amber-600 border-amber-100'},
+            'planting': {'label': 'Plant', 'classes': 'bg-green-50 text-green-600 border-green-100'},
+            'admin': {'label': 'Admin', 'classes': 'bg-indigo-50 text-indigo-600 border-indigo-100'},
+        }
+        return context
+
+    def _impact_stats(self):
+        # Aggregated Stats: totals, species counts and top-5 species in two queries
+        stats = metric_stats(top_n=5)
+        totals = stats['totals']
+        total_bags_general = totals['litter_general']
+        total_bags_recyclable = totals['litter_recyclable']
 
         # Participant Count
         total_participants = VisitLog.objects.aggregate(Sum('participant_count'))['participant_count__sum'] or 0
 
+        return {
+            'total_bags_general': total_bags_general,
+            'total_bags_recyclable': total_bags_recyclable,
+            'total_plants': totals['plant'],
+            'total_weeds': totals['weed'],
+            'total_bags': total_bags_general + total_bags_recyclable,
+            'total_participants': total_participants,
+            'total_plant_species': stats['species_counts']['plant'],
+            'plant_species_breakdown': stats['top_species']['plant'],
+            'total_weed_species': stats['species_counts']['weed'],
+            'weed_species_breakdown': stats['top_species']['weed'],
+        }
+
+    def _stage_distribution(self):
         # Section Stage Distribution
-        from django.db.models import Count
         stage_counts = Section.objects.values('current_stage').annotate(count=Count('id'))
         
         # Convert to a more usable dict with display names
@@ -155,23 +221,12 @@ class GlobalDashboardView(LoginRequiredMixin, ListView):
         for stage in stage_distribution:
             stage['percentage'] = int(stage['count'] / max_count * 100) if max_count > 0 else 0
 
-        # Plant Species Breakdown
-        plant_metrics = Metric.objects.filter(metric_type='plant')
-        total_plant_species = plant_metrics.exclude(label='').values('label').distinct().count()
-        plant_species_breakdown = list(plant_metrics.exclude(label='').values('label').annotate(
-            total=Sum('value')
-        ).order_by('-total')[:5])
-
-        # Weed Species Breakdown
-        weed_metrics = Metric.objects.filter(metric_type='weed')
-        total_weed_species = weed_metrics.exclude(label='').values('label').distinct().count()
-        weed_species_breakdown = list(weed_metrics.exclude(label='').values('label').annotate(
-            total=Sum('value')
-        ).order_by('-total')[:5])
+        return {'stage_distribution': stage_distribution}
 
+    def _active_sections(self, today):
         # Active Sections (with activity in last 30 days)
-        from django.db.models import Max, Count
-        thirty_days_ago = timezone.now().date() - timedelta(days=30)
+        from django.db.models import Max
+        thirty_days_ago = today - timedelta(days=30)
         active_sections = Section.objects.filter(
             visitlog__date__gte=thirty_days_ago
         ).annotate(
@@ -179,8 +234,10 @@ class GlobalDashboardView(LoginRequiredMixin, ListView):
             visit_count=Count('visitlog')
         ).distinct().order_by('-last_visit_date')[:10]
 
+        return {'active_sections': list(active_sections)}
+
+    def _weekly_activity(self, today):
         # Weekly planner activity indicators (calendar week Mon-Sun)
-        today = timezone.now().date()
         monday = today - timedelta(days=today.weekday())
         sunday = monday + timedelta(days=6)
         weekly_tasks = Task.objects.filter(
@@ -209,31 +266,10 @@ class GlobalDashboardView(LoginRequiredMixin, ListView):
             for section_id, codes in section_weekly_activity.items()
         }
 
-        task_type_tags = {
-            'litter_run': {'label': 'Litter', 'classes': 'bg-red-50 text-red-600 border-red-100'},
-            'weeding': {'label': 'Weed', 'classes': 'bg-amber-50 text-amber-600 border-amber-100'},
-            'planting': {'label': 'Plant', 'classes': 'bg-green-50 text-green-600 border-green-100'},
-            'admin': {'label': 'Admin', 'classes': 'bg-indigo-50 text-indigo-600 border-indigo-100'},
-        }
-
-        context.update({
-            'total_bags_general': total_bags_general,
-            'total_bags_recyclable': total_bags_recyclable,
-            'total_plants': total_plants,
-            'total_weeds': total_weeds,
-            'total_bags': total_bags_general + total_bags_recyclable,
-            'total_participants': total_participants,
-            'stage_distribution': stage_distribution,
-            'total_plant_species': total_plant_species,
-            'plant_species_breakdown': plant_species_breakdown,
-            'total_weed_species': total_weed_species,
-            'weed_species_breakdown': weed_species_breakdown,
-            'active_sections': active_sections,
+        return {
             'section_weekly_activity': section_weekly_activity,
             'stage_weekly_activity': stage_weekly_activity,
-            'task_type_tags': task_type_tags,
-        })
-        return context
+        }
 
 class SectionListView(LoginRequiredMixin, ListView):
     model = Section
@@ -278,15 +314,16 @@ class SectionDetailView(LoginRequiredMixin, DetailView):
         today = timezone.now().date()
 
         # Cumulative Metrics
-        metrics = Metric.objects.filter(visit__section=section)
-        total_plants = metrics.filter(metric_type='plant').aggregate(total=Sum('value'))['total'] or 0
-        total_weeds = metrics.filter(metric_type='weed').aggregate(total=Sum('value'))['total'] or 0
+        stats = metric_stats(section, top_n=3, include_unlabeled=True, metric_types=('plant', 'weed'))
+        totals = stats['totals']
+        total_plants = totals['plant']
+        total_weeds = totals['weed']
 
         # Days Worked — distinct planned dates up to today (no type filter, excludes rolling/future)
         days_worked = Task.objects.filter(section=section, is_rolling=False, date__lte=today).values('date').distinct().count()
 
         # Top 3 Weeding Species
-        top_weeds = metrics.filter(metric_type='weed').values('label').annotate(total=Sum('value')).order_by('-total')[:3]
+        top_weeds = stats['top_species']['weed']
         top_weeds_list = []
         weeds_sum_top3 = 0
         for w in top_weeds:
@@ -299,7 +336,7 @@ class SectionDetailView(LoginRequiredMixin, DetailView):
         weeding_summary = ", ".join(top_weeds_list) if top_weeds_list else "None recorded"
 
         # Timeline queries with prefetching
-        past_visits = VisitLog.objects.filter(section=section).prefetch_related('metrics', 'photos').order_by('-date', '-created_at')
+        past_visits = VisitLog.objects.filter(section=section).select_related('task').prefetch_related('metrics', 'photos').order_by('-date', '-created_at')
 
         # Stage History
         stage_history = SectionStageHistory.objects.filter(section=section).order_by('-changed_at')
@@ -311,7 +348,7 @@ class SectionDetailView(LoginRequiredMixin, DetailView):
         else:
             days_in_stage = (timezone.now() - section.created_at).days
 
-        today_tasks = Task.objects.filter(section=section, date=today, is_rolling=False)
+        today_tasks = with_visit_log_id(Task.objects.filter(section=section, date=today, is_rolling=False))
         future_tasks = Task.objects.filter(section=section, date__gt=today, is_completed=False, is_rolling=False).order_by('date')
 
         # Combine visits and stage history for timeline
@@ -392,11 +429,12 @@ class WeeklyPlannerView(LoginRequiredMixin, ListView):
 
         end_of_week = start_of_week + timedelta(days=6)
         # select_related avoids N+1 queries for the section badge and template
-        # name rendered per task cell in the planner grid.
-        return Task.objects.filter(
+        # name rendered per task cell in the planner grid; visit_log_id backs
+        # the "Edit log" link on completed cards.
+        return with_visit_log_id(Task.objects.filter(
             date__range=[start_of_week, end_of_week],
             is_rolling=False,
-        ).select_related('section', 'template')
+        ).select_related('section', 'template'))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -423,14 +461,20 @@ class WeeklyPlannerView(LoginRequiredMixin, ListView):
             week_days.append(day)
 
         context['week_days'] = week_days
-        context['sections'] = Section.objects.all()
+        # Bucket tasks into (day, assignee) cells once; the template walks
+        # each row's cells instead of rescanning every task per cell.
+        assignee_types = [code for code, _ in Task.ASSIGNEE_TYPE_CHOICES]
+        grid = build_planner_grid(context['tasks'], week_days, assignee_types)
+        context['planner_rows'] = {
+            assignee: [(day, grid[(day, assignee)]) for day in week_days]
+            for assignee in assignee_types
+        }
+        context['planner_etag'] = planner_etag_for_tasks(week_days[0], week_days[-1], context['tasks'])
         context['task_form'] = TaskForm()
         context['today'] = today
 
-        # Only show active templates
-        context['team_task_templates'] = TaskTemplate.objects.filter(assignee_type='team', is_active=True)
-        context['manager_task_templates'] = TaskTemplate.objects.filter(assignee_type='manager', is_active=True)
-        context['chairperson_task_templates'] = TaskTemplate.objects.filter(assignee_type='chairperson', is_active=True)
+        # Sections and active templates for the modal (cached; see reference_data)
+        context.update(planner_reference_data())
 
         # Navigation dates for prev/next week
         context['prev_week'] = start_of_week - timedelta(days=7)
@@ -470,10 +514,11 @@ class MonthlyPlannerView(LoginRequiredMixin, ListView):
         first_day = month_days[0][0]
         last_day = month_days[-1][-1]
 
-        return Task.objects.filter(
+        # visit_log_id is part of the planner ETag (services.planner_data).
+        return with_visit_log_id(Task.objects.filter(
             date__range=[first_day, last_day],
             is_rolling=False
-        ).select_related('section')
+        ).select_related('section'))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -510,6 +555,7 @@ class MonthlyPlannerView(LoginRequiredMixin, ListView):
         for task in context['tasks']:
             tasks_by_date[task.date].append(task)
         context['tasks_by_date'] = dict(tasks_by_date)
+        context['planner_etag'] = planner_etag_for_tasks(month_weeks[0][0], month_weeks[-1][-1], context['tasks'])
 
         # Navigation dates
         # Previous month
@@ -533,11 +579,8 @@ class MonthlyPlannerView(LoginRequiredMixin, ListView):
         context['is_current_month'] = (today.year == year and today.month == month)
         context['today'] = today
 
-        # For task creation modal
-        context['sections'] = Section.objects.all()
-        context['team_task_templates'] = TaskTemplate.objects.filter(assignee_type='team', is_active=True)
-        context['manager_task_templates'] = TaskTemplate.objects.filter(assignee_type='manager', is_active=True)
-        context['chairperson_task_templates'] = TaskTemplate.objects.filter(assignee_type='chairperson', is_active=True)
+        # For task creation modal (cached; see reference_data)
+        context.update(planner_reference_data())
 
         return context
 
@@ -559,12 +602,12 @@ class DailyAgendaView(LoginRequiredMixin, ListView):
     def get_queryset(self):
         target_date = self.get_target_date()
         # select_related('section') avoids N+1 queries for the section badge
-        # rendered per task; prefetch_related('visitlog_set') avoids the per-task
-        # reverse lookup for completed tasks' edit-log link.
-        queryset = Task.objects.filter(
+        # rendered per task; visit_log_id replaces the per-task reverse lookup
+        # for completed tasks' edit-log link.
+        queryset = with_visit_log_id(Task.objects.filter(
             date=target_date,
             is_rolling=False,
-        ).select_related('section').prefetch_related('visitlog_set')
+        ).select_related('section'))
         try:
             return queryset.order_by('assignee_type', 'section__name')
         except Exception:
@@ -634,6 +677,9 @@ class TaskCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
             except ValueError as e:
                 form.add_error('end_date', str(e))
                 return self.form_invalid(form)
+            except ValidationError as e:
+                form.add_error(None, e.messages)
+                return self.form_invalid(form)
         
         return super().form_valid(form)
 
@@ -775,7 +821,8 @@ class VisitLogCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
 
         if self.request.method == 'POST':
             context['metric_formset'] = MetricFormSet(self.request.POST)
-            context['photo_formset'] = PhotoFormSet(self.request.POST, self.request.FILES)
+            context['photo_formset'] = PhotoFormSet(self.request.POST, self.request.FILES,
+                                                    form_kwargs={'user': self.request.user})
         else:
             context['metric_formset'] = MetricFormSet()
             context['photo_formset'] = PhotoFormSet()
@@ -800,11 +847,14 @@ class VisitLogCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
         if not photo_formset.is_valid():
             return self.form_invalid(form)
 
-        response = super().form_valid(form)
+        # Rollup buckets touched by the log and its metrics are refreshed once,
+        # after the whole formset is written.
+        with deferred_rollup_refresh():
+            response = super().form_valid(form)
 
-        if not is_admin:
-            metric_formset.instance = self.object
-            metric_formset.save()
+            if not is_admin:
+                metric_formset.instance = self.object
+                metric_formset.save()
 
         photo_formset.instance = self.object
         for photo_form in photo_formset.forms:
@@ -836,7 +886,8 @@ class VisitLogUpdateView(LoginRequiredMixin, SuccessMessageMixin, UpdateView):
 
         if self.request.method == 'POST':
             context['metric_formset'] = MetricFormSet(self.request.POST, instance=visit_log)
-            context['photo_formset'] = PhotoFormSet(self.request.POST, self.request.FILES, instance=visit_log)
+            context['photo_formset'] = PhotoFormSet(self.request.POST, self.request.FILES, instance=visit_log,
+                                                    form_kwargs={'user': self.request.user})
         else:
             context['metric_formset'] = MetricFormSet(instance=visit_log)
             context['photo_formset'] = PhotoFormSet(instance=visit_log)
@@ -856,10 +907,13 @@ class VisitLogUpdateView(LoginRequiredMixin, SuccessMessageMixin, UpdateView):
         if not photo_formset.is_valid():
             return self.form_invalid(form)
 
-        response = super().form_valid(form)
+        # Rollup buckets touched by the log and its metrics are refreshed once,
+        # after the whole formset is written.
+        with deferred_rollup_refresh():
+            response = super().form_valid(form)
 
-        if not is_admin:
-            metric_formset.save()
+            if not is_admin:
+                metric_formset.save()
 
         # Ensure section is set on photos
         for photo_form in photo_formset.forms:
@@ -957,6 +1011,34 @@ def task_search_view(request):
     return JsonResponse({'results': search_planner_tasks(q)})
 
 
+@login_required
+@require_GET
+def planner_data_view(request):
+    """Compact JSON task feed for a planner date range, with conditional GET.
+
+    Returns 304 when the client's If-None-Match still matches the range's
+    ETag, so an unchanged week costs one aggregate query and no body.
+    """
+    try:
+        start, end = parse_planner_range(request.GET)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    etag = planner_etag_for_range(start, end)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'fields': PLANNER_FIELDS,
+            'tasks': planner_rows(start, end),
+        })
+    response['ETag'] = etag
+    # Always revalidate; the ETag makes that cheap.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 # Task Template Management Views
 class TaskTemplateListView(LoginRequiredMixin, ListView):
     model = TaskTemplate
@@ -1006,12 +1088,23 @@ class VisitLogListView(LoginRequiredMixin, ListView):
     template_name = 'core/visit_log_list.html'
     context_object_name = 'visit_logs'
     paginate_by = 25
+    # Cap for the opt-in approximate total (?total=approx) in cursor mode.
+    approx_total_cap = 1000
+
+    def cursor_mode(self):
+        """?paging=cursor switches to keyset pagination (no OFFSET, no COUNT)."""
+        return self.request.GET.get('paging') == 'cursor'
+
+    def get_paginate_by(self, queryset):
+        return None if self.cursor_mode() else self.paginate_by
 
     def get_queryset(self):
         return build_visit_log_queryset(self.request.GET)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        if self.cursor_mode():
+            context.update(self.get_cursor_context(context['object_list']))
         metric = self.request.GET.get('metric')
         species = self.request.GET.get('species')
         context['sections'] = Section.objects.all()
@@ -1029,10 +1122,33 @@ class VisitLogListView(LoginRequiredMixin, ListView):
 
         # Preserve query parameters for pagination
         query_params = self.request.GET.copy()
-        if 'page' in query_params:
-            del query_params['page']
+        for key in ('page', 'after', 'before'):
+            query_params.pop(key, None)
         context['query_params'] = query_params.urlencode()
-        
+
+        return context
+
+    def get_cursor_context(self, queryset):
+        """Fetch one keyset page; deep pages cost the same as the first."""
+        keys = visit_log_sort_keys(self.request.GET.get('sort'))
+        try:
+            page = keyset_page(
+                queryset, keys, self.paginate_by,
+                after=self.request.GET.get('after'), before=self.request.GET.get('before'),
+            )
+        except ValueError:
+            # Stale or tampered cursor (e.g. the sort changed): start over.
+            page = keyset_page(queryset, keys, self.paginate_by)
+        context = {
+            'cursor_page': page,
+            'object_list': page.items,
+            self.context_object_name: page.items,
+            'paging_mode': 'cursor',
+        }
+        if self.request.GET.get('total') == 'approx':
+            count, exact = capped_count(queryset, self.approx_total_cap)
+            context['approx_total'] = count
+            context['approx_total_exact'] = exact
         return context
 
 
@@ -1081,401 +1197,103 @@ class TaskTypeDeleteView(LoginRequiredMixin, DeleteView):
 
 class DataExportView(LoginRequiredMixin, View):
     """View to generate a comprehensive multi-sheet Excel export."""
-    
+
     def get(self, request, *args, **kwargs):
-        # Create an in-memory output file for the new workbook
-        output = io.BytesIO()
-        wb = openpyxl.Workbook()
-        
-        # Styles
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="166534", end_color="166534", fill_type="solid")
-        center_aligned = Alignment(horizontal='center')
-        border = Border(
-            left=Side(style='thin'), 
-            right=Side(style='thin'), 
-            top=Side(style='thin'), 
-            bottom=Side(style='thin')
-        )
+        # Write-only workbook streamed from a temp file; see services.excel_export.
+        wb, filename = build_project_workbook()
+        return workbook_response(wb, filename)
 
-        # --- SHEET 1: PROJECT OVERVIEW ---
-        ws_overview = wb.active
-        ws_overview.title = "Project Overview"
-        
-        ws_overview.append(["Liesbeek River Rehabilitation - Project Overview"])
-        ws_overview.append(["Generated on", timezone.now().strftime("%Y-%m-%d %H:%M")])
-        ws_overview.append([])
-        
-        # Aggregated Metrics Table
-        ws_overview.append(["Project-Wide Totals"])
-        headers = ["Metric", "Value", "Unit"]
-        ws_overview.append(headers)
-        
-        # Apply header styles
-        for cell in ws_overview[ws_overview.max_row]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.border = border
-
-        metrics = Metric.objects.all()
-        total_bags_general = metrics.filter(metric_type='litter_general').aggregate(total=Sum('value'))['total'] or 0
-        total_bags_recyclable = metrics.filter(metric_type='litter_recyclable').aggregate(total=Sum('value'))['total'] or 0
-        total_plants = metrics.filter(metric_type='plant').aggregate(total=Sum('value'))['total'] or 0
-        total_weeds = metrics.filter(metric_type='weed').aggregate(total=Sum('value'))['total'] or 0
-        total_visits = VisitLog.objects.count()
-        total_sections = Section.objects.count()
-
-        rows = [
-            ["Total Sections", total_sections, "Sections"],
-            ["Total Activity Logs", total_visits, "Logs"],
-            ["General Litter Collected", total_bags_general, "Bags"],
-            ["Recyclable Litter Collected", total_bags_recyclable, "Bags"],
-            ["Total Litter Collected", total_bags_general + total_bags_recyclable, "Bags"],
-            ["Total Plants Planted", total_plants, "Plants"],
-            ["Total Weeding/Removal", total_weeds, "Units/Sessions"],
-        ]
-        for row in rows:
-            ws_overview.append(row)
-            for cell in ws_overview[ws_overview.max_row]:
-                cell.border = border
-        
-        ws_overview.append([])
-        
-        # Species Breakdowns
-        # Planting
-        ws_overview.append(["Top Planting Species"])
-        ws_overview.append(["Species", "Total Planted"])
-        for cell in ws_overview[ws_overview.max_row]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.border = border
-            
-        plant_breakdown = Metric.objects.filter(metric_type='plant').values('label').annotate(total=Sum('value')).order_by('-total')[:10]
-        for item in plant_breakdown:
-            ws_overview.append([item['label'] or "Unlabeled", item['total']])
-            for cell in ws_overview[ws_overview.max_row]:
-                cell.border = border
 
-        ws_overview.append([])
-        
-        # Weeding
-        ws_overview.append(["Top Weeding/Removal Species"])
-        ws_overview.append(["Species", "Total Removed"])
-        for cell in ws_overview[ws_overview.max_row]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.border = border
-            
-        weed_breakdown = Metric.objects.filter(metric_type='weed').values('label').annotate(total=Sum('value')).order_by('-total')[:10]
-        for item in weed_breakdown:
-            ws_overview.append([item['label'] or "Unlabeled", item['total']])
-            for cell in ws_overview[ws_overview.max_row]:
-                cell.border = border
-
-        # Column widths
-        ws_overview.column_dimensions['A'].width = 30
-        ws_overview.column_dimensions['B'].width = 15
-        ws_overview.column_dimensions['C'].width = 15
-
-        # --- PER-SECTION SHEETS ---
-        sections = Section.objects.all().order_by('position', 'name')
-        
-        for section in sections:
-            # Sheet names must be <= 31 chars
-            safe_name = (section.name[:28] + '..') if len(section.name) > 31 else section.name
-            ws = wb.create_sheet(title=safe_name)
-            
-            # Section Header
-            ws.append([f"Section Detail: {section.name}"])
-            ws.append(["Current Stage", section.get_current_stage_display()])
-            ws.append(["Current Status", str(section.status) if section.status else "N/A"])
-            ws.append([])
-            
-            # --- Visit Logs Table ---
-            ws.append(["Activity Logs"])
-            log_headers = ["Date", "Notes", "Metrics Summary", "Photos Count"]
-            ws.append(log_headers)
-            for cell in ws[ws.max_row]:
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.border = border
-            
-            logs = VisitLog.objects.filter(section=section).prefetch_related('metrics', 'photos').order_by('-date')
-            for log in logs:
-                # Summarize metrics
-                m_parts = []
-                for m in log.metrics.all():
-                    m_parts.append(f"{m.get_metric_type_display()}: {m.value} ({m.label})")
-                m_summary = "; ".join(m_parts)
-                
-                ws.append([
-                    log.date,
-                    log.notes,
-                    m_summary,
-                    log.photos.count()
-                ])
-                for cell in ws[ws.max_row]:
-                    cell.border = border
-                    if ws.max_row > 1: # Wrap text for notes and metrics
-                        ws.cell(row=ws.max_row, column=2).alignment = Alignment(wrap_text=True)
-                        ws.cell(row=ws.max_row, column=3).alignment = Alignment(wrap_text=True)
-            
-            ws.append([])
-            
-            # --- Planned Tasks Table ---
-            ws.append(["Planned Tasks History"])
-            task_headers = ["Date", "Assignee", "Task Type", "Task Template", "Instructions", "Completed?"]
-            ws.append(task_headers)
-            for cell in ws[ws.max_row]:
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.border = border
-                
-            tasks = Task.objects.filter(section=section).select_related('template__task_type').order_by('-date')
-            for task in tasks:
-                ws.append([
-                    task.date,
-                    task.get_assignee_type_display(),
-                    str(task.template.task_type.name) if (task.template and task.template.task_type) else "Custom",
-                    task.template.name if task.template else "Custom",
-                    task.instructions,
-                    "Yes" if task.is_completed else "No"
-                ])
-                for cell in ws[ws.max_row]:
-                    cell.border = border
-                    ws.cell(row=ws.max_row, column=5).alignment = Alignment(wrap_text=True)
-
-            # Adjust column widths for per-section sheets
-            ws.column_dimensions['A'].width = 15
-            ws.column_dimensions['B'].width = 12
-            ws.column_dimensions['C'].width = 20
-            ws.column_dimensions['D'].width = 25
-            ws.column_dimensions['E'].width = 45
-            ws.column_dimensions['F'].width = 12
-
-        # Finalize
-        wb.save(output)
-        output.seek(0)
-        
-        filename = f"Liesbeek_River_Report_{timezone.now().strftime('%Y-%m-%d')}.xlsx"
-        response = HttpResponse(
-            output,
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename={filename}'
-        
-        return response
+# format= value -> (line generator, content type, file extension)
+VISIT_LOG_STREAM_FORMATS = {
+    'csv': (csv_lines, 'text/csv; charset=utf-8', 'csv'),
+    'ndjson': (ndjson_lines, 'application/x-ndjson; charset=utf-8', 'ndjson'),
+}
 
 
 class VisitLogExportView(LoginRequiredMixin, View):
-    """Single-sheet Excel export of the filtered Master Activity Log."""
+    """Excel export of the filtered Master Activity Log.
+
+    `format=csv` / `format=ndjson` stream flat rows instead (one query,
+    see services.visit_log_stream); anything else returns the .xlsx.
+    """
 
     def get(self, request, *args, **kwargs):
-        queryset = build_visit_log_queryset(request.GET)
-
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = 'Visit Logs'
-
-        headers = ['Date', 'Section', 'Task', 'Task Type', 'Participants',
-                   'General Bags', 'Recyclable Bags', 'Plants', 'Weeds', 'Notes']
-        ws.append(headers)
-        header_font = Font(bold=True, color='FFFFFF')
-        header_fill = PatternFill(start_color='166534', end_color='166534', fill_type='solid')
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-
-        for visit in queryset:
-            metrics = list(visit.metrics.all())
-            general = sum(m.value for m in metrics if m.metric_type == 'litter_general')
-            recyclable = sum(m.value for m in metrics if m.metric_type == 'litter_recyclable')
-            plants = '; '.join(f"{m.label or 'Unlabeled'}: {m.value}" for m in metrics if m.metric_type == 'plant')
-            weeds = '; '.join(f"{m.label or 'Unlabeled'}: {m.value}" for m in metrics if m.metric_type == 'weed')
-            task = visit.task
-            task_name = task.template.name if (task and task.template) else 'Unplanned'
-            task_type = task.template.task_type.name if (task and task.template and task.template.task_type) else ''
-            ws.append([
-                visit.date.isoformat(),
-                visit.section.name if visit.section else 'General',
-                task_name,
-                task_type,
-                visit.participant_count,
-                general,
-                recyclable,
-                plants,
-                weeds,
-                visit.notes,
-            ])
-
-        for col in 'ABCDEFGHIJ':
-            ws.column_dimensions[col].width = 20
-
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        filename = f"visit_logs_{timezone.now().strftime('%Y%m%d_%H%M')}.xlsx"
-        response = HttpResponse(
-            output,
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename={filename}'
-        return response
+        fmt = request.GET.get('format')
+        if fmt in VISIT_LOG_STREAM_FORMATS:
+            lines, content_type, extension = VISIT_LOG_STREAM_FORMATS[fmt]
+            response = StreamingHttpResponse(lines(visit_log_rows(request.GET)), content_type=content_type)
+            filename = f"visit_logs_{timezone.now().strftime('%Y%m%d_%H%M')}.{extension}"
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+        # Served from the on-disk export cache when filters and data are unchanged.
+        return cached_export_response(request, 'visit_logs', build_visit_log_workbook)
 
 
 class PlannerExportView(LoginRequiredMixin, View):
     """Export the weekly or monthly planner view to Excel."""
 
     def get(self, request, *args, **kwargs):
-        week_str = request.GET.get('week')
-        year_str = request.GET.get('year')
-        month_str = request.GET.get('month')
-        today = timezone.now().date()
+        return cached_export_response(request, 'planner', build_planner_workbook)
 
-        if week_str:
-            # Weekly export
-            try:
-                week_date = datetime.strptime(week_str, '%Y-%m-%d').date()
-                start = week_date - timedelta(days=week_date.weekday())
-            except (ValueError, TypeError):
-                start = today - timedelta(days=today.weekday())
-            end = start + timedelta(days=6)
-            title = f'Weekly Planner: {start.strftime("%d %b")} – {end.strftime("%d %b %Y")}'
-        elif year_str and month_str:
-            # Monthly export
-            try:
-                year = int(year_str)
-                month = int(month_str)
-            except (ValueError, TypeError):
-                year = today.year
-                month = today.month
-            start = date(year, month, 1)
-            # Last day of month
-            if month == 12:
-                end = date(year, month, 31)
-            else:
-                end = date(year, month + 1, 1) - timedelta(days=1)
-            title = f'Monthly Planner: {calendar.month_name[month]} {year}'
-        else:
-            # Default to current week
-            start = today - timedelta(days=today.weekday())
-            end = start + timedelta(days=6)
-            title = f'Weekly Planner: {start.strftime("%d %b")} – {end.strftime("%d %b %Y")}'
 
-        tasks = Task.objects.filter(
-            date__range=[start, end],
-            is_rolling=False
-        ).select_related('section', 'template__task_type').order_by('date', 'section__position')
-
-        # Build Excel
-        output = io.BytesIO()
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = 'Planner Export'
-
-        header_font = Font(bold=True, color='FFFFFF')
-        header_fill = PatternFill(start_color='166534', end_color='166534', fill_type='solid')
-        header_align = Alignment(horizontal='center')
-        border = Border(
-            left=Side(style='thin'), right=Side(style='thin'),
-            top=Side(style='thin'), bottom=Side(style='thin'),
-        )
+def _own_export_job(request, pk):
+    """ExportJob `pk` if the user requested it (staff see every job), else 404."""
+    jobs = ExportJob.objects.all()
+    if not request.user.is_staff:
+        jobs = jobs.filter(requested_by=request.user)
+    return get_object_or_404(jobs, pk=pk)
+
+
+def _export_job_payload(job):
+    payload = job_status(job)
+    payload['status_url'] = reverse('export_job_status', args=[job.pk])
+    payload['cancel_url'] = reverse('export_job_cancel', args=[job.pk])
+    payload['download_url'] = reverse('export_job_download', args=[job.pk]) if job.status == job.STATUS_DONE else None
+    return payload
+
+
+@login_required
+@require_POST
+def export_job_create(request):
+    """Queue an export for run_export_worker.
+
+    POST `kind` (data / visit_logs / planner) and `params`, the query string
+    the synchronous export link would have used. Answers 202 with the job's
+    status payload; the browser then polls `status_url`.
+    """
+    params = QueryDict(request.POST.get('params', '')).dict()
+    try:
+        job = enqueue_export(request.POST.get('kind', ''), params, request.user)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse(_export_job_payload(job), status=202)
+
+
+@login_required
+@require_GET
+def export_job_status(request, pk):
+    response = JsonResponse(_export_job_payload(_own_export_job(request, pk)))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
-        # Title
-        ws.append([title])
-        ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=8)
-        ws.cell(row=1, column=1).font = Font(bold=True, size=14, color='166534')
-        ws.append([f'Generated: {today.strftime("%Y-%m-%d %H:%M")}'])
-        ws.append([f'Tasks: {tasks.count()}'])
-        ws.append([])
-
-        # Headers
-        headers = ['Date', 'Day', 'Section', 'Assignee', 'Task Type', 'Template', 'Instructions', 'Done?']
-        ws.append(headers)
-        for col_idx, cell in enumerate(ws[ws.max_row], 1):
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_align
-            cell.border = border
-
-        # Task rows
-        for task in tasks:
-            row = [
-                task.date,
-                task.date.strftime('%A') if task.date else '',
-                task.section.name if task.section else '—',
-                task.get_assignee_type_display(),
-                task.template.task_type.name if (task.template and task.template.task_type) else 'Custom',
-                task.template.name if task.template else 'Custom',
-                task.instructions,
-                '✓' if task.is_completed else '',
-            ]
-            ws.append(row)
-            for col_idx, cell in enumerate(ws[ws.max_row], 1):
-                cell.border = border
-                if col_idx == 7:
-                    cell.alignment = Alignment(wrap_text=True)
-
-        # Column widths
-        widths = [12, 14, 20, 14, 18, 25, 50, 8]
-        for i, w in enumerate(widths, 1):
-            ws.column_dimensions[openpyxl.utils.get_column_letter(i)].width = w
-
-        # Section summary sheet
-        ws2 = wb.create_sheet(title='By Section')
-        sections = Section.objects.filter(
-            task__date__range=[start, end], task__is_rolling=False
-        ).distinct().order_by('position')
-
-        ws2.append(['Tasks by Section'])
-        ws2.merge_cells(start_row=1, start_column=1, end_row=1, end_column=3)
-        ws2.cell(row=1, column=1).font = Font(bold=True, size=12, color='166534')
-        ws2.append([])
-
-        for section in sections:
-            section_tasks = tasks.filter(section=section)
-            ws2.append([section.name, f'{section_tasks.count()} tasks', ''])
-            ws2.cell(row=ws2.max_row, column=1).font = Font(bold=True)
-
-            sub_headers = ['Date', 'Day', 'Assignee', 'Task Type', 'Instructions', 'Done?']
-            ws2.append(sub_headers)
-            for cell in ws2[ws2.max_row]:
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.border = border
-
-            for task in section_tasks:
-                row = [
-                    task.date,
-                    task.date.strftime('%A') if task.date else '',
-                    task.get_assignee_type_display(),
-                    task.template.task_type.name if (task.template and task.template.task_type) else 'Custom',
-                    task.instructions,
-                    '✓' if task.is_completed else '',
-                ]
-                ws2.append(row)
-                for cell in ws2[ws2.max_row]:
-                    cell.border = border
-            ws2.append([])
-
-        ws2.column_dimensions['A'].width = 14
-        ws2.column_dimensions['B'].width = 14
-        ws2.column_dimensions['C'].width = 16
-        ws2.column_dimensions['D'].width = 20
-        ws2.column_dimensions['E'].width = 55
-        ws2.column_dimensions['F'].width = 8
-
-        wb.save(output)
-        output.seek(0)
-
-        safe_title = title.replace(' ', '_').replace('–', '-').replace(':', '')
-        filename = f'River_{safe_title}_{today.strftime("%Y%m%d")}.xlsx'
-        response = HttpResponse(
-            output,
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
+
+@login_required
+@require_POST
+def export_job_cancel(request, pk):
+    """Drop a job the browser stopped waiting for (it fell back to the synchronous export)."""
+    cancelled = cancel_job(_own_export_job(request, pk))
+    return JsonResponse({'cancelled': cancelled})
+
+
+@login_required
+@require_GET
+def export_job_download(request, pk):
+    job = _own_export_job(request, pk)
+    if job.status != job.STATUS_DONE or not job.artifact:
+        raise Http404('Export is not ready.')
+    return FileResponse(job.artifact.open('rb'), as_attachment=True, filename=job.filename,
+                        content_type=XLSX_CONTENT_TYPE)
 
 
 def planner_insights_view(request):
@@ -1491,3 +1309,51 @@ def planner_insights_view(request):
     path = os.path.join(settings.BASE_DIR, 'product', 'designs', filename)
     with open(path, encoding='utf-8') as f:
         return HttpResponse(f.read())
+
+
+def _photo_upload_payload(upload):
+    return {
+        'id': str(upload.pk),
+        'offset': upload.received,
+        'size': upload.size,
+        'complete': upload.is_complete,
+        'chunk_size': UPLOAD_CHUNK_SIZE,
+        'url': reverse('photo_upload', args=[upload.pk]),
+    }
+
+
+@login_required
+@require_POST
+def photo_upload_start(request):
+    """Open a chunked photo upload (services.photo_uploads).
+
+    JSON body: {"filename", "size", "content_type"}. Answers 201 with the
+    session (`id`, `offset`, `chunk_size`, `url` to PUT chunks to).
+    """
+    try:
+        data = json.loads(request.body)
+        upload = start_upload(request.user, data['filename'], data['size'], data.get('content_type', ''))
+    except (ValueError, KeyError, TypeError) as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse(_photo_upload_payload(upload), status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'PUT'])
+def photo_upload(request, pk):
+    """GET: where to resume. PUT: append the raw body at the `Upload-Offset` header.
+
+    A chunk at the wrong offset gets 409 with the stored `offset`, so a
+    client that lost a response resumes from there instead of starting over.
+    """
+    upload = get_object_or_404(PhotoUpload, pk=pk, user=request.user)
+    if request.method == 'PUT':
+        try:
+            upload = append_chunk(upload.pk, int(request.headers.get('Upload-Offset', '')), request.body)
+        except UploadOffsetMismatch as exc:
+            return JsonResponse({'error': str(exc), 'offset': exc.offset}, status=409)
+        except (UploadError, ValueError) as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+    response = JsonResponse(_photo_upload_payload(upload))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
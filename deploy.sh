@@ -31,6 +31,7 @@ pip install -r requirements.txt
 # 5. Run Database Migrations
 echo "🗄️ Applying database migrations..."
 python manage.py migrate
+python manage.py createcachetable
 
 # 6. Collect Static Files
 echo "🎨 Collecting static files..."
@@ -68,6 +68,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.validation.ValidationScopeMiddleware',
 ]
 
 ROOT_URLCONF = 'river.urls'
@@ -99,6 +100,23 @@ DATABASES = {
 }
 
 
+# Cache
+# Holds the versioned dashboard blocks (core/services/dashboard_cache.py) and
+# planner reference data. It must be shared by all gunicorn workers so they
+# agree on the data version; a per-process locmem cache would keep serving
+# stale blocks from the workers that did not handle the write. The default
+# is the database table that deploy.sh creates (python manage.py
+# createcachetable). Alternatives:
+#   CACHE_URL=filecache:///var/tmp/river_cache
+#   CACHE_URL=locmemcache://                   (single process only)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='dbcache://river_cache'),
+}
+
+# Share of dashboard requests that update the hit/miss counters
+# (manage.py dashboard_cache_stats); 1.0 counts every request.
+DASHBOARD_CACHE_STATS_SAMPLE = env.float('DASHBOARD_CACHE_STATS_SAMPLE', default=0.01)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -145,10 +163,29 @@ STATIC_ROOT = env('STATIC_ROOT', default=BASE_DIR / 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# On-disk cache of generated visit-log/planner exports (core.services.export_cache).
+# Kept outside MEDIA_ROOT: nginx serves /media/ without authentication.
+# Least recently downloaded files are evicted past EXPORT_CACHE_MAX_BYTES; 0 disables.
+EXPORT_CACHE_DIR = env('EXPORT_CACHE_DIR', default=str(BASE_DIR / 'export_cache'))
+EXPORT_CACHE_MAX_BYTES = env.int('EXPORT_CACHE_MAX_BYTES', default=200 * 1024 * 1024)
+# Finished export jobs (core.storage.ExportJobStorage), same reasoning: only
+# export_job_download serves them, after checking who asked for the export.
+EXPORT_JOB_DIR = env('EXPORT_JOB_DIR', default=str(BASE_DIR / 'export_jobs'))
+
 # File Upload Settings
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5 MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5 MB
 FILE_UPLOAD_PERMISSIONS = 0o644
+# Django's default handlers, plus a SHA-256 of each file (photo deduplication).
+FILE_UPLOAD_HANDLERS = [
+    'core.upload_handlers.HashingMemoryFileUploadHandler',
+    'core.upload_handlers.HashingTemporaryFileUploadHandler',
+]
+
+# Chunked photo uploads (core.services.photo_uploads) are assembled here
+# before the visit-log form moves them into MEDIA_ROOT. Not served by nginx.
+PHOTO_UPLOAD_DIR = env('PHOTO_UPLOAD_DIR', default=str(BASE_DIR / 'upload_tmp'))
+PHOTO_UPLOAD_MAX_BYTES = env.int('PHOTO_UPLOAD_MAX_BYTES', default=25 * 1024 * 1024)
 
 # Security Settings (Enable these in production with HTTPS)
 # SECURE_SSL_REDIRECT = True
@@ -180,3 +217,10 @@ LOGOUT_REDIRECT_URL = '/admin/login/'
 # throwaway credentials. Production is unaffected (sys.argv has no 'test').
 if 'test' in sys.argv:
     PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    # The test DB rolls back between tests but a real cache does not, so a
+    # cached dashboard block could leak into the next test. Cache tests opt
+    # back in with override_settings(CACHES=...).
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+    # Same reasoning for exported files on disk; export cache tests opt in
+    # with a temporary EXPORT_CACHE_DIR.
+    EXPORT_CACHE_MAX_BYTES = 0
@@ -0,0 +1,94 @@
+// Background exports.
+//
+// Export links marked with data-export-kind are queued as ExportJob rows
+// (POST data-export-jobs) instead of being built inside a web worker. We poll
+// the job's status URL and start the download once run_export_worker has
+// written the file. If queuing fails, the job fails, no worker picks the job
+// up within QUEUE_PATIENCE_MS, the whole wait passes MAX_WAIT_MS (e.g. its
+// worker died mid-build) or MAX_POLL_FAILURES status checks in a row fail, we
+// cancel the job and fall back to the link's own synchronous export, so the
+// button always ends in exactly one download.
+
+document.addEventListener('DOMContentLoaded', function() {
+    if (!window.fetch) return;
+
+    const POLL_MS = 1500;
+    const QUEUE_PATIENCE_MS = 20000;
+    const MAX_WAIT_MS = 5 * 60 * 1000;
+    const MAX_POLL_FAILURES = 5;
+
+    function setBusy(link, busy) {
+        link.classList.toggle('opacity-60', busy);
+        link.classList.toggle('pointer-events-none', busy);
+        link.setAttribute('aria-busy', busy ? 'true' : 'false');
+    }
+
+    async function runExport(link) {
+        const fallback = function() { window.location.href = link.href; };
+        const body = new FormData();
+        body.append('kind', link.dataset.exportKind);
+        body.append('params', new URL(link.href, window.location.href).search.replace(/^\?/, ''));
+
+        let job;
+        try {
+            const resp = await fetch(link.dataset.exportJobs, {
+                method: 'POST',
+                body: body,
+                headers: { 'X-CSRFToken': link.dataset.csrf, 'Accept': 'application/json' },
+                credentials: 'same-origin',
+            });
+            if (resp.status !== 202) return fallback();
+            job = await resp.json();
+        } catch (e) {
+            return fallback();
+        }
+
+        const giveUp = function() {
+            // Dequeue the job (or discard its result) so the worker does not
+            // build a file nobody will download.
+            fetch(job.cancel_url, {
+                method: 'POST',
+                headers: { 'X-CSRFToken': link.dataset.csrf, 'Accept': 'application/json' },
+                credentials: 'same-origin',
+                keepalive: true,
+            }).catch(function() {});
+            fallback();
+        };
+
+        const queuedAt = Date.now();
+        let failures = 0;
+        while (Date.now() - queuedAt < MAX_WAIT_MS) {
+            await new Promise(function(resolve) { setTimeout(resolve, POLL_MS); });
+            try {
+                const resp = await fetch(job.status_url, { credentials: 'same-origin', cache: 'no-store' });
+                if (!resp.ok) throw new Error('status ' + resp.status);
+                job = await resp.json();
+                failures = 0;
+            } catch (e) {
+                // Flaky signal: keep polling, up to a point.
+                if (++failures >= MAX_POLL_FAILURES) return giveUp();
+                continue;
+            }
+            if (job.status === 'done' && job.download_url) {
+                window.location.href = job.download_url;
+                return;
+            }
+            if (job.status === 'failed') return fallback();
+            if (job.status === 'queued' && Date.now() - queuedAt > QUEUE_PATIENCE_MS) return giveUp();
+        }
+        return giveUp();
+    }
+
+    document.querySelectorAll('a[data-export-kind]').forEach(function(link) {
+        link.addEventListener('click', async function(event) {
+            if (event.metaKey || event.ctrlKey || event.shiftKey) return;
+            event.preventDefault();
+            setBusy(link, true);
+            try {
+                await runExport(link);
+            } finally {
+                setBusy(link, false);
+            }
+        });
+    });
+});
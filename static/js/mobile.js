@@ -79,6 +79,8 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
+    initChunkedPhotoUploads();
+
     // Prevent zoom on input focus for iOS
     if (/iPhone|iPad|iPod/.test(navigator.userAgent)) {
         const inputs = document.querySelectorAll('input, select, textarea');
@@ -130,3 +132,178 @@ function previewMobilePhoto(input) {
         reader.readAsDataURL(input.files[0]);
     }
 }
+
+// Chunked, resumable photo uploads (core/services/photo_uploads.py).
+// A file input marked data-chunked-upload is downscaled on the device and
+// sent in small chunks as soon as a photo is picked; the form then submits
+// only the upload id (data-upload-field) instead of the multi-megabyte file.
+// Without fetch/canvas support the input keeps working as a plain upload.
+const PHOTO_MAX_EDGE = 2048;
+const PHOTO_JPEG_QUALITY = 0.85;
+const UPLOAD_RETRY_DELAYS = [1000, 2000, 5000, 10000, 20000];
+
+function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+// Re-encode as JPEG with the longest edge at most PHOTO_MAX_EDGE. Drawing
+// to a canvas also drops EXIF (GPS). Falls back to the original file.
+async function downscalePhoto(file) {
+    if (!window.createImageBitmap || !/^image\//.test(file.type)) return file;
+    let bitmap;
+    try {
+        bitmap = await createImageBitmap(file, { imageOrientation: 'from-image' });
+    } catch (e) {
+        return file;
+    }
+    const scale = Math.min(1, PHOTO_MAX_EDGE / Math.max(bitmap.width, bitmap.height));
+    const canvas = document.createElement('canvas');
+    canvas.width = Math.round(bitmap.width * scale);
+    canvas.height = Math.round(bitmap.height * scale);
+    canvas.getContext('2d').drawImage(bitmap, 0, 0, canvas.width, canvas.height);
+    if (bitmap.close) bitmap.close();
+    const blob = await new Promise(resolve => canvas.toBlob(resolve, 'image/jpeg', PHOTO_JPEG_QUALITY));
+    return blob && blob.size < file.size ? blob : file;
+}
+
+// Parse an upload endpoint response. 409 carries the offset to resume from;
+// other 4xx are final, network errors and 5xx are retried.
+async function uploadResponse(response) {
+    const body = await response.json().catch(() => ({}));
+    if (response.ok || response.status === 409) return body;
+    const error = new Error(body.error || `Upload failed (${response.status})`);
+    error.fatal = response.status < 500;
+    throw error;
+}
+
+async function withRetries(request) {
+    for (let attempt = 0; ; attempt++) {
+        try {
+            return await request();
+        } catch (error) {
+            if (error.fatal || attempt >= UPLOAD_RETRY_DELAYS.length) throw error;
+            await sleep(UPLOAD_RETRY_DELAYS[attempt]);
+        }
+    }
+}
+
+// Key under which an upload session is remembered: the SHA-256 of the bytes
+// being sent, so two photos that share a name and size (every iOS pick is
+// "image.jpg") can never resume each other's session. Without WebCrypto
+// (plain-http pages) fall back to `pickKey`, which is new for every pick.
+async function uploadSessionKey(blob, pickKey) {
+    if (!window.crypto || !window.crypto.subtle) return pickKey;
+    try {
+        const digest = await window.crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+        const hex = Array.from(new Uint8Array(digest), byte => byte.toString(16).padStart(2, '0')).join('');
+        return `photoUpload:sha256:${hex}`;
+    } catch (e) {
+        return pickKey;
+    }
+}
+
+// Send `blob` in chunks and resolve with the upload id. The session URL is
+// kept in localStorage under `key`, so a retry (or a reload) continues where
+// the server says the data ends instead of starting over.
+async function uploadPhotoInChunks(blob, filename, key, startUrl, csrfToken, onProgress) {
+    const headers = { 'X-CSRFToken': csrfToken };
+    let session = null;
+
+    const savedUrl = localStorage.getItem(key);
+    if (savedUrl) {
+        session = await fetch(savedUrl, { credentials: 'same-origin' }).then(uploadResponse).catch(() => null);
+    }
+    if (!session) {
+        session = await withRetries(() => fetch(startUrl, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { ...headers, 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: filename, size: blob.size, content_type: blob.type }),
+        }).then(uploadResponse));
+        localStorage.setItem(key, session.url);
+    }
+
+    let offset = session.offset;
+    onProgress(offset / blob.size);
+    while (offset < blob.size) {
+        const start = offset;
+        const result = await withRetries(() => fetch(session.url, {
+            method: 'PUT',
+            credentials: 'same-origin',
+            headers: { ...headers, 'Content-Type': 'application/octet-stream', 'Upload-Offset': String(start) },
+            body: blob.slice(start, start + session.chunk_size),
+        }).then(uploadResponse));
+        offset = result.offset;
+        onProgress(offset / blob.size);
+    }
+    localStorage.removeItem(key);
+    return session.id;
+}
+
+function initChunkedPhotoUploads() {
+    if (!window.fetch || !window.Blob || !window.localStorage) return;
+
+    document.querySelectorAll('input[type="file"][data-chunked-upload]').forEach(input => {
+        const form = input.form;
+        const idField = form && form.querySelector(`[name="${input.dataset.uploadField}"]`);
+        const csrfField = form && form.querySelector('[name="csrfmiddlewaretoken"]');
+        if (!idField || !csrfField) return;
+        const status = document.getElementById(input.dataset.uploadStatus || '');
+        let uploading = null;
+        let pickKey = null;
+
+        const setStatus = text => {
+            if (!status) return;
+            status.textContent = text;
+            status.classList.toggle('hidden', !text);
+        };
+
+        const startUpload = () => {
+            const file = input.files && input.files[0];
+            idField.value = '';
+            if (!file) return null;
+            setStatus('Preparing photo…');
+            uploading = downscalePhoto(file)
+                .then(async blob => {
+                    const filename = blob === file ? file.name : file.name.replace(/\.[^.]*$/, '') + '.jpg';
+                    const key = await uploadSessionKey(blob, pickKey);
+                    return uploadPhotoInChunks(blob, filename, key, input.dataset.uploadUrl, csrfField.value,
+                        fraction => setStatus(`Uploading photo… ${Math.round(fraction * 100)}%`));
+                })
+                .then(id => {
+                    idField.value = id;
+                    setStatus('Photo uploaded.');
+                    return id;
+                });
+            uploading.catch(() => setStatus('Upload interrupted. It will resume when you submit.'));
+            return uploading;
+        };
+
+        input.addEventListener('change', () => {
+            // A new pick never resumes the previous pick's session; a retry
+            // of the same pick (on submit) does.
+            pickKey = `photoUpload:pick:${Date.now()}:${Math.random().toString(36).slice(2)}`;
+            startUpload();
+        });
+
+        form.addEventListener('submit', event => {
+            if (idField.value) {
+                input.disabled = true;  // the photo is on the server already; send only its id
+                return;
+            }
+            if (!uploading) return;
+            event.preventDefault();
+            setStatus('Finishing photo upload…');
+            uploading
+                .catch(() => startUpload())
+                .then(() => {
+                    input.disabled = true;
+                    form.submit();
+                })
+                .catch(() => {
+                    setStatus('Chunked upload failed; sending the photo with the form.');
+                    form.submit();
+                });
+        });
+    });
+}
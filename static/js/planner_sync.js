@@ -0,0 +1,50 @@
+// Planner revalidation for the weekly and monthly planners.
+//
+// The page is rendered with the ETag of its date range (#plannerSync
+// data-etag). While the tab is visible we revalidate that range against
+// planner/data/ with If-None-Match: an unchanged range answers 304 with no
+// body. When a task in view was added, edited, moved or deleted, or one of
+// their visit logs changed, #plannerSync is shown as a "Planner changed —
+// Reload" notice; the page is never reloaded under the user.
+
+document.addEventListener('DOMContentLoaded', function() {
+    const root = document.getElementById('plannerSync');
+    if (!root || !window.fetch) return;
+
+    const url = root.dataset.url;
+    const etag = root.dataset.etag;
+    const intervalMs = parseInt(root.dataset.interval || '60000', 10);
+    let inFlight = false;
+    let stale = false;
+
+    function showNotice() {
+        stale = true;  // nothing more to learn until the user reloads
+        root.classList.remove('hidden');
+        root.classList.add('flex');
+    }
+
+    async function revalidate() {
+        if (stale || inFlight || document.visibilityState !== 'visible') return;
+        inFlight = true;
+        try {
+            const resp = await fetch(url, {
+                headers: { 'If-None-Match': etag, 'Accept': 'application/json' },
+                cache: 'no-store',
+                credentials: 'same-origin',
+            });
+            if (resp.status !== 200) return;  // 304: page is current
+            const fresh = resp.headers.get('ETag');
+            if (!fresh || fresh === etag) return;
+            showNotice();
+        } catch (e) {
+            // Offline or flaky signal: try again on the next tick.
+        } finally {
+            inFlight = false;
+        }
+    }
+
+    const reload = root.querySelector('[data-planner-reload]');
+    if (reload) reload.addEventListener('click', function() { window.location.reload(); });
+    document.addEventListener('visibilitychange', revalidate);
+    setInterval(revalidate, intervalMs);
+});